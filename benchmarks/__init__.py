@@ -0,0 +1 @@
+from .synthetic import make_trips
@@ -0,0 +1,126 @@
+"""
+Arrow-backed mode vs the NumPy / object path: memory use, load time and
+duplicate / groupby throughput on the same synthetic CSV.
+
+Three storages of the same file are compared:
+
+- object:  text columns as Python objects (pandas < 3 default)
+- str:     pandas' default string dtype
+- pyarrow: ``read_csv_arrow`` (Arrow types, dictionary-encoded
+           low-cardinality text, parsed timestamps)
+
+Usage
+-----
+python -m benchmarks.arrow
+python -m benchmarks.arrow --rows 1M --repeat 5 --output arrow.json
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from data_preprocessor.arrow import read_csv_arrow
+from data_preprocessor.duplicates import DuplicateHandler
+
+from .suite import parse_size
+from .synthetic import make_trips
+
+BACKENDS = ['object', 'str', 'pyarrow']
+KEY_COLUMNS = ['start_time', 'bike_id']
+GROUP_COLUMNS = ['user_type', 'member_gender']
+
+# name -> function of the frame
+OPERATIONS = {
+    'duplicated (all columns)': lambda df: df.duplicated().sum(),
+    'duplicated (start_time, bike_id)': lambda df: df.duplicated(subset=KEY_COLUMNS).sum(),
+    'DuplicateHandler.check_duplicates': lambda df: DuplicateHandler(df).check_duplicates(),
+    'groupby user_type x gender': lambda df: df.groupby(GROUP_COLUMNS, observed=True)['duration_sec'].agg(['mean', 'count']),
+    'value_counts member_gender': lambda df: df['member_gender'].value_counts(),
+    'nunique (all columns)': lambda df: df.nunique(),
+}
+
+
+def load(path, backend):
+    """Read ``path`` with the given storage"""
+    if backend == 'pyarrow':
+        return read_csv_arrow(path)
+    df = pd.read_csv(path)
+    if backend == 'object':
+        text = df.select_dtypes(include=['str', 'string']).columns
+        df = df.astype({c: object for c in text})
+    return df
+
+
+def _best(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def compare_backends(rows=1_000_000, repeat=3, backends=None, seed=0):
+    """
+    Time loading and the duplicate / groupby operations on each storage
+
+    Returns
+    -------
+    pandas.DataFrame
+        One row per measurement ('memory_mb', 'load_s', then one per
+        operation in seconds), one column per backend, plus the speed-up
+        of 'pyarrow' over 'object' when both were run
+    """
+    backends = backends or BACKENDS
+    unknown = [b for b in backends if b not in BACKENDS]
+    if unknown:
+        raise ValueError(f"Unknown backend(s) {unknown}. Use {BACKENDS}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'trips.csv')
+        make_trips(rows, seed=seed).to_csv(path, index=False)
+
+        table = {}
+        for backend in backends:
+            column = {'load_s': _best(lambda: load(path, backend), repeat)}
+            df = load(path, backend)
+            column['memory_mb'] = df.memory_usage(index=False, deep=True).sum() / 1024**2
+            for name, operation in OPERATIONS.items():
+                column[name] = _best(lambda: operation(df), repeat)
+            table[backend] = column
+            del df
+
+    result = pd.DataFrame(table)
+    if 'object' in result and 'pyarrow' in result:
+        result['speedup'] = result['object'] / result['pyarrow']
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.arrow',
+        description='Compare the Arrow-backed mode with the NumPy / object path.',
+    )
+    parser.add_argument('--rows', default='1M', help='rows of synthetic data (default: 1M)')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per measurement; the fastest counts')
+    parser.add_argument('--backends', nargs='+', default=BACKENDS, choices=BACKENDS)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=None, help='also write the table to this JSON file')
+    args = parser.parse_args(argv)
+
+    result = compare_backends(parse_size(args.rows), args.repeat, args.backends, args.seed)
+    print(result.round(3).to_string())
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result.to_dict(), f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""
+Import-time report: how long importing each package entry point takes in
+a fresh interpreter, and which heavy libraries it pulls in.
+
+Usage
+-----
+python -m benchmarks.imports
+python -m benchmarks.imports data_preprocessor.batch --top 15 --repeat 5
+python -m benchmarks.imports --output imports.json
+"""
+import argparse
+import json
+import re
+import subprocess
+import sys
+
+import pandas as pd
+
+TARGETS = [
+    'data_preprocessor',
+    'data_preprocessor.pipeline',
+    'data_preprocessor.batch',
+    'data_visualization.stats_cube',
+    'data_visualization.correlation',
+    'data_visualization.univariate',
+]
+
+# Libraries worth knowing about when they are loaded without being used
+HEAVY = ['matplotlib', 'seaborn', 'streamlit', 'pyarrow', 'scipy']
+
+_LINE = re.compile(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def import_times(module, python=None):
+    """
+    Import ``module`` in a new interpreter with ``-X importtime``
+
+    Returns
+    -------
+    pandas.DataFrame
+        One row per module loaded by the import: module, self_ms,
+        cumulative_ms and depth (0 = ``module`` or one of its parent
+        packages, 1 = imported directly by those)
+    """
+    process = subprocess.run(
+        [python or sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True,
+    )
+    if process.returncode != 0:
+        message = process.stderr.strip().splitlines()
+        raise ValueError(f"Importing {module} failed: {message[-1] if message else 'unknown error'}")
+
+    # Children are listed before their parent; a depth-0 line closes the
+    # block of one top-level import. Keep the blocks of ``module`` and its
+    # parent packages, leaving out interpreter start-up (site, .pth files).
+    chain = {'.'.join(module.split('.')[:i]) for i in range(1, module.count('.') + 2)}
+    rows, block = [], []
+    for line in process.stderr.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        own, cumulative, indent, name = match.groups()
+        block.append({
+            'module': name,
+            'self_ms': int(own) / 1000,
+            'cumulative_ms': int(cumulative) / 1000,
+            'depth': len(indent) // 2,
+        })
+        if block[-1]['depth'] == 0:
+            if name in chain:
+                rows += block
+            block = []
+    return pd.DataFrame(rows, columns=['module', 'self_ms', 'cumulative_ms', 'depth'])
+
+
+def import_report(module, repeat=3, top=10, python=None):
+    """
+    Summary of importing ``module``, keeping the fastest of ``repeat``
+    runs (the first run may include writing bytecode caches)
+
+    Returns
+    -------
+    dict with module, total_ms, modules (count), heavy (loaded heavy
+    libraries) and slowest (the ``top`` top-level modules of the
+    import by cumulative time)
+    """
+    best = None
+    for _ in range(repeat):
+        times = import_times(module, python)
+        total = float(times.loc[times['depth'] == 0, 'cumulative_ms'].sum())
+        if best is None or total < best[0]:
+            best = (total, times)
+
+    total, times = best
+    loaded = set(times['module'])
+    top_level = times[times['depth'] == 1]
+    slowest = top_level.nlargest(top, 'cumulative_ms')
+    return {
+        'module': module,
+        'total_ms': round(total, 1),
+        'modules': len(times),
+        'heavy': [lib for lib in HEAVY if lib in loaded],
+        'slowest': slowest[['module', 'cumulative_ms']].to_dict('records'),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.imports',
+        description='Report the import time of package entry points.',
+    )
+    parser.add_argument('modules', nargs='*', default=TARGETS,
+                        help='modules to import (default: the package entry points)')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per module; the fastest counts')
+    parser.add_argument('--top', type=int, default=8, help='slowest direct imports to list')
+    parser.add_argument('--output', default=None, help='also write the report to this JSON file')
+    args = parser.parse_args(argv)
+
+    reports = [import_report(m, repeat=args.repeat, top=args.top) for m in args.modules]
+    for report in reports:
+        heavy = ', '.join(report['heavy']) or 'none'
+        print(f"{report['module']}: {report['total_ms']:.0f} ms, {report['modules']} modules, heavy: {heavy}")
+        for entry in report['slowest']:
+            print(f"    {entry['cumulative_ms']:>8.1f} ms  {entry['module']}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(reports, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,463 @@
+"""
+Benchmark suite: times every preprocessing handler method and every plot
+on synthetic bike-share data (see ``benchmarks.synthetic``).
+
+Usage
+-----
+python -m benchmarks.suite --sizes 10k 100k 1M --output results.json
+python -m benchmarks.suite --sizes 1M --only "outliers.*" "missing.*" --repeat 5
+python -m benchmarks.suite --sizes 10k 1M --baseline baseline.json --tolerance 0.2
+python -m benchmarks.suite --sizes 1M --dtype-backend pyarrow --baseline numpy_results.json
+python -m benchmarks.suite --list
+
+Plots are drawn with the headless Agg backend; Streamlit calls run in bare
+mode and only draw into the figure. With ``--baseline`` the exit code is 1
+when any case got slower than the tolerance allows.
+"""
+import argparse
+import fnmatch
+import json
+import logging
+import platform
+import statistics
+import sys
+import warnings
+from datetime import datetime, timezone
+
+import matplotlib
+
+matplotlib.use('Agg')
+
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from data_preprocessor.datatypes import DataTypeHandler  # noqa: E402
+from data_preprocessor.duplicates import DuplicateHandler  # noqa: E402
+from data_preprocessor.features import DerivedFeatures  # noqa: E402
+from data_preprocessor.missing import MissingValuesHandler  # noqa: E402
+from data_preprocessor.outliers import OutlierHandler  # noqa: E402
+from data_preprocessor.plan import PreprocessingPlan  # noqa: E402
+from data_preprocessor.profiling import Profiler  # noqa: E402
+from data_preprocessor.sketches import ColumnSketches  # noqa: E402
+from data_visualization.bivariate import BivariateHandler  # noqa: E402
+from data_visualization.correlation import CorrelationEngine  # noqa: E402
+from data_visualization.multivariate import MultivariateHandler  # noqa: E402
+from data_visualization.stats_cube import StatsCube  # noqa: E402
+from data_visualization.univariate import UnivariateHandler  # noqa: E402
+
+from .synthetic import make_trips  # noqa: E402
+
+# Bare-mode Streamlit warns about the missing session on every element call
+logging.getLogger('streamlit.runtime.scriptrunner_utils.script_run_context').addFilter(lambda record: False)
+
+SIZES = {'k': 1_000, 'm': 1_000_000}
+MAX_ROWS = 50_000_000
+
+# name -> function(df) returning the zero-argument call to time.
+# Set-up done in the function (building the handler) is not timed.
+CASES = {}
+
+
+def case(name):
+    def register(func):
+        CASES[name] = func
+        return func
+    return register
+
+
+# -------------------------------------------------
+# data_preprocessor
+# -------------------------------------------------
+
+@case('datatypes.check_dtypes')
+def _(df):
+    return DataTypeHandler(df).check_dtypes
+
+
+@case('datatypes.convert_dtype')
+def _(df):
+    handler = DataTypeHandler(df)
+    return lambda: handler.convert_dtype('user_type', 'category')
+
+
+@case('datatypes.convert_datetimes')
+def _(df):
+    handler = DataTypeHandler(df)
+    return lambda: handler.convert_datetimes(['start_time', 'end_time'])
+
+
+@case('datatypes.optimize_memory')
+def _(df):
+    return DataTypeHandler(df).optimize_memory
+
+
+@case('missing.check_nulls')
+def _(df):
+    return MissingValuesHandler(df).check_nulls
+
+
+@case('missing.handle_nulls')
+def _(df):
+    handler = MissingValuesHandler(df)
+    return lambda: handler.handle_nulls('member_birth_year', 'median')
+
+
+@case('missing.handle_nulls_many')
+def _(df):
+    handler = MissingValuesHandler(df)
+    strategies = {'member_birth_year': 'median', 'member_gender': 'mode'}
+    return lambda: handler.handle_nulls_many(strategies, by=['user_type'])
+
+
+@case('duplicates.check_duplicates')
+def _(df):
+    return DuplicateHandler(df).check_duplicates
+
+
+@case('duplicates.remove_duplicates')
+def _(df):
+    return DuplicateHandler(df).remove_duplicates
+
+
+@case('outliers.bounds')
+def _(df):
+    handler = OutlierHandler(df)
+    return lambda: handler.bounds(['duration_sec', 'member_birth_year'])
+
+
+@case('outliers.handle_outliers')
+def _(df):
+    handler = OutlierHandler(df)
+    return lambda: handler.handle_outliers(['duration_sec', 'member_birth_year'], 'iqr')
+
+
+@case('outliers.cap_iqr')
+def _(df):
+    handler = OutlierHandler(df)
+    return lambda: handler.cap_iqr('duration_sec')
+
+
+@case('outliers.boxplot')
+def _(df):
+    handler = OutlierHandler(df)
+    return lambda: plt.close(handler.boxplot('duration_sec'))
+
+
+@case('sketches.build')
+def _(df):
+    return lambda: ColumnSketches(seed=0).update(df)
+
+
+@case('sketches.iqr_bounds')
+def _(df):
+    sketches = ColumnSketches(seed=0).update(df)
+    return sketches.iqr_bounds
+
+
+@case('sketches.json_roundtrip')
+def _(df):
+    # Dates as after the app's datetime step, so the frequent items hold Timestamps
+    dated = df.assign(start_date=pd.to_datetime(df['start_time']).dt.normalize())
+    sketches = ColumnSketches(seed=0).update(dated)
+
+    def roundtrip():
+        loaded = ColumnSketches.from_json(sketches.to_json())
+        if not loaded.top_values('start_date').equals(sketches.top_values('start_date')):
+            raise ValueError("Datetime frequent items changed in the JSON round trip")
+        return loaded
+    return roundtrip
+
+
+@case('plan.execute')
+def _(df):
+    plan = PreprocessingPlan()
+    plan.dtypes.convert_dtype('user_type', 'category')
+    plan.missing.handle_nulls('member_birth_year', 'median')
+    plan.duplicates.remove_duplicates()
+    plan.outliers.handle_outliers(['duration_sec'], 'iqr')
+    return lambda: plan.execute(df)
+
+
+@case('features.duration_min')
+def _(df):
+    features = DerivedFeatures(df)
+    return lambda: features.get('duration_min')
+
+
+@case('correlation.pearson')
+def _(df):
+    return lambda: CorrelationEngine(df).pearson()
+
+
+@case('correlation.spearman')
+def _(df):
+    return lambda: CorrelationEngine(df).spearman()
+
+
+@case('stats_cube.build')
+def _(df):
+    return lambda: StatsCube(df).summary('user_type', 'duration_min')
+
+
+# -------------------------------------------------
+# data_visualization
+# -------------------------------------------------
+
+def _plot_case(name, handler_class, method):
+    @case(name)
+    def _(df):
+        # A new handler per call: nothing is reused from an earlier run
+        return lambda: getattr(handler_class(df), method)()
+
+
+for _method in (
+    'plot_user_type_distribution', 'plot_bike_share_distribution', 'plot_age_distribution',
+    'plot_duration_min_distribution', 'plot_gender_distribution', 'plot_duration_hr_distribution',
+):
+    _plot_case(f'univariate.{_method}', UnivariateHandler, _method)
+
+for _method in (
+    'avg_duration_by_user_type', 'duration_by_gender', 'duration_by_user_type',
+    'age_by_user_type', 'age_by_gender',
+):
+    _plot_case(f'bivariate.{_method}', BivariateHandler, _method)
+
+for _method in ('plot_correlation_heatmap', 'plot_specific_correlation', 'plot_data_stat_correlation'):
+    _plot_case(f'multivariate.{_method}', MultivariateHandler, _method)
+
+
+# -------------------------------------------------
+# Running and comparing
+# -------------------------------------------------
+
+def parse_size(text):
+    """'10k', '1M', '50m' or '250000' -> number of rows"""
+    text = str(text).strip().lower().replace('_', '')
+    factor = SIZES.get(text[-1:], 1)
+    try:
+        rows = int(float(text[:-1] if factor > 1 else text) * factor)
+    except ValueError:
+        raise ValueError(f"Invalid size '{text}' (e.g. 10k, 1M, 250000)") from None
+    if not 0 < rows <= MAX_ROWS:
+        raise ValueError(f"Size must be between 1 and {MAX_ROWS:,} rows")
+    return rows
+
+
+def select_cases(patterns=None):
+    if not patterns:
+        return list(CASES)
+    names = [n for n in CASES if any(fnmatch.fnmatch(n, p) for p in patterns)]
+    if not names:
+        raise ValueError(f"No benchmark matches {patterns}")
+    return names
+
+
+def run_suite(sizes, cases=None, repeat=3, memory=False, data_options=None, log=print):
+    """
+    Time each case on a synthetic frame of every size
+
+    Parameters
+    ----------
+    sizes : list of int
+    cases : list of str, optional
+        Case names (default: all of ``CASES``)
+    repeat : int
+        Runs per case and size; the fastest is reported
+    memory : bool
+        Also record peak memory (tracemalloc; slows the runs down)
+    data_options : dict, optional
+        Passed to ``make_trips`` (null_rate, duplicate_rate, outlier_rate,
+        seed, dtype_backend)
+    log : callable, optional
+        Receives one progress line per result
+
+    Returns
+    -------
+    dict with 'meta' and 'results' (one entry per case and size)
+    """
+    cases = cases or list(CASES)
+    data_options = data_options or {}
+    results = []
+
+    for rows in sizes:
+        df = make_trips(rows, **data_options)
+        for name in cases:
+            profiler = Profiler(trace_memory=memory)
+            error = None
+            for _ in range(repeat):
+                # Each run gets its own copy-on-write view, so in-place
+                # steps never see the result of an earlier run
+                call = CASES[name](df.copy(deep=False))
+                try:
+                    with warnings.catch_warnings():
+                        warnings.simplefilter('ignore')
+                        with profiler.measure(name, df):
+                            call()
+                except Exception as exc:  # reported per case; keep benchmarking the rest
+                    error = f"{type(exc).__name__}: {exc}"
+                    break
+                finally:
+                    plt.close('all')
+
+            result = _result(name, rows, profiler.to_frame(), error)
+            results.append(result)
+            if log is not None:
+                log(_progress(result))
+        del df
+
+    return {'meta': _meta(repeat, memory, data_options), 'results': results}
+
+
+def _result(name, rows, runs, error):
+    wall = runs['wall_s'].tolist()
+    best = int(np.argmin(wall)) if wall else None
+    return {
+        'case': name,
+        'rows': rows,
+        'runs': len(wall),
+        'wall_s': wall[best] if wall else None,
+        'wall_median_s': statistics.median(wall) if wall else None,
+        'cpu_s': runs['cpu_s'].iloc[best] if wall else None,
+        'peak_mem_mb': runs['peak_mem_mb'].max() if wall and runs['peak_mem_mb'].notna().any() else None,
+        'error': error,
+    }
+
+
+def _progress(result):
+    if result['error']:
+        return f"{result['rows']:>11,}  {result['case']:<48} ERROR {result['error']}"
+    return f"{result['rows']:>11,}  {result['case']:<48} {result['wall_s'] * 1000:>10.1f} ms"
+
+
+def _meta(repeat, memory, data_options):
+    return {
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'matplotlib': matplotlib.__version__,
+        'machine': platform.machine(),
+        'platform': platform.platform(),
+        'repeat': repeat,
+        'memory': memory,
+        'data': data_options,
+    }
+
+
+def compare(results, baseline, tolerance=0.2, min_delta=0.005):
+    """
+    Compare two result sets case by case
+
+    A case is a 'regression' when it is more than ``tolerance`` (a share,
+    0.2 = 20 %) slower than the baseline and at least ``min_delta``
+    seconds slower (so millisecond noise on tiny inputs is ignored), and
+    'faster' in the opposite case.
+
+    Returns
+    -------
+    pandas.DataFrame
+        case, rows, baseline_s, current_s, ratio, status
+    """
+    current = _as_frame(results).rename(columns={'wall_s': 'current_s'})
+    previous = _as_frame(baseline).rename(columns={'wall_s': 'baseline_s'})
+    table = current.merge(previous, on=['case', 'rows'], how='left')
+    table['ratio'] = table['current_s'] / table['baseline_s']
+
+    delta = table['current_s'] - table['baseline_s']
+    status = np.select(
+        [
+            table['current_s'].isna(),
+            table['baseline_s'].isna(),
+            (table['ratio'] > 1 + tolerance) & (delta >= min_delta),
+            (table['ratio'] < 1 / (1 + tolerance)) & (-delta >= min_delta),
+        ],
+        ['error', 'new', 'regression', 'faster'],
+        default='ok',
+    )
+    table['status'] = status
+    return table[['case', 'rows', 'baseline_s', 'current_s', 'ratio', 'status']]
+
+
+def _as_frame(results):
+    frame = pd.DataFrame(results['results'], columns=['case', 'rows', 'wall_s'])
+    return frame.astype({'wall_s': float})
+
+
+def load_results(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_results(results, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, default=_json_default)
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.suite',
+        description='Time every handler method and plot on synthetic bike-share data.',
+    )
+    parser.add_argument('--sizes', nargs='+', default=['10k', '100k', '1M'],
+                        help='row counts, e.g. 10k 1M 50M (default: 10k 100k 1M)')
+    parser.add_argument('--only', nargs='+', default=None, metavar='PATTERN',
+                        help="run only matching cases, e.g. 'outliers.*'")
+    parser.add_argument('--repeat', type=int, default=3, help='runs per case; the fastest counts (default: 3)')
+    parser.add_argument('--memory', action='store_true', help='also record peak memory (slower)')
+    parser.add_argument('--null-rate', type=float, default=0.05)
+    parser.add_argument('--duplicate-rate', type=float, default=0.01)
+    parser.add_argument('--outlier-rate', type=float, default=0.01)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--dtype-backend', choices=['numpy', 'pyarrow'], default='numpy',
+                        help="column storage of the synthetic data ('pyarrow': Arrow-backed mode)")
+    parser.add_argument('--output', default='benchmark_results.json', help='results JSON file')
+    parser.add_argument('--baseline', default=None, help='results JSON to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='allowed slowdown before a case counts as a regression (default: 0.2 = 20%%)')
+    parser.add_argument('--list', action='store_true', help='list the benchmark cases and exit')
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print('\n'.join(CASES))
+        return 0
+    if args.repeat < 1:
+        parser.error('--repeat must be at least 1')
+
+    try:
+        sizes = [parse_size(s) for s in args.sizes]
+        cases = select_cases(args.only)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    results = run_suite(
+        sizes, cases, repeat=args.repeat, memory=args.memory,
+        data_options={
+            'null_rate': args.null_rate,
+            'duplicate_rate': args.duplicate_rate,
+            'outlier_rate': args.outlier_rate,
+            'seed': args.seed,
+            'dtype_backend': args.dtype_backend,
+        },
+    )
+    save_results(results, args.output)
+    print(f"\nResults written to {args.output}")
+
+    failed = any(r['error'] for r in results['results'])
+    if args.baseline:
+        table = compare(results, load_results(args.baseline), tolerance=args.tolerance)
+        changed = table[table['status'] != 'ok']
+        print(f"\nCompared with {args.baseline} (tolerance {args.tolerance:.0%}):")
+        print(changed.round(4).to_string(index=False) if len(changed) else 'No changes beyond the tolerance')
+        failed = failed or (table['status'] == 'regression').any()
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+
+from data_preprocessor.arrow import to_arrow
+
+START = np.datetime64('2019-02-01T00:00:00', 'ms')
+MONTH_MS = 28 * 24 * 3600 * 1000
+STATIONS = 330
+
+USER_TYPES = (['Subscriber', 'Customer'], [0.9, 0.1])
+GENDERS = (['Male', 'Female', 'Other'], [0.74, 0.24, 0.02])
+BIKE_SHARE = (['No', 'Yes'], [0.9, 0.1])
+
+# Columns that receive missing values, as in the February 2019 file
+NULL_COLUMNS = ['member_birth_year', 'member_gender', 'start_station_id', 'end_station_id']
+
+
+def make_trips(rows, null_rate=0.05, duplicate_rate=0.01, outlier_rate=0.01,
+               timestamps='text', seed=0, chunk_rows=5_000_000, dtype_backend='numpy'):
+    """
+    Synthetic bike-share trips with the schema of the Ford GoBike data
+
+    Parameters
+    ----------
+    rows : int
+        Number of rows, duplicates included
+    null_rate : float
+        Share of missing values in each of ``NULL_COLUMNS``
+    duplicate_rate : float
+        Share of rows that are exact copies of an earlier row
+    outlier_rate : float
+        Share of rows with an extreme ``duration_sec`` (several days) or
+        ``member_birth_year`` (before 1920)
+    timestamps : {'text', 'datetime'}
+        'text' gives strings as read from the CSV ('2019-02-28 17:32:10.145')
+    seed : int
+    chunk_rows : int
+        Rows generated at a time; keeps temporaries small for very large
+        frames (tens of millions of rows)
+    dtype_backend : {'numpy', 'pyarrow'}
+        'pyarrow' stores every column in an Arrow type, as
+        ``data_preprocessor.arrow.read_csv_arrow`` loads the file
+
+    Returns
+    -------
+    pandas.DataFrame
+    """
+    if rows < 1:
+        raise ValueError("rows must be positive")
+    for name, rate in (('null_rate', null_rate), ('duplicate_rate', duplicate_rate),
+                       ('outlier_rate', outlier_rate)):
+        if not 0 <= rate < 1:
+            raise ValueError(f"{name} must be in [0, 1)")
+    if timestamps not in ('text', 'datetime'):
+        raise ValueError("timestamps must be 'text' or 'datetime'")
+    if dtype_backend not in ('numpy', 'pyarrow'):
+        raise ValueError("dtype_backend must be 'numpy' or 'pyarrow'")
+
+    rng = np.random.default_rng(seed)
+    duplicates = int(rows * duplicate_rate)
+    unique = rows - duplicates
+
+    parts = [
+        _make_block(min(chunk_rows, unique - start), null_rate, outlier_rate, timestamps, rng)
+        for start in range(0, unique, chunk_rows)
+    ]
+    df = pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0]
+
+    if duplicates:
+        copies = df.iloc[rng.integers(0, unique, duplicates)]
+        df = pd.concat([df, copies], ignore_index=True)
+        # Spread the copies through the file instead of leaving them at the end
+        df = df.iloc[rng.permutation(rows)].reset_index(drop=True)
+    if dtype_backend == 'pyarrow':
+        df = to_arrow(df)
+    return df
+
+
+def _make_block(n, null_rate, outlier_rate, timestamps, rng):
+    duration = np.round(rng.lognormal(6.25, 0.75, n)).clip(61, 86_000)
+    birth_year = np.round(rng.normal(1984.8, 10.1, n)).clip(1920, 2001)
+
+    outliers = rng.random(n) < outlier_rate
+    duration[outliers] = rng.integers(200_000, 1_000_000, outliers.sum())
+    old = rng.random(n) < outlier_rate
+    birth_year[old] = rng.integers(1878, 1920, old.sum())
+
+    start = START + rng.integers(0, MONTH_MS, n).astype('timedelta64[ms]')
+    end = start + (duration * 1000).astype('timedelta64[ms]')
+    start_station = rng.integers(3, STATIONS, n).astype(float)
+    end_station = rng.integers(3, STATIONS, n).astype(float)
+    latitude = 37.77 + rng.normal(0, 0.05, STATIONS)
+    longitude = -122.41 + rng.normal(0, 0.05, STATIONS)
+
+    df = pd.DataFrame({
+        'duration_sec': duration.astype('int64'),
+        'start_time': start,
+        'end_time': end,
+        'start_station_id': start_station,
+        'start_station_latitude': latitude[start_station.astype(int)],
+        'start_station_longitude': longitude[start_station.astype(int)],
+        'end_station_id': end_station,
+        'end_station_latitude': latitude[end_station.astype(int)],
+        'end_station_longitude': longitude[end_station.astype(int)],
+        'bike_id': rng.integers(11, 7_000, n),
+        'user_type': _choice(USER_TYPES, n, rng),
+        'member_birth_year': birth_year,
+        'member_gender': _choice(GENDERS, n, rng),
+        'bike_share_for_all_trip': _choice(BIKE_SHARE, n, rng),
+    })
+
+    for column in NULL_COLUMNS:
+        missing = rng.random(n) < null_rate
+        df.loc[missing, column] = np.nan
+
+    if timestamps == 'text':
+        for column in ('start_time', 'end_time'):
+            df[column] = df[column].dt.strftime('%Y-%m-%d %H:%M:%S.%f').str.slice(0, -3)
+    return df
+
+
+def _choice(spec, n, rng):
+    """Strings drawn from (labels, probabilities), built via category codes"""
+    labels, p = spec
+    codes = rng.choice(len(labels), n, p=p)
+    return pd.Series(pd.Categorical.from_codes(codes, labels)).astype('str')
@@ -1,5 +1,31 @@
-from .datatypes import DataTypeHandler
-from .missing import MissingValuesHandler
-from .outliers import OutlierHandler
-from .duplicates import DuplicateHandler
-from .pipeline import PreprocessingPipeline
\ No newline at end of file
+import importlib
+
+# Public names and the submodule each one lives in. Submodules are imported
+# on first access, so ``import data_preprocessor`` stays cheap for batch
+# workers and tools that only need one handler.
+_EXPORTS = {
+    'DataTypeHandler': 'datatypes',
+    'MissingValuesHandler': 'missing',
+    'OutlierHandler': 'outliers',
+    'DuplicateHandler': 'duplicates',
+    'PreprocessingPipeline': 'pipeline',
+    'PreprocessingPlan': 'plan',
+    'Profiler': 'profiling',
+    'ColumnProfile': 'column_profile',
+    'ColumnSketches': 'sketches',
+    'JobScheduler': 'jobs',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{_EXPORTS[name]}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+# read_csv options of the Arrow-backed mode: pyarrow's multithreaded
+# parser, every column kept in an Arrow type (timestamps included)
+ARROW_CSV_OPTIONS = {'engine': 'pyarrow', 'dtype_backend': 'pyarrow'}
+CATEGORY_RATIO = 0.5
+
+
+def _require_pyarrow():
+    if not HAS_PYARROW:
+        raise ValueError("The Arrow-backed mode needs pyarrow (pip install pyarrow)")
+
+
+def is_arrow(series):
+    """Whether a column is stored in an Arrow type (``pd.ArrowDtype``)"""
+    return isinstance(series.dtype, pd.ArrowDtype)
+
+
+def read_csv_arrow(source, category_ratio=CATEGORY_RATIO, **read_csv_kwargs):
+    """
+    Read a CSV into Arrow dtypes: numbers as Arrow ints / doubles,
+    timestamps as ``timestamp[...]``, text as Arrow strings, and text
+    columns with few distinct values (user_type, member_gender, ...) as
+    dictionary-encoded strings
+    """
+    _require_pyarrow()
+    df = pd.read_csv(source, **{**ARROW_CSV_OPTIONS, **read_csv_kwargs})
+    return to_arrow(df, category_ratio)
+
+
+def to_arrow(df, category_ratio=CATEGORY_RATIO):
+    """
+    Return ``df`` with every column in an Arrow type
+
+    Categoricals become dictionaries; text columns whose distinct count
+    is at most ``category_ratio`` of their non-null count are dictionary
+    encoded too (``None`` to keep every text column a plain string).
+    Columns that are already Arrow-backed are reused as they are.
+    """
+    _require_pyarrow()
+    columns = {}
+    for name, series in df.items():
+        if not is_arrow(series):
+            array = pa.array(series, from_pandas=True)
+            series = pd.Series(array, index=df.index, name=name, dtype=pd.ArrowDtype(array.type))
+        if category_ratio is not None and _should_encode(series, category_ratio):
+            series = _dictionary_encode(series)
+        columns[name] = series
+    return pd.DataFrame(columns, index=df.index)
+
+
+def _should_encode(series, category_ratio):
+    arrow_type = series.dtype.pyarrow_dtype
+    if not (pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type)):
+        return False
+    chunked = series.array._pa_array
+    count = len(chunked) - chunked.null_count
+    return count > 0 and len(pc.unique(chunked)) - (chunked.null_count > 0) <= category_ratio * count
+
+
+def _dictionary_encode(series):
+    encoded = pc.dictionary_encode(series.array._pa_array)
+    return pd.Series(encoded, index=series.index, name=series.name, dtype=pd.ArrowDtype(encoded.type))
+
+
+def arrow_dtype(dtype, series=None):
+    """
+    The Arrow equivalent of one of ``DataTypeHandler.convert_dtype``'s
+    dtype names ('int', 'float', 'bool', 'str', 'string', 'category',
+    'datetime'); other dtypes are returned unchanged
+
+    'category' becomes a dictionary of the column's value type
+    (``series``), strings when it is not known.
+    """
+    _require_pyarrow()
+    simple = {
+        'int': pa.int64(), 'float': pa.float64(), 'float32': pa.float32(), 'bool': pa.bool_(),
+        'str': pa.string(), 'string': pa.string(), 'object': pa.string(),
+        'datetime': pa.timestamp('ns'),
+    }
+    if dtype in simple:
+        return pd.ArrowDtype(simple[dtype])
+    if dtype == 'category':
+        value_type = pa.string()
+        if series is not None and is_arrow(series):
+            value_type = series.dtype.pyarrow_dtype
+            if pa.types.is_dictionary(value_type):
+                return series.dtype
+        elif series is not None and pd.api.types.is_numeric_dtype(series.dtype) \
+                and isinstance(series.dtype, np.dtype):
+            value_type = pa.from_numpy_dtype(series.dtype)
+        return pd.ArrowDtype(pa.dictionary(pa.int32(), value_type))
+    return dtype
+
+
+def timestamps_like(parsed, source):
+    """
+    Parsed datetimes in the storage of the column they were parsed from:
+    Arrow ``timestamp`` for an Arrow-backed source, unchanged otherwise
+    """
+    if not is_arrow(source) or is_arrow(parsed):
+        return parsed
+    dtype = parsed.dtype
+    if isinstance(dtype, pd.DatetimeTZDtype):
+        return parsed.astype(pd.ArrowDtype(pa.timestamp(dtype.unit, str(dtype.tz))))
+    return parsed.astype(pd.ArrowDtype(pa.timestamp(np.datetime_data(dtype)[0])))
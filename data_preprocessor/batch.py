@@ -0,0 +1,135 @@
+"""
+Headless batch runner: apply a saved preprocessing plan to every CSV in
+a directory, one worker process per file.
+
+Usage
+-----
+python -m data_preprocessor.batch plan.json data/ cleaned/
+python -m data_preprocessor.batch plan.json data/ cleaned/ --workers 8 --summary summary.csv
+python -m data_preprocessor.batch plan.json data/ cleaned/ --chunksize 500000
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from .chunked import ChunkedProcessor
+from .plan import PreprocessingPlan
+
+
+def process_file(plan, source, output, chunksize=None):
+    """
+    Apply ``plan`` to one CSV file and write the result to ``output``
+
+    Parameters
+    ----------
+    plan : PreprocessingPlan or dict
+        A dict (``plan.to_dict()``) is accepted so the plan can be sent
+        to worker processes cheaply
+    source, output : str
+    chunksize : int, optional
+        Stream the file in blocks of this many rows (``ChunkedProcessor``)
+        instead of loading it whole
+
+    Returns
+    -------
+    dict with file, rows_in, rows_out, seconds and error (None on success)
+    """
+    if isinstance(plan, dict):
+        plan = PreprocessingPlan.from_dict(plan)
+
+    start = time.perf_counter()
+    result = {'file': os.path.basename(source), 'rows_in': None, 'rows_out': None, 'error': None}
+    try:
+        if chunksize:
+            counts = ChunkedProcessor(source, chunksize=chunksize).process(plan, output)
+            result.update(counts)
+        else:
+            df = pd.read_csv(source)
+            cleaned = plan.execute(df)
+            cleaned.to_csv(output, index=False)
+            result.update(rows_in=len(df), rows_out=len(cleaned))
+    except Exception as exc:  # reported per file; one bad month must not stop the batch
+        result['error'] = f"{type(exc).__name__}: {exc}"
+    result['seconds'] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def run_batch(plan, input_dir, output_dir, pattern='*.csv', workers=None, chunksize=None):
+    """
+    Apply ``plan`` to every file matching ``pattern`` in ``input_dir``
+
+    Each file is processed by its own worker process (up to ``workers``
+    at a time, default: one per CPU) and written under the same name to
+    ``output_dir``.
+
+    Returns
+    -------
+    pandas.DataFrame
+        One row per file: file, rows_in, rows_out, seconds, error
+    """
+    if not isinstance(plan, PreprocessingPlan):
+        plan = PreprocessingPlan.from_json(plan)
+
+    sources = sorted(glob.glob(os.path.join(input_dir, pattern)))
+    if not sources:
+        raise ValueError(f"No files matching '{pattern}' in {input_dir}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    outputs = [os.path.join(output_dir, os.path.basename(s)) for s in sources]
+    if any(os.path.abspath(s) == os.path.abspath(o) for s, o in zip(sources, outputs)):
+        raise ValueError("output_dir must differ from input_dir")
+
+    spec = plan.to_dict()
+    workers = min(workers or os.cpu_count() or 1, len(sources))
+    if workers == 1:
+        results = [process_file(spec, s, o, chunksize) for s, o in zip(sources, outputs)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(
+                process_file, [spec] * len(sources), sources, outputs, [chunksize] * len(sources)
+            ))
+
+    summary = pd.DataFrame(results, columns=['file', 'rows_in', 'rows_out', 'seconds', 'error'])
+    return summary.astype({'rows_in': 'Int64', 'rows_out': 'Int64'})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m data_preprocessor.batch',
+        description='Apply a saved preprocessing plan to a directory of CSV files.',
+    )
+    parser.add_argument('plan', help='plan JSON (downloaded from the app or PreprocessingPlan.to_json)')
+    parser.add_argument('input_dir')
+    parser.add_argument('output_dir')
+    parser.add_argument('--pattern', default='*.csv', help="file pattern (default: '*.csv')")
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: one per CPU)')
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help='stream each file in blocks of this many rows')
+    parser.add_argument('--summary', default=None, help='also write the summary to this CSV file')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    summary = run_batch(
+        args.plan, args.input_dir, args.output_dir,
+        pattern=args.pattern, workers=args.workers, chunksize=args.chunksize,
+    )
+    elapsed = time.perf_counter() - start
+
+    print(summary.to_string(index=False))
+    ok = summary['error'].isna()
+    print(
+        f"\n{ok.sum()} of {len(summary)} files processed in {elapsed:.1f}s "
+        f"({int(summary.loc[ok, 'rows_out'].sum()):,} rows written)"
+    )
+    if args.summary:
+        summary.to_csv(args.summary, index=False)
+    return 0 if ok.all() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,223 @@
+import hashlib
+import os
+
+import pandas as pd
+
+from .arrow import read_csv_arrow
+
+try:
+    import pyarrow  # noqa: F401  (needed by DataFrame.to_parquet)
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'amit-datasets')
+BLOCK_SIZE = 1024 * 1024
+
+
+class DatasetCache:
+    """
+    Content-addressed on-disk cache of parsed CSV files
+
+    Each CSV is hashed (SHA-256 of its bytes plus the parse options) and
+    the parsed DataFrame is stored as Parquet under that hash, or as a
+    pickle when pyarrow is not installed. Re-opening the same file loads
+    the columnar copy instead of parsing the CSV again.
+
+    The least recently used entries are evicted once the cache grows past
+    ``max_bytes``.
+
+    Parameters
+    ----------
+    cache_dir : str, optional
+        Directory holding the cached files
+    max_bytes : int
+        Size limit for the whole cache directory
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=2 * 1024**3):
+        self.cache_dir = cache_dir or os.environ.get('AMIT_CACHE_DIR', DEFAULT_CACHE_DIR)
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key_for(source, **read_csv_kwargs):
+        """
+        Return the cache key of a CSV (path, bytes or file-like)
+        """
+        digest = hashlib.sha256()
+        if isinstance(source, (bytes, bytearray)):
+            digest.update(source)
+        elif hasattr(source, 'read'):
+            source.seek(0)
+            # Text streams return '' at the end, binary ones b''
+            while True:
+                block = source.read(BLOCK_SIZE)
+                if not block:
+                    break
+                digest.update(block if isinstance(block, bytes) else block.encode('utf-8'))
+            source.seek(0)
+        else:
+            with open(source, 'rb') as f:
+                for block in iter(lambda: f.read(BLOCK_SIZE), b''):
+                    digest.update(block)
+
+        digest.update(repr(sorted(read_csv_kwargs.items())).encode('utf-8'))
+        return digest.hexdigest()
+
+    def _path(self, key, ext):
+        return os.path.join(self.cache_dir, f"{key}.{ext}")
+
+    def _find(self, key):
+        for ext in ('parquet', 'pkl'):
+            path = self._path(key, ext)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def get(self, key, dtype_backend=None):
+        """
+        Return the cached DataFrame for ``key``, or None
+
+        ``dtype_backend='pyarrow'`` reads a Parquet entry back into Arrow
+        dtypes (needed for frames stored by the Arrow-backed mode)
+        """
+        path = self._find(key)
+        if path is None:
+            return None
+
+        try:
+            if path.endswith('.parquet'):
+                options = {'dtype_backend': dtype_backend} if dtype_backend else {}
+                df = pd.read_parquet(path, **options)
+            else:
+                df = pd.read_pickle(path)
+        except FileNotFoundError:
+            # Evicted by another session since _find
+            return None
+        except Exception:
+            # Corrupt or unreadable entry: drop it and treat as a miss
+            _remove(path)
+            return None
+
+        # Mark as recently used for LRU eviction
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return df
+
+    def put(self, key, df):
+        """
+        Store ``df`` under ``key`` and evict old entries if needed
+        """
+        path = None
+        if HAS_PYARROW:
+            path = self._path(key, 'parquet')
+            try:
+                df.to_parquet(path + '.tmp', index=False)
+            except Exception:
+                # Columns pyarrow cannot type (e.g. mixed objects)
+                if os.path.exists(path + '.tmp'):
+                    os.remove(path + '.tmp')
+                path = None
+
+        if path is None:
+            path = self._path(key, 'pkl')
+            df.to_pickle(path + '.tmp')
+
+        # Atomic rename so a concurrent reader never sees a partial file
+        os.replace(path + '.tmp', path)
+        self.evict()
+
+    def load_csv(self, source, arrow=False, **read_csv_kwargs):
+        """
+        Load a CSV through the cache
+
+        With ``arrow=True`` the file is parsed by ``read_csv_arrow``
+        (Arrow dtypes, dictionary-encoded low-cardinality text) and cached
+        separately from the default parse.
+
+        Returns
+        -------
+        (pandas.DataFrame, bool)
+            The data and whether it came from the cache
+        """
+        key_options = {**read_csv_kwargs, 'arrow': True} if arrow else read_csv_kwargs
+        key = self.key_for(source, **key_options)
+        df = self.get(key, dtype_backend='pyarrow' if arrow else None)
+        if df is not None:
+            return df, True
+
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        df = read_csv_arrow(source, **read_csv_kwargs) if arrow else pd.read_csv(source, **read_csv_kwargs)
+        self.put(key, df)
+        return df, False
+
+    def _entries(self):
+        """
+        ``(name, path, stat)`` of every finished cache file. Files being
+        written (``*.tmp``) are skipped, and so are files another session
+        removes while the directory is read.
+        """
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.tmp'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            yield name, path, stat
+
+    def info(self):
+        """
+        Return one row per cached dataset with its size and last use
+        """
+        rows = []
+        for name, _, stat in self._entries():
+            key, _, fmt = name.partition('.')
+            rows.append({
+                'key': key,
+                'format': fmt,
+                'size_mb': round(stat.st_size / 1024**2, 2),
+                'last_used': pd.Timestamp(stat.st_mtime, unit='s'),
+            })
+
+        return pd.DataFrame(rows, columns=['key', 'format', 'size_mb', 'last_used']) \
+            .sort_values('last_used', ascending=False, ignore_index=True)
+
+    def total_bytes(self):
+        return sum(stat.st_size for _, _, stat in self._entries())
+
+    def evict(self):
+        """
+        Remove least recently used entries until the cache fits ``max_bytes``
+        """
+        entries = [(stat.st_mtime, stat.st_size, path) for _, path, stat in self._entries()]
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            _remove(path)
+            total -= size
+
+    def clear(self):
+        """
+        Remove every cached dataset
+        """
+        for _, path, _ in list(self._entries()):
+            _remove(path)
+
+
+def _remove(path):
+    """
+    Delete a cache file that another session may already have removed
+    """
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,418 @@
+import numpy as np
+import pandas as pd
+
+from .hashing import HashIndex, row_hashes
+from .outliers import METHODS
+from .plan import PreprocessingPlan, _EXECUTORS
+from .sketches import ColumnSketches
+
+
+class ChunkedProcessor:
+    """
+    Stream a CSV in row blocks so that files larger than memory can be
+    inspected and cleaned.
+
+    Every check reads the file chunk by chunk and merges partial results,
+    so peak memory is bounded by ``chunksize`` rows (plus 8 bytes per
+    distinct row for duplicate detection).
+
+    Parameters
+    ----------
+    source : str or file-like
+        Path to a CSV file, or a seekable binary/text buffer
+    chunksize : int
+        Number of rows per block
+    **read_csv_kwargs
+        Extra arguments passed to ``pandas.read_csv``
+    """
+
+    def __init__(self, source, chunksize=100_000, **read_csv_kwargs):
+        self.source = source
+        self.chunksize = chunksize
+        self.read_csv_kwargs = read_csv_kwargs
+
+    def chunks(self):
+        """
+        Yield the file as a sequence of DataFrames
+        """
+        if hasattr(self.source, 'seek'):
+            self.source.seek(0)
+        yield from pd.read_csv(
+            self.source, chunksize=self.chunksize, **self.read_csv_kwargs
+        )
+
+    # ---------------------------------------------------------------
+    # Incremental checks
+    # ---------------------------------------------------------------
+
+    def check_nulls(self):
+        """
+        Return a table with null counts and null ratios (%), computed across
+        all chunks. Same layout as ``MissingValuesHandler.check_nulls``.
+        """
+        null_count = None
+        rows = 0
+        for chunk in self.chunks():
+            counts = chunk.isnull().sum()
+            null_count = counts if null_count is None else null_count.add(counts, fill_value=0)
+            rows += len(chunk)
+
+        null_ratio = (null_count / rows) * 100 if rows else null_count * 0.0
+        return pd.DataFrame({
+            'null_count': null_count.astype('int64'),
+            'null_ratio_%': null_ratio
+        })
+
+    def check_duplicates(self, subset=None):
+        """
+        Count rows that duplicate an earlier row anywhere in the file
+        """
+        seen = HashIndex()
+        total = 0
+        for chunk in self.chunks():
+            total += int(seen.add(row_hashes(chunk, subset)).sum())
+        return total
+
+    def check_dtypes(self):
+        """
+        Return the dtype each column has across the whole file
+
+        A column read as int in one chunk and float in another (because
+        of nulls) is reported as float, mixed numbers/strings as object.
+        """
+        dtypes = None
+        for chunk in self.chunks():
+            if dtypes is None:
+                dtypes = chunk.dtypes.copy()
+                continue
+            for column, dtype in chunk.dtypes.items():
+                dtypes[column] = _merge_dtype(dtypes[column], dtype)
+        return dtypes
+
+    def iqr_bounds(self, columns=None, k=1.5, bins=10_000):
+        """
+        Return Q1, Q3 and the IQR capping bounds for numeric columns
+
+        Quartiles are read from a fixed-width histogram built in a second
+        pass over the file, so each one is within ``(max - min) / bins`` of
+        the exact value.
+
+        Returns
+        -------
+        pandas.DataFrame
+            Indexed by column, with 'q1', 'q3', 'lower', 'upper'
+        """
+        if columns is None:
+            dtypes = self.check_dtypes()
+            columns = [c for c, d in dtypes.items() if pd.api.types.is_numeric_dtype(d)]
+        if isinstance(columns, str):
+            columns = [columns]
+
+        histograms = _StreamingHistograms(self, columns, bins)
+        q1 = pd.Series({c: histograms.quantile(c, 0.25) for c in columns})
+        q3 = pd.Series({c: histograms.quantile(c, 0.75) for c in columns})
+        iqr = q3 - q1
+
+        return pd.DataFrame({
+            'q1': q1,
+            'q3': q3,
+            'lower': q1 - k * iqr,
+            'upper': q3 + k * iqr,
+        })
+
+    def sketch(self, columns=None, **kwargs):
+        """
+        Build mergeable ``ColumnSketches`` (quantiles, distinct counts,
+        frequent values) of the file in one pass
+
+        Unlike ``iqr_bounds`` this reads the file once, and the result can
+        be merged with the sketches of other files or saved as JSON.
+        ``kwargs`` are passed to ``ColumnSketches`` (k, p, capacity, seed).
+        """
+        return ColumnSketches.from_chunks(self.chunks(), columns, **kwargs)
+
+    # ---------------------------------------------------------------
+    # Streaming execution
+    # ---------------------------------------------------------------
+
+    def process(self, plan, output, bins=10_000):
+        """
+        Apply a ``PreprocessingPlan`` chunk by chunk and append the result
+        to ``output`` (a CSV path)
+
+        Statistics the plan needs (fill values, IQR bounds) are gathered
+        in plan order before the output is written: each group of fill /
+        outlier steps reads the input with every step before it applied,
+        duplicate removal and earlier fills / caps included, so the result
+        matches ``PreprocessingPlan.execute`` up to the histogram accuracy
+        of the quantiles. Each such group costs its own passes over the
+        file. Duplicate removal keeps the first occurrence across the
+        whole file, so only ``keep='first'`` is supported.
+
+        Returns
+        -------
+        dict
+            'rows_in' and 'rows_out'
+        """
+        if not isinstance(plan, PreprocessingPlan):
+            plan = PreprocessingPlan.from_json(plan)
+
+        ops = plan.optimize()
+        if any(op['kind'] == 'dedup' and op['keep'] != 'first' for op in ops):
+            raise ValueError("Streaming duplicate removal only supports keep='first'")
+
+        ops = self._resolve(ops, bins)
+        seen = {}
+        rows_in = rows_out = 0
+        header = True
+
+        for chunk in self.chunks():
+            rows_in += len(chunk)
+            chunk = _apply(chunk, ops, seen)
+            chunk.to_csv(output, mode='w' if header else 'a', header=header, index=False)
+            header = False
+            rows_out += len(chunk)
+
+        return {'rows_in': rows_in, 'rows_out': rows_out}
+
+    def _resolve(self, ops, bins):
+        """
+        Attach global statistics to the ops that need them, in plan order
+        """
+        for op in ops:
+            if op['kind'] == 'fillna' and op['by'] is not None:
+                raise ValueError("Group-wise fills are not supported in chunked mode")
+            if op['kind'] == 'outliers' and op['method'] == 'mad':
+                raise ValueError("The 'mad' outlier method is not supported in chunked mode")
+
+        # Consecutive fill / outlier ops on different columns form one
+        # stage and share its passes; anything else in between (or a
+        # column used twice) starts a new stage on the updated data
+        resolved = []
+        stage = []
+        for op in ops:
+            if op['kind'] in ('fillna', 'outliers') and not _depends(op, stage):
+                stage.append(op)
+                continue
+            resolved += self._resolve_stage(resolved, stage, bins)
+            stage = []
+            if op['kind'] in ('fillna', 'outliers'):
+                stage.append(op)
+            else:
+                resolved.append(dict(op))
+        resolved += self._resolve_stage(resolved, stage, bins)
+        return resolved
+
+    def _resolve_stage(self, before, stage, bins):
+        """
+        Resolve the ops of one stage from the file with ``before`` (already
+        resolved ops) applied
+        """
+        if not stage:
+            return []
+        source = _PlannedSource(self, before)
+
+        fills = {}
+        for op in stage:
+            if op['kind'] == 'fillna':
+                fills.update(op['strategies'])
+        outlier_ops = [op for op in stage if op['kind'] == 'outliers']
+
+        if any(op['columns'] is None for op in outlier_ops):
+            dtypes = next(iter(source.chunks())).dtypes
+            numeric = [c for c, d in dtypes.items() if pd.api.types.is_numeric_dtype(d)]
+            outlier_ops = [dict(op, columns=op['columns'] or numeric) for op in outlier_ops]
+
+        # One set of histograms serves median fills and quantile-based bounds
+        hist_columns = [c for c, s in fills.items() if s == 'median']
+        moment_columns = []
+        for op in outlier_ops:
+            target = moment_columns if op['method'] == 'zscore' else hist_columns
+            target += [c for c in op['columns'] if c not in target]
+
+        histograms = _StreamingHistograms(source, hist_columns, bins) if hist_columns else None
+        moments = _streaming_moments(source, moment_columns) if moment_columns else None
+        values = _streaming_fill_values(source, fills, histograms)
+
+        resolved = []
+        outlier_ops = iter(outlier_ops)
+        for op in stage:
+            op = dict(op)
+            if op['kind'] == 'fillna':
+                op['values'] = {c: values[c] for c in op['strategies']}
+            else:
+                op = next(outlier_ops)
+                op['bounds'] = _streaming_bounds(op, histograms, moments)
+            resolved.append(op)
+        return resolved
+
+
+def _depends(op, stage):
+    """Whether ``op`` reads a column an op of ``stage`` changes"""
+    if not stage:
+        return False
+    columns = _op_columns(op)
+    if columns is None:
+        return True
+    return any(
+        other is None or set(columns) & set(other)
+        for other in map(_op_columns, stage)
+    )
+
+
+def _op_columns(op):
+    if op['kind'] == 'fillna':
+        return list(op['strategies'])
+    return op['columns']
+
+
+def _apply(chunk, ops, seen):
+    """
+    Run resolved plan ops on one chunk; ``seen`` holds one ``HashIndex``
+    per dedup op (each may use different key columns) across chunks
+    """
+    for i, op in enumerate(ops):
+        if op['kind'] == 'dedup':
+            index = seen.setdefault(i, HashIndex())
+            chunk = chunk[~index.add(row_hashes(chunk, op['subset']))]
+        else:
+            chunk = _EXECUTORS[op['kind']](chunk, op)
+    return chunk
+
+
+class _PlannedSource:
+    """Chunk source that applies resolved plan ops before yielding."""
+
+    def __init__(self, processor, ops):
+        self.processor = processor
+        self.ops = ops
+
+    def chunks(self):
+        # Fresh duplicate indexes on every pass over the file
+        seen = {}
+        for chunk in self.processor.chunks():
+            yield _apply(chunk, self.ops, seen)
+
+
+class _StreamingHistograms:
+    """Two-pass fixed-width histograms for approximate quantiles."""
+
+    def __init__(self, source, columns, bins):
+        lo = pd.Series(np.inf, index=columns)
+        hi = pd.Series(-np.inf, index=columns)
+        for chunk in source.chunks():
+            values = chunk[columns]
+            lo = np.fmin(lo, values.min())
+            hi = np.fmax(hi, values.max())
+
+        self.edges = {c: np.linspace(lo[c], hi[c], bins + 1) if np.isfinite(lo[c]) else None
+                      for c in columns}
+        self.counts = {c: np.zeros(bins, dtype=np.int64) for c in columns}
+
+        for chunk in source.chunks():
+            for c in columns:
+                if self.edges[c] is None:
+                    continue
+                values = chunk[c].dropna().to_numpy(dtype=float)
+                self.counts[c] += np.histogram(values, bins=self.edges[c])[0]
+
+    def quantile(self, column, q):
+        edges = self.edges[column]
+        if edges is None:
+            return np.nan
+        return _histogram_quantile(self.counts[column], edges, q)
+
+
+def _histogram_quantile(counts, edges, q):
+    cumulative = np.cumsum(counts)
+    if cumulative[-1] == 0:
+        return np.nan
+    target = q * cumulative[-1]
+    i = int(np.searchsorted(cumulative, target))
+    before = cumulative[i - 1] if i else 0
+    fraction = (target - before) / counts[i] if counts[i] else 0.0
+    return float(edges[i] + fraction * (edges[i + 1] - edges[i]))
+
+
+def _streaming_moments(source, columns):
+    """
+    Mean and standard deviation (ddof=1) of ``columns`` across chunks
+    """
+    count = pd.Series(0, index=columns)
+    total = pd.Series(0.0, index=columns)
+    squares = pd.Series(0.0, index=columns)
+    for chunk in source.chunks():
+        values = chunk[columns].astype(float)
+        count += values.count()
+        total += values.sum()
+        squares += (values ** 2).sum()
+
+    mean = total / count
+    std = np.sqrt((squares - count * mean ** 2) / (count - 1))
+    return pd.DataFrame({'mean': mean, 'std': std})
+
+
+def _streaming_bounds(op, histograms, moments):
+    """
+    Outlier bounds for a plan op from streamed statistics
+    (same formulas as ``OutlierHandler.bounds``)
+    """
+    threshold = METHODS[op['method']] if op['threshold'] is None else op['threshold']
+    rows = {}
+    for column in op['columns']:
+        if op['method'] == 'zscore':
+            mean, std = moments.loc[column, 'mean'], moments.loc[column, 'std']
+            rows[column] = (mean - threshold * std, mean + threshold * std)
+        elif op['method'] == 'iqr':
+            q1 = histograms.quantile(column, 0.25)
+            q3 = histograms.quantile(column, 0.75)
+            rows[column] = (q1 - threshold * (q3 - q1), q3 + threshold * (q3 - q1))
+        else:
+            low_q, high_q = threshold
+            rows[column] = (histograms.quantile(column, low_q), histograms.quantile(column, high_q))
+    return pd.DataFrame.from_dict(rows, orient='index', columns=['lower', 'upper'])
+
+
+def _streaming_fill_values(source, strategies, histograms):
+    """
+    Compute mean / median / mode fill values across chunks. Medians are
+    read from ``histograms``, which must cover every 'median' column.
+    """
+    if not strategies:
+        return {}
+
+    means = [c for c, s in strategies.items() if s == 'mean']
+    medians = [c for c, s in strategies.items() if s == 'median']
+    modes = [c for c, s in strategies.items() if s == 'mode']
+
+    sums = pd.Series(0.0, index=means)
+    counts = pd.Series(0, index=means)
+    mode_counts = {c: None for c in modes}
+
+    if means or modes:
+        for chunk in source.chunks():
+            if means:
+                sums += chunk[means].sum()
+                counts += chunk[means].count()
+            for c in modes:
+                vc = chunk[c].value_counts()
+                mode_counts[c] = vc if mode_counts[c] is None else mode_counts[c].add(vc, fill_value=0)
+
+    values = {c: sums[c] / counts[c] for c in means}
+    for c in modes:
+        vc = mode_counts[c]
+        values[c] = vc.idxmax() if vc is not None and len(vc) else np.nan
+    if medians:
+        values.update({c: histograms.quantile(c, 0.5) for c in medians})
+    return values
+
+
+def _merge_dtype(a, b):
+    if a == b:
+        return a
+    if pd.api.types.is_numeric_dtype(a) and pd.api.types.is_numeric_dtype(b):
+        try:
+            return np.promote_types(a, b)
+        except TypeError:
+            pass
+    return np.dtype(object)
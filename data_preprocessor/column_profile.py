@@ -0,0 +1,228 @@
+import numpy as np
+import pandas as pd
+
+from .hashing import FrameToken
+
+TOP_K = 10
+QUARTILES = (0.25, 0.5, 0.75)
+STATS = ['dtype', 'count', 'nulls', 'null_%', 'distinct', 'min', 'max', 'mean', 'std',
+         '25%', '50%', '75%', 'top', 'top_count']
+
+
+class ColumnProfile:
+    """
+    Per-column statistics of a dataframe, computed in one pass per column
+    and kept until that column changes
+
+    For every column: dtype, non-null count, null count, distinct count
+    and the ``top_k`` most frequent values; for numeric and datetime
+    columns also min, max, mean, std and the quartiles. Numeric columns
+    are sorted once, which gives exact quartiles (pandas' linear
+    interpolation), the distinct count and the value counts together;
+    other columns use one ``value_counts`` call.
+
+    Columns are profiled on first use. ``bind`` points the profile at a
+    new version of the data and drops only the columns whose data
+    changed, so after a step that rewrote one column only that column is
+    profiled again. Handlers that modify columns in place call
+    ``invalidate``.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+    top_k : int
+        Number of most frequent values kept per column
+
+    Example
+    -------
+    profile = ColumnProfile(df)
+    profile.nulls()
+    profile.quartiles(['duration_sec'])
+    profile.top_values('user_type')
+    profile.bind(new_df)     # keeps the statistics of unchanged columns
+    """
+
+    def __init__(self, df, top_k=TOP_K):
+        self.top_k = top_k
+        self._stats = {}
+        self._tokens = {}
+        self.bind(df)
+
+    def __len__(self):
+        return len(self._stats)
+
+    def bind(self, df):
+        """
+        Track ``df``, forgetting the statistics of columns that changed
+        """
+        self.df = df
+        for column in list(self._stats):
+            if column not in df.columns or not self._tokens[column].matches(df):
+                self.invalidate(column)
+        return self
+
+    def invalidate(self, columns=None):
+        """
+        Forget the statistics of ``columns`` (a name or a list; all when None)
+        """
+        if columns is None:
+            columns = list(self._stats)
+        elif isinstance(columns, str):
+            columns = [columns]
+        for column in columns:
+            self._stats.pop(column, None)
+            self._tokens.pop(column, None)
+
+    def profiled(self):
+        """Columns whose statistics are currently cached"""
+        return list(self._stats)
+
+    def column(self, name):
+        """
+        Statistics of one column as a dict (see ``STATS``)
+        """
+        if name not in self.df.columns:
+            raise ValueError(f"Column '{name}' not found in dataframe")
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = self._stats[name] = _profile_column(self.df[name], self.top_k)
+            self._tokens[name] = FrameToken(self.df, [name])
+        return stats
+
+    def stats(self, columns=None):
+        """
+        One row per column with every statistic except the value counts
+        """
+        columns = self.df.columns if columns is None else _as_list(columns)
+        rows = {c: {k: v for k, v in self.column(c).items() if k != 'values'} for c in columns}
+        return pd.DataFrame.from_dict(rows, orient='index', columns=STATS)
+
+    def dtypes(self):
+        return self.df.dtypes
+
+    def numeric_columns(self):
+        """Numeric (non-boolean) columns, from the dtypes only"""
+        return [
+            c for c, dtype in self.df.dtypes.items()
+            if pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+        ]
+
+    def nulls(self, columns=None):
+        """Null count per column"""
+        columns = self.df.columns if columns is None else _as_list(columns)
+        return pd.Series({c: self.column(c)['nulls'] for c in columns}, dtype='int64')
+
+    def distinct(self, column):
+        return self.column(column)['distinct']
+
+    def statistic(self, columns, name):
+        """
+        One statistic ('mean', 'std', '25%', 'min', ...) for several
+        columns, as a Series
+        """
+        return pd.Series({c: self.column(c)[name] for c in _as_list(columns)})
+
+    def quartiles(self, columns, levels=(0.25, 0.75)):
+        """
+        Quartiles of numeric columns in the layout of
+        ``DataFrame.quantile(levels)`` (index: level, columns: column)
+        """
+        columns = _as_list(columns)
+        labels = {q: f'{q:.0%}' for q in QUARTILES}
+        unknown = [q for q in levels if q not in labels]
+        if unknown:
+            raise ValueError(f"Only the quartiles {QUARTILES} are profiled, not {unknown}")
+        return pd.DataFrame(
+            {c: [self.column(c)[labels[q]] for q in levels] for c in columns},
+            index=list(levels),
+        )
+
+    def top_values(self, column):
+        """
+        The ``top_k`` most frequent values of ``column`` with their
+        counts, most frequent first (like ``value_counts().head(top_k)``)
+        """
+        return self.column(column)['values']
+
+
+def _as_list(columns):
+    return [columns] if isinstance(columns, str) else list(columns)
+
+
+def _profile_column(series, top_k):
+    """
+    Statistics of one column, in one pass over its values
+    """
+    n = len(series)
+    dtype = series.dtype
+    stats = dict.fromkeys(STATS)
+    stats['dtype'] = str(dtype)
+
+    is_number = pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+    is_datetime = pd.api.types.is_datetime64_dtype(dtype) or (
+        isinstance(dtype, pd.ArrowDtype) and dtype.kind == 'M' and dtype.pyarrow_dtype.tz is None
+    )
+
+    if is_number or is_datetime:
+        if is_number:
+            values = series.to_numpy(dtype=float, na_value=np.nan)
+            values = values[~np.isnan(values)]
+        else:
+            values = series.to_numpy()
+            unit = np.datetime_data(values.dtype)[0]
+            values = values[~np.isnat(values)].view('int64')
+        values.sort()
+
+        # Runs of equal values in the sorted array give the value counts
+        starts = np.flatnonzero(np.r_[True, values[1:] != values[:-1]]) if len(values) else np.empty(0, int)
+        counts = np.diff(np.r_[starts, len(values)])
+        top = np.argsort(-counts, kind='stable')[:top_k]
+        top_values = values[starts[top]]
+
+        stats.update(count=len(values), distinct=len(starts))
+        if len(values):
+            quartiles = [_sorted_quantile(values, q) for q in QUARTILES]
+            summary = {
+                'min': values[0], 'max': values[-1],
+                'mean': values.mean(), 'std': values.std(ddof=1) if len(values) > 1 else np.nan,
+                '25%': quartiles[0], '50%': quartiles[1], '75%': quartiles[2],
+            }
+            if is_datetime:
+                summary = _as_times(summary, unit)
+                top_values = top_values.view(f'datetime64[{unit}]')
+            elif pd.api.types.is_integer_dtype(dtype) and isinstance(dtype, np.dtype):
+                top_values = top_values.astype(dtype)
+            stats.update(summary)
+        value_counts = pd.Series(counts[top], index=pd.Index(top_values, name=series.name), name='count')
+    else:
+        value_counts = series.value_counts(dropna=True)
+        value_counts = value_counts[value_counts > 0]  # unobserved categories
+        stats.update(count=int(value_counts.sum()), distinct=len(value_counts))
+        value_counts = value_counts.head(top_k)
+
+    stats['nulls'] = n - stats['count']
+    stats['null_%'] = stats['nulls'] / n * 100 if n else 0.0
+    if len(value_counts):
+        stats['top'], stats['top_count'] = value_counts.index[0], int(value_counts.iloc[0])
+    stats['values'] = value_counts
+    return stats
+
+
+def _as_times(summary, unit):
+    """Datetime statistics computed on int64 ticks, back as Timestamps"""
+    times = {}
+    for name, value in summary.items():
+        if name == 'std':
+            if not np.isnan(value):
+                times[name] = pd.Timedelta(int(round(value)), unit=unit)
+        else:
+            times[name] = pd.Timestamp(np.datetime64(int(round(value)), unit))
+    return times
+
+
+def _sorted_quantile(values, q):
+    """Linear-interpolation quantile of an already sorted array"""
+    position = q * (len(values) - 1)
+    low = int(np.floor(position))
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (position - low)
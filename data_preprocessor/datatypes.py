@@ -1,8 +1,30 @@
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+from .arrow import arrow_dtype, is_arrow, timestamps_like
+
+# Leading date part of ISO / US style timestamps, e.g. '2019-02-28 17:32:10.1450'
+TIMESTAMP_PATTERN = re.compile(r'^\s*\d{1,4}[-/]\d{1,2}[-/]\d{1,4}')
+
+# Timestamp strings are parsed per distinct value when at most this share
+# of a DEDUPE_SAMPLE-row sample is distinct
+DEDUPE_RATIO = 0.5
+DEDUPE_SAMPLE = 20_000
 
 class DataTypeHandler:
-    def __init__(self, df):
+    def __init__(self, df, profile=None):
         self.df = df
+        # Optional ColumnProfile of df: distinct counts come from it
+        self.profile = profile
+
+    def _changed(self, columns):
+        if self.profile is not None:
+            self.profile.invalidate(columns)
 
     def check_dtypes(self, dtypes=None):
         """
@@ -24,15 +46,76 @@ class DataTypeHandler:
         # Case 2: dtype(s) passed → return column names
         return self.df.select_dtypes(include=dtypes).columns
 
-    def convert_dtype(self, column, dtype):
+    def convert_dtype(self, column, dtype, format=None):
         """
         Convert a column to a specified dtype
         Example dtype: 'category', 'int', 'float', 'datetime'
+
+        ``format`` is the strftime format of a 'datetime' conversion
+        (inferred from a sample when not given).
+
+        Arrow-backed columns (see ``data_preprocessor.arrow``) get the
+        Arrow equivalent: 'int' -> int64[pyarrow], 'category' -> a
+        dictionary type, 'datetime' -> timestamp[pyarrow], ...
+        """
+        self.df[column] = cast_column(self.df[column], dtype, format)
+        self._changed(column)
+
+    def convert_datetimes(self, columns, format=None, workers=None, sample_size=1000):
         """
-        if dtype == 'datetime':
-            self.df[column] = pd.to_datetime(self.df[column], errors='coerce')
-        else:
-            self.df[column] = self.df[column].astype(dtype)
+        Convert several columns to datetime at once, one thread per column
+
+        The format of each column is inferred once from a sample (unless
+        ``format`` is given) so pandas can use its fixed-format parser,
+        and repeated timestamp strings are parsed only once. Values that
+        cannot be parsed become NaT.
+
+        Parameters
+        ----------
+        columns : str or list of str
+        format : str, optional
+            strftime format used for every column, e.g. '%Y-%m-%d %H:%M:%S.%f'
+        workers : int, optional
+            Thread pool size (default: one per column)
+        sample_size : int
+            Number of non-null values used to infer the format
+
+        Returns
+        -------
+        pandas.DataFrame
+            Indexed by column: format used, values coerced to NaT, seconds
+
+        Example
+        -------
+        handler.convert_datetimes(['start_time', 'end_time'])
+        """
+        if isinstance(columns, str):
+            columns = [columns]
+
+        missing = [col for col in columns if col not in self.df.columns]
+        if missing:
+            raise ValueError(f"Column(s) not found: {missing}")
+
+        def convert(column):
+            start = time.perf_counter()
+            series = self.df[column]
+            fmt = format or infer_datetime_format(series, sample_size)
+            parsed, coerced = to_datetime_fast(series, fmt, sample_size)
+            return parsed, {
+                'format': fmt,
+                'coerced_to_NaT': coerced,
+                'seconds': round(time.perf_counter() - start, 3),
+            }
+
+        with ThreadPoolExecutor(max_workers=workers or len(columns) or 1) as pool:
+            results = list(pool.map(convert, columns))
+
+        rows = {}
+        for column, (parsed, row) in zip(columns, results):
+            self.df[column] = parsed
+            rows[column] = row
+        self._changed(list(columns))
+        return pd.DataFrame.from_dict(rows, orient='index')
 
 
     def get_columns_dtypes(self, columns):
@@ -56,4 +139,175 @@ class DataTypeHandler:
         if missing:
             raise ValueError(f"Column(s) not found: {missing}")
 
-        return self.df[columns].dtypes
\ No newline at end of file
+        return self.df[columns].dtypes
+
+    def optimize_memory(self, category_ratio=0.5, parse_dates=True, sample_size=1000):
+        """
+        Convert every column to the cheapest representation that keeps its
+        values, and return a per-column memory report
+
+        - integers are downcast to the smallest signed int type
+        - floats are downcast to float32 when no value changes
+        - timestamp-looking text columns become datetime64 (only when no
+          value would be coerced to NaT)
+        - text columns with few distinct values become 'category'
+
+        Parameters
+        ----------
+        category_ratio : float
+            Convert text columns whose distinct/non-null ratio is at most this
+        parse_dates : bool
+            Try to parse timestamp-looking text columns
+        sample_size : int
+            Number of non-null values checked before trying a date parse
+
+        Returns
+        -------
+        pandas.DataFrame
+            Indexed by column, with dtypes and memory (bytes) before/after
+        """
+        rows = {}
+        for column in self.df.columns:
+            series = self.df[column]
+            before = series.memory_usage(index=False, deep=True)
+
+            distinct = None
+            if self.profile is not None and _is_text(series):
+                distinct = (self.profile.distinct(column), self.profile.column(column)['count'])
+            optimized = _cheapest(series, category_ratio, parse_dates, sample_size, distinct)
+            after = optimized.memory_usage(index=False, deep=True)
+            if after < before:
+                self.df[column] = optimized
+                self._changed(column)
+            else:
+                optimized, after = series, before
+
+            rows[column] = {
+                'dtype_before': str(series.dtype),
+                'dtype_after': str(optimized.dtype),
+                'memory_before': before,
+                'memory_after': after,
+            }
+
+        report = pd.DataFrame.from_dict(rows, orient='index')
+        report['saved_%'] = (
+            (1 - report['memory_after'] / report['memory_before'].where(report['memory_before'] > 0))
+            * 100
+        ).fillna(0).round(2)
+        return report
+
+
+def _is_text(series):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return False
+    return pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)
+
+
+def _cheapest(series, category_ratio, parse_dates, sample_size, distinct=None):
+    """
+    Return the cheapest lossless version of a column (may be the column itself)
+
+    ``distinct`` is an optional precomputed (distinct, non-null) count pair
+    """
+    if pd.api.types.is_bool_dtype(series):
+        return series
+
+    if pd.api.types.is_integer_dtype(series):
+        return pd.to_numeric(series, downcast='integer')
+
+    if pd.api.types.is_float_dtype(series):
+        downcast = cast_column(series, 'float32')
+        if downcast.astype(series.dtype).equals(series):
+            return downcast
+        return series
+
+    if not _is_text(series):
+        return series
+
+    non_null = series.dropna()
+    if non_null.empty:
+        return series
+
+    if parse_dates:
+        sample = non_null.iloc[:sample_size].astype(str)
+        if sample.str.match(TIMESTAMP_PATTERN).all():
+            parsed, coerced = to_datetime_fast(series, sample_size=sample_size)
+            if coerced == 0:
+                return parsed
+
+    n_distinct, n_values = distinct if distinct is not None else (non_null.nunique(), len(non_null))
+    if n_distinct <= category_ratio * n_values:
+        return cast_column(series, 'category')
+
+    return series
+
+
+def cast_column(series, dtype, format=None):
+    """
+    ``series.astype(dtype)``, with ``to_datetime_fast`` (and ``format``)
+    for 'datetime'; Arrow-backed columns stay Arrow-backed (``arrow_dtype``)
+    """
+    if dtype == 'datetime':
+        return to_datetime_fast(series, format)[0]
+    if is_arrow(series):
+        dtype = arrow_dtype(dtype, series)
+    return series.astype(dtype)
+
+
+def infer_datetime_format(series, sample_size=1000, min_share=0.9):
+    """
+    strftime format that parses the most values of a sample of
+    ``series`` (at least ``min_share`` of them), or None when no single
+    format fits
+    """
+    sample = series.dropna().iloc[:sample_size].astype(str)
+    if sample.empty:
+        return None
+
+    candidates = []
+    for value in sample.iloc[:10]:
+        fmt = guess_datetime_format(value)
+        if fmt is not None and fmt not in candidates:
+            candidates.append(fmt)
+
+    best, best_share = None, min_share
+    for fmt in candidates:
+        share = pd.to_datetime(sample, format=fmt, errors='coerce').notna().mean()
+        if share >= best_share:
+            best, best_share = fmt, share
+    return best
+
+
+def to_datetime_fast(series, format=None, sample_size=1000):
+    """
+    ``pd.to_datetime(series, errors='coerce')`` with an inferred fixed
+    format and, when values repeat, parsing each distinct string once
+
+    Returns
+    -------
+    (parsed, coerced) : the datetime Series and the number of non-null
+    values that could not be parsed (now NaT)
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series, 0
+
+    if format is None:
+        format = infer_datetime_format(series, sample_size)
+    # Without a single format pandas guesses one from the first value
+    options = {'format': format} if format is not None else {}
+
+    # Parse each distinct string once when values repeat. Whether they do
+    # is judged on an evenly spaced sample, since factorizing a column of
+    # distinct strings costs about as much as parsing it.
+    step = max(len(series) // DEDUPE_SAMPLE, 1)
+    sample = series.iloc[::step].dropna()
+    if len(sample) and sample.nunique() <= DEDUPE_RATIO * len(sample):
+        codes, uniques = pd.factorize(series)
+        parsed_uniques = pd.DatetimeIndex(pd.to_datetime(uniques, errors='coerce', **options))
+        values = parsed_uniques.take(np.where(codes < 0, 0, codes))
+        parsed = pd.Series(values, index=series.index, name=series.name).where(codes >= 0)
+    else:
+        parsed = pd.to_datetime(series, errors='coerce', **options)
+
+    coerced = int(parsed.isna().sum() - series.isna().sum())
+    return timestamps_like(parsed, series), coerced
@@ -1,13 +1,177 @@
+import numpy as np
+import pandas as pd
+
+from .hashing import FrameToken, HashIndex, row_hashes
+
+# Rows hashed per block when progress is reported
+PROGRESS_BLOCK_ROWS = 500_000
+
+
 class DuplicateHandler:
-    def __init__(self, df):
+    """
+    Duplicate detection based on one 64-bit hash per row
+
+    The hashes and duplicate masks are computed once and reused by
+    ``check_duplicates``, ``show_duplicates`` and ``remove_duplicates``
+    until the underlying columns change.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+    subset : list of str, optional
+        Key columns that define a duplicate (default: all columns)
+    keep : {'first', 'last', False}
+        Which occurrence is *not* marked as a duplicate
+    """
+
+    def __init__(self, df, subset=None, keep='first'):
         self.df = df
+        self.subset = subset
+        self.keep = keep
+        self._hashes = {}
+        self._masks = {}
+
+    def bind(self, df, subset=None, keep='first'):
+        """
+        Track ``df`` (e.g. a new version of the data on a Streamlit rerun),
+        forgetting the hashes and masks of key columns that changed
+        """
+        self.df = df
+        self.subset = subset
+        self.keep = keep
+        for cache in (self._hashes, self._masks):
+            for key, (token, _) in list(cache.items()):
+                if not token.matches(df):
+                    del cache[key]
+        return self
+
+    def invalidate(self):
+        """
+        Forget cached hashes, e.g. after editing values in place
+        """
+        self._hashes.clear()
+        self._masks.clear()
+
+    def _key_columns(self, subset):
+        subset = self.subset if subset is None else subset
+        if isinstance(subset, str):
+            subset = [subset]
+        return tuple(self.df.columns if subset is None else subset)
+
+    def row_hashes(self, subset=None, progress=None):
+        """
+        Return (and cache) the per-row hashes over the key columns
+
+        ``progress`` is an optional callback ``progress(fraction, message)``
+        (e.g. from ``JobScheduler``); the rows are then hashed in blocks
+        with a report after each one.
+        """
+        columns = self._key_columns(subset)
+        cached = self._hashes.get(columns)
+        if cached is not None and cached[0].matches(self.df):
+            return cached[1]
+
+        if progress is None:
+            hashes = row_hashes(self.df, list(columns))
+        else:
+            blocks = []
+            for start in range(0, len(self.df), PROGRESS_BLOCK_ROWS):
+                progress(start / max(len(self.df), 1), f"Hashing rows {start:,}+")
+                blocks.append(row_hashes(self.df.iloc[start:start + PROGRESS_BLOCK_ROWS], list(columns)))
+            hashes = np.concatenate(blocks) if blocks else np.empty(0, dtype=np.uint64)
+        self._hashes[columns] = (FrameToken(self.df, columns), hashes)
+        return hashes
+
+    def duplicated(self, subset=None, keep=None, progress=None):
+        """
+        Return (and cache) a boolean mask of duplicated rows
+
+        Same semantics as ``DataFrame.duplicated``.
+        """
+        keep = self.keep if keep is None else keep
+        columns = self._key_columns(subset)
+        cached = self._masks.get((columns, keep))
+        if cached is not None and cached[0].matches(self.df):
+            return cached[1]
+
+        hashes = self.row_hashes(columns, progress)
+        if progress is not None:
+            progress(0.9, "Finding duplicates")
+        mask = pd.Series(hashes, index=self.df.index).duplicated(keep=keep)
+        self._masks[(columns, keep)] = (FrameToken(self.df, columns), mask)
+        return mask
+
+    def check_duplicates(self, subset=None, keep=None, progress=None):
+        return int(self.duplicated(subset, keep, progress).sum())
+
+    def remove_duplicates(self, subset=None, keep=None, progress=None):
+        mask = self.duplicated(subset, keep, progress)
+        self._drop_rows(mask)
+
+    def show_duplicates(self, subset=None, keep=None):
+
+        return self.df[self.duplicated(subset, keep)]
+
+    def replace_in_duplicates(self, column, old_value, new_value):
+        """
+        Replace ``old_value`` with ``new_value`` in ``column``, only on the
+        rows currently marked as duplicates
+        """
+        if column not in self.df.columns:
+            raise ValueError(f"Column '{column}' not found in dataframe")
+
+        mask = self.duplicated()
+        # Text inputs arrive as strings; match them against the column text
+        matches = mask & (self.df[column].astype(str) == str(old_value))
+        self.df[column] = self.df[column].mask(matches, new_value)
+
+    # ---------------------------------------------------------------
+    # Cross-batch deduplication
+    # ---------------------------------------------------------------
+
+    def check_against_index(self, index, subset=None):
+        """
+        Return a mask of rows that already appear in ``index`` (a
+        ``HashIndex`` or the path of a saved one), e.g. rows of this month
+        that were already ingested in an earlier month
+        """
+        if not isinstance(index, HashIndex):
+            index = HashIndex(index)
+        return pd.Series(index.contains(self.row_hashes(subset)), index=self.df.index)
+
+    def remove_seen(self, index, subset=None, save=True):
+        """
+        Drop rows already in ``index`` and duplicates within this batch,
+        then add the remaining rows to the index
 
-    def check_duplicates(self):
-        return self.df.duplicated().sum()
+        Returns
+        -------
+        int
+            Number of rows removed
+        """
+        if not isinstance(index, HashIndex):
+            index = HashIndex(index)
 
-    def remove_duplicates(self):
-        self.df.drop_duplicates(inplace=True)
+        mask = pd.Series(index.add(self.row_hashes(subset)), index=self.df.index)
+        if save and index.path is not None:
+            index.save()
 
-    def show_duplicates(self):
+        self._drop_rows(mask)
+        return int(mask.sum())
 
-        return self.df[self.df.duplicated()]
\ No newline at end of file
+    def _drop_rows(self, mask):
+        """
+        Drop masked rows in place, so handlers sharing ``self.df`` see it
+        """
+        mask = mask.to_numpy()
+        if not mask.any():
+            return
+        if self.df.index.is_unique:
+            self.df.drop(index=self.df.index[mask], inplace=True)
+        else:
+            # Labels are ambiguous: drop by position, then restore labels
+            labels = self.df.index
+            self.df.index = pd.RangeIndex(len(labels))
+            self.df.drop(index=self.df.index[mask], inplace=True)
+            self.df.index = labels[~mask]
+        self.invalidate()
@@ -0,0 +1,184 @@
+import gzip
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+
+from .hashing import FrameToken
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+try:
+    import zstandard
+    HAS_ZSTD = True
+except ImportError:
+    HAS_ZSTD = False
+
+
+# format -> (file extension, MIME type)
+FORMATS = {
+    'csv': ('csv', 'text/csv'),
+    'csv.gz': ('csv.gz', 'application/gzip'),
+    'csv.zst': ('csv.zst', 'application/zstd'),
+    'parquet': ('parquet', 'application/vnd.apache.parquet'),
+}
+CHUNK_ROWS = 100_000
+
+
+def available_formats():
+    """
+    Export formats usable with the installed libraries ('csv.zst' needs
+    zstandard, 'parquet' needs pyarrow)
+    """
+    missing = set()
+    if not HAS_ZSTD:
+        missing.add('csv.zst')
+    if not HAS_PYARROW:
+        missing.add('parquet')
+    return [f for f in FORMATS if f not in missing]
+
+
+def write_export(df, target, fmt='csv', chunksize=CHUNK_ROWS):
+    """
+    Write ``df`` to ``target`` (a path or a binary file object) in blocks
+    of ``chunksize`` rows, so no serialized copy of the whole dataset is
+    held in memory
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+    target : str or binary file object
+    fmt : {'csv', 'csv.gz', 'csv.zst', 'parquet'}
+        Parquet files are zstd-compressed, one row group per block
+    chunksize : int
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}'. Use one of {list(FORMATS)}")
+    if fmt not in available_formats():
+        raise ValueError(f"Export format '{fmt}' needs {'pyarrow' if fmt == 'parquet' else 'zstandard'}")
+
+    if isinstance(target, (str, os.PathLike)):
+        with open(target, 'wb') as f:
+            _write(df, f, fmt, chunksize)
+    else:
+        _write(df, target, fmt, chunksize)
+
+
+def _write(df, f, fmt, chunksize):
+    if fmt == 'parquet':
+        _write_parquet(df, f, chunksize)
+    elif fmt == 'csv.gz':
+        # mtime=0 keeps the output identical for identical data
+        with gzip.GzipFile(fileobj=f, mode='wb', compresslevel=6, mtime=0) as stream:
+            _write_csv(df, stream, chunksize)
+    elif fmt == 'csv.zst':
+        with zstandard.ZstdCompressor(level=3).stream_writer(f, closefd=False) as stream:
+            _write_csv(df, stream, chunksize)
+    else:
+        _write_csv(df, f, chunksize)
+
+
+def _write_csv(df, stream, chunksize):
+    for start in range(0, max(len(df), 1), chunksize):
+        block = df.iloc[start:start + chunksize]
+        stream.write(block.to_csv(index=False, header=start == 0).encode('utf-8'))
+
+
+def _write_parquet(df, f, chunksize):
+    # The schema comes from the whole frame so that a block whose object
+    # column happens to be all-null still gets the column's real type
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    with pq.ParquetWriter(f, schema, compression='zstd') as writer:
+        for start in range(0, max(len(df), 1), chunksize):
+            block = df.iloc[start:start + chunksize]
+            writer.write_table(pa.Table.from_pandas(block, schema=schema, preserve_index=False))
+
+
+class ExportCache:
+    """
+    Exported files of dataset versions, written on demand
+
+    ``get(df, fmt)`` writes the export to a temporary file the first time
+    it is asked for and returns the stored file for as long as ``df``
+    holds the same column data, so repeated downloads of one version (or
+    returning to it with undo) do not serialize it again. The oldest
+    exports are deleted beyond ``max_entries``; the directory is removed
+    when the cache is garbage collected.
+
+    Parameters
+    ----------
+    max_entries : int
+    chunksize : int
+        Rows written per block
+
+    Example
+    -------
+    exports = ExportCache()
+    path = exports.get(df, 'csv.gz')
+    data = exports.read(df, 'parquet')
+    """
+
+    def __init__(self, max_entries=4, chunksize=CHUNK_ROWS):
+        self.max_entries = max_entries
+        self.chunksize = chunksize
+        self.directory = tempfile.mkdtemp(prefix='amit-export-')
+        self._entries = OrderedDict()
+        self._counter = 0
+        self._lock = threading.Lock()
+        self._finalizer = weakref.finalize(self, shutil.rmtree, self.directory, True)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _find(self, df, fmt):
+        for key, (token, path) in self._entries.items():
+            if key[0] == fmt and key[1] == tuple(df.columns) and token.matches(df):
+                return key, path
+        return None, None
+
+    def get(self, df, fmt='csv'):
+        """
+        Path of the export of ``df`` in format ``fmt``, written if needed
+        """
+        with self._lock:
+            key, path = self._find(df, fmt)
+            if path is not None:
+                self._entries.move_to_end(key)
+                return path
+
+            self._counter += 1
+            path = os.path.join(self.directory, f'export-{self._counter}.{FORMATS[fmt][0]}')
+            try:
+                write_export(df, path, fmt, self.chunksize)
+            except Exception:
+                if os.path.exists(path):
+                    os.remove(path)
+                raise
+
+            self._entries[(fmt, tuple(df.columns), self._counter)] = (FrameToken(df), path)
+            while len(self._entries) > self.max_entries:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                if os.path.exists(evicted):
+                    os.remove(evicted)
+            return path
+
+    def read(self, df, fmt='csv'):
+        """
+        Bytes of the export of ``df`` (e.g. for a download button)
+        """
+        with open(self.get(df, fmt), 'rb') as f:
+            return f.read()
+
+    def clear(self):
+        with self._lock:
+            for _, path in self._entries.values():
+                if os.path.exists(path):
+                    os.remove(path)
+            self._entries.clear()
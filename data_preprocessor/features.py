@@ -0,0 +1,140 @@
+import pandas as pd
+
+from .hashing import FrameToken
+
+# Reference year of the Ford GoBike trips, used for member ages
+CURRENT_YEAR = 2019
+
+
+def _duration_min(df):
+    return (df['duration_sec'] / 60).round(2)
+
+
+def _duration_hr(df):
+    return (df['duration_sec'] / 3600).round(2)
+
+
+def _member_age(df):
+    return CURRENT_YEAR - df['member_birth_year']
+
+
+# name -> (source columns, function of the dataframe)
+FEATURES = {
+    'duration_min': (('duration_sec',), _duration_min),
+    'duration_hr': (('duration_sec',), _duration_hr),
+    'member_age': (('member_birth_year',), _member_age),
+}
+
+
+class DerivedFeatures:
+    """
+    Derived columns computed on first use and cached, without being
+    written into the dataframe
+
+    Each feature is declared once with the columns it is computed from.
+    The cached values stay valid until one of those source columns is
+    reassigned or rows are added/removed (see ``FrameToken``); only then
+    is the feature computed again. A real column with the same name in
+    the dataframe always takes precedence.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+    features : dict, optional
+        {name: (source columns, function)}; defaults to ``FEATURES``
+
+    Example
+    -------
+    features = DerivedFeatures(df)
+    ages = features.get('member_age')
+    view = features.frame(['user_type', 'member_age'])
+    """
+
+    def __init__(self, df, features=None):
+        self.df = df
+        self.features = dict(FEATURES if features is None else features)
+        self._cache = {}
+
+    def bind(self, df):
+        """
+        Point the store at another version of the dataset; cached
+        features whose sources are unchanged are kept
+        """
+        self.df = df
+
+    def declare(self, name, sources, func):
+        """
+        Add (or replace) a derived feature computed as ``func(df)`` from
+        the ``sources`` columns
+        """
+        if isinstance(sources, str):
+            sources = (sources,)
+        self.features[name] = (tuple(sources), func)
+        self.invalidate(name)
+
+    def available(self):
+        """
+        Names of the declared features whose source columns exist
+        """
+        return [
+            name for name, (sources, _) in self.features.items()
+            if set(sources) <= set(self.df.columns)
+        ]
+
+    def __contains__(self, name):
+        return name in self.df.columns or name in self.features
+
+    def get(self, name):
+        """
+        Return the column ``name``: the dataframe's own column if it has
+        one, otherwise the (cached) derived feature
+        """
+        if name in self.df.columns:
+            return self.df[name]
+        if name not in self.features:
+            raise ValueError(f"Column '{name}' not found in dataframe")
+
+        sources, func = self.features[name]
+        missing = [c for c in sources if c not in self.df.columns]
+        if missing:
+            raise ValueError(
+                f"Cannot compute '{name}': missing source column(s) {missing}"
+            )
+
+        cached = self._cache.get(name)
+        if cached is not None and cached[0].matches(self.df):
+            return cached[1]
+
+        values = func(self.df).rename(name)
+        self._cache[name] = (FrameToken(self.df, sources), values)
+        return values
+
+    def frame(self, columns):
+        """
+        Dataframe of the given columns, derived ones included. Original
+        columns are not copied.
+        """
+        own = [c for c in columns if c in self.df.columns]
+        parts = [self.df[own]] + [self.get(c) for c in columns if c not in self.df.columns]
+        return pd.concat(parts, axis=1)[list(columns)]
+
+    def with_features(self, names=None):
+        """
+        Copy of the dataframe with the derived features appended (all
+        available ones when ``names`` is None), e.g. for export
+        """
+        if names is None:
+            names = self.available()
+        names = [n for n in names if n not in self.df.columns]
+        if not names:
+            return self.df
+        return pd.concat([self.df] + [self.get(n) for n in names], axis=1)
+
+    def invalidate(self, name=None):
+        """
+        Drop the cached values of one feature, or of all features
+        """
+        if name is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(name, None)
@@ -0,0 +1,197 @@
+import os
+import weakref
+
+import numpy as np
+import pandas as pd
+
+
+def row_hashes(df, subset=None):
+    """
+    Return one 64-bit hash per row (optionally over ``subset`` columns)
+
+    Equal rows always get equal hashes; two different rows collide with
+    probability about 2**-64, which is negligible for duplicate detection.
+
+    Returns
+    -------
+    numpy.ndarray of uint64
+    """
+    if isinstance(subset, str):
+        subset = [subset]
+    if subset is not None:
+        df = df[list(subset)]
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+def _column_values(series):
+    """
+    The innermost array holding a column's values (an ``_ArrowRoot`` for
+    pyarrow-backed columns)
+    """
+    values = series.to_numpy() if isinstance(series.dtype, np.dtype) else series.array
+    if hasattr(values, '_pa_array'):
+        return _ArrowRoot(values._pa_array)
+    # Categorical / datetime-like / masked arrays: their wrappers are
+    # recreated on selection too, the numpy data inside them is not
+    return getattr(values, '_ndarray', getattr(values, '_data', values))
+
+
+def _column_root(series):
+    """
+    The object that owns a column's memory: the numpy block for numpy
+    dtypes, the extension array otherwise
+    """
+    values = _column_values(series)
+    while getattr(values, 'base', None) is not None:
+        values = values.base
+    return values
+
+
+def column_key(series):
+    """
+    Identity of the memory behind one column, the same for every frame
+    the column is selected into
+
+    Returns
+    -------
+    (key, ref)
+        ``key`` is hashable: the owning array plus the column's offset,
+        stride and length within it, so different slices of one block
+        differ. ``ref()`` returns the owning array, or None once it has
+        been freed and ``key`` may be reused.
+    """
+    values = _column_values(series)
+    if isinstance(values, _ArrowRoot):
+        return values.key, _root_ref(values)
+    root = values
+    while getattr(root, 'base', None) is not None:
+        root = root.base
+    layout = None
+    if isinstance(values, np.ndarray):
+        layout = (values.__array_interface__['data'][0], values.strides, values.shape)
+    return (id(root), layout, len(series), str(series.dtype)), _root_ref(root)
+
+
+def _root_ref(root):
+    """
+    Weak reference to a column root where possible. ``_ArrowRoot`` objects
+    are recreated on every selection, so they (and roots that cannot be
+    weakly referenced) are held, which keeps their ids / buffer addresses
+    from being reused.
+    """
+    if not isinstance(root, _ArrowRoot):
+        try:
+            return weakref.ref(root)
+        except TypeError:
+            pass
+    return lambda: root
+
+
+class _ArrowRoot:
+    """
+    Identity of a pyarrow-backed column. Its pandas wrapper is recreated
+    whenever the column is selected into another frame, so the column is
+    identified by the addresses of its Arrow buffers instead; holding the
+    chunked array keeps those addresses from being reused.
+    """
+
+    def __init__(self, chunked):
+        self.chunked = chunked
+        self.key = tuple(
+            (chunk.offset, len(chunk), tuple(b.address if b is not None else 0 for b in chunk.buffers()))
+            for chunk in chunked.chunks
+        )
+
+    def __eq__(self, other):
+        return isinstance(other, _ArrowRoot) and self.key == other.key
+
+    __hash__ = None
+
+
+class FrameToken:
+    """
+    Cheap identity check for cached results computed from a dataframe
+
+    Records which arrays back the given columns. ``matches`` is False as
+    soon as a column is reassigned, rows are added or removed, or columns
+    are added/renamed. Values edited in place (``df.loc[...] = ...``) keep
+    the same arrays and are not detected.
+    """
+
+    def __init__(self, df, columns=None):
+        columns = list(df.columns if columns is None else columns)
+        self.columns = tuple(columns)
+        self.length = len(df)
+        self.refs = []
+        for column in columns:
+            self.refs.append(_root_ref(_column_root(df[column])))
+
+    def matches(self, df):
+        if len(df) != self.length:
+            return False
+        if not set(self.columns) <= set(df.columns):
+            return False
+        for column, ref in zip(self.columns, self.refs):
+            root, current = ref(), _column_root(df[column])
+            if not (root is current or (isinstance(root, _ArrowRoot) and root == current)):
+                return False
+        return True
+
+
+class HashIndex:
+    """
+    Set of 64-bit row hashes kept as one sorted numpy array (8 bytes per
+    row instead of a Python int object per row)
+
+    With a ``path`` the index can be saved to and loaded from a ``.npy``
+    file, so rows ingested in earlier months can be recognized without
+    reloading the old data.
+
+    Parameters
+    ----------
+    path : str, optional
+        Location of the on-disk index; loaded if it already exists
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.values = np.empty(0, dtype=np.uint64)
+        if path is not None and os.path.exists(path):
+            self.values = np.load(path)
+
+    def __len__(self):
+        return len(self.values)
+
+    def contains(self, hashes):
+        """
+        Return a boolean mask of the hashes already in the index
+        """
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        if not len(self.values):
+            return np.zeros(len(hashes), dtype=bool)
+
+        pos = np.searchsorted(self.values, hashes)
+        pos[pos == len(self.values)] = 0
+        return self.values[pos] == hashes
+
+    def add(self, hashes):
+        """
+        Insert ``hashes`` and return a boolean mask marking those that were
+        already present (in the index or earlier in the same batch)
+        """
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        duplicated = self.contains(hashes) | pd.Series(hashes).duplicated().to_numpy()
+
+        new = np.unique(hashes[~duplicated])
+        # Both parts are sorted, so a stable sort is a linear merge
+        self.values = np.sort(np.concatenate([self.values, new]), kind='stable')
+        return duplicated
+
+    def save(self, path=None):
+        path = path or self.path
+        if path is None:
+            raise ValueError("No path given for the hash index")
+        # np.save appends '.npy' to names without it; write to the exact path
+        with open(path, 'wb') as f:
+            np.save(f, self.values)
+        self.path = path
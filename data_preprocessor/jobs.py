@@ -0,0 +1,318 @@
+import inspect
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import CancelledError, ProcessPoolExecutor, ThreadPoolExecutor
+
+import pandas as pd
+
+from .hashing import FrameToken
+
+
+class JobCancelled(Exception):
+    """Raised inside a job at its next progress report after ``cancel()``"""
+
+
+class _Progress:
+    """
+    Progress callback handed to a job as ``progress``; picklable, so it
+    also works in a worker process (``state`` is then a manager dict)
+    """
+
+    def __init__(self, state):
+        self.state = state
+
+    def __call__(self, fraction, message=None):
+        if self.state.get('cancel'):
+            raise JobCancelled()
+        self.state['progress'] = min(max(float(fraction), 0.0), 1.0)
+        if message is not None:
+            self.state['message'] = str(message)
+
+    @property
+    def cancelled(self):
+        return bool(self.state.get('cancel'))
+
+
+def _run(func, args, kwargs, state, with_progress):
+    if state.get('cancel'):
+        raise JobCancelled()
+    state['status'] = 'running'
+    state['started_at'] = time.time()
+    if with_progress:
+        kwargs = {**kwargs, 'progress': _Progress(state)}
+    return func(*args, **kwargs)
+
+
+def _accepts_progress(func):
+    try:
+        parameters = inspect.signature(func).parameters.values()
+    except (TypeError, ValueError):
+        return False
+    return any(p.name == 'progress' for p in parameters)
+
+
+class Job:
+    """
+    One submitted call: its status, progress and result
+
+    ``status`` is one of 'pending', 'running', 'done', 'failed' and
+    'cancelled'. ``progress`` (0 to 1) and ``message`` are whatever the
+    function last reported through its ``progress`` callback.
+    """
+
+    def __init__(self, name, key, token, future, state):
+        self.name = name
+        self.key = key
+        self.token = token
+        self.submitted_at = time.time()
+        self._future = future
+        self._state = state
+
+    def __repr__(self):
+        return f"Job({self.name!r}, {self.status}, {self.progress:.0%})"
+
+    @property
+    def status(self):
+        if self._future.cancelled():
+            return 'cancelled'
+        return self._state.get('status', 'pending')
+
+    @property
+    def progress(self):
+        return self._state.get('progress', 0.0)
+
+    @property
+    def message(self):
+        return self._state.get('message')
+
+    @property
+    def error(self):
+        """The exception of a failed job, else None"""
+        if self.status != 'failed':
+            return None
+        return self._future.exception()
+
+    @property
+    def elapsed(self):
+        """Seconds the job has been running (or ran)"""
+        started = self._state.get('started_at')
+        if started is None:
+            return 0.0
+        return self._state.get('finished_at', time.time()) - started
+
+    def done(self):
+        """Whether the job finished, failed or was cancelled"""
+        return self.status in ('done', 'failed', 'cancelled')
+
+    def cancel(self):
+        """
+        Cancel the job: a pending job never starts, a running one stops
+        at its next progress report (jobs that never report run to the
+        end, and their result is discarded)
+        """
+        self._state['cancel'] = True
+        if self._future.cancel():
+            self._state['status'] = 'cancelled'
+
+    def result(self, timeout=None):
+        """
+        Wait for the job and return its result; raises its exception,
+        or ``JobCancelled``
+        """
+        try:
+            result = self._future.result(timeout)
+        except CancelledError:
+            raise JobCancelled() from None
+        if self.status == 'cancelled':
+            raise JobCancelled()
+        return result
+
+    def matches(self, df):
+        """Whether the job was computed from this version of ``df``"""
+        if self.token is None:
+            return df is None
+        return df is not None and self.token.matches(df)
+
+    def _finish(self, future):
+        state = self._state
+        state['finished_at'] = time.time()
+        if future.cancelled() or state.get('cancel'):
+            state['status'] = 'cancelled'
+        elif future.exception() is not None:
+            state['status'] = 'cancelled' if isinstance(future.exception(), JobCancelled) else 'failed'
+        else:
+            state['status'] = 'done'
+            state['progress'] = 1.0
+
+
+class JobScheduler:
+    """
+    Run long operations in a thread or process pool and find them again
+    on the next call
+
+    Each job is identified by its name, an optional ``key`` (e.g. the
+    parameters) and the dataset version it was computed from (a
+    ``FrameToken`` of ``df``). Submitting a job that is already pending,
+    running or done for the same version returns that job instead of
+    starting the work again, so a Streamlit rerun picks up the job in
+    flight; once the data changes, the old job no longer matches.
+
+    Functions that take a ``progress`` argument receive a callback
+    ``progress(fraction, message=None)``. Each call updates the job's
+    progress and is also the point where a cancelled job stops (it
+    raises ``JobCancelled``).
+
+    Parameters
+    ----------
+    max_workers : int, optional
+        Pool size (default: 2 threads, or one process per CPU)
+    processes : bool
+        Use a process pool: functions and arguments must be picklable,
+        and progress goes through a ``multiprocessing.Manager``
+    max_jobs : int
+        Finished jobs kept for lookup; the oldest are forgotten first
+
+    Example
+    -------
+    jobs = JobScheduler()
+    job = jobs.submit('remove_duplicates', remove, df=df, key=('user_type',))
+    job.progress, job.status
+    job.cancel()
+    jobs.get('remove_duplicates', df, key=('user_type',)).result()
+    """
+
+    def __init__(self, max_workers=None, processes=False, max_jobs=32):
+        self.processes = processes
+        self.max_jobs = max_jobs
+        if processes:
+            self._executor = ProcessPoolExecutor(max_workers)
+        else:
+            self._executor = ThreadPoolExecutor(max_workers or 2, thread_name_prefix='amit-job')
+        self._manager = None
+        self._jobs = OrderedDict()
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._jobs)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+    def _new_state(self):
+        if not self.processes:
+            return {'status': 'pending', 'progress': 0.0}
+        if self._manager is None:
+            import multiprocessing
+            self._manager = multiprocessing.Manager()
+        return self._manager.dict(status='pending', progress=0.0)
+
+    def submit(self, name, func, *args, df=None, columns=None, key=None, **kwargs):
+        """
+        Run ``func(*args, **kwargs)`` in the pool, or return the job
+        already submitted under the same name and key for this version
+        of ``df``
+
+        Parameters
+        ----------
+        name : str
+        func : callable
+        df : pandas.DataFrame, optional
+            The dataset version the result belongs to (it is not passed
+            to ``func``; include it in ``args`` when needed)
+        columns : list of str, optional
+            Only these columns define the version (default: all)
+        key : hashable, optional
+            Distinguishes jobs of the same name, e.g. their parameters
+        """
+        with self._lock:
+            job = self._find(name, key, df)
+            if job is not None and job.status not in ('failed', 'cancelled'):
+                return job
+
+            state = self._new_state()
+            future = self._executor.submit(_run, func, args, kwargs, state, _accepts_progress(func))
+            token = FrameToken(df, columns) if df is not None else None
+            job = Job(name, key, token, future, state)
+            self._jobs[next(self._ids)] = job
+            self._evict()
+        future.add_done_callback(job._finish)
+        return job
+
+    def _find(self, name, key, df):
+        for job in reversed(self._jobs.values()):
+            if job.name == name and job.key == key and job.matches(df):
+                return job
+        return None
+
+    def _evict(self):
+        finished = [i for i, job in self._jobs.items() if job.done()]
+        for i in finished[:max(len(finished) - self.max_jobs, 0)]:
+            del self._jobs[i]
+
+    def get(self, name, df=None, key=None):
+        """
+        The latest job of this name and key for this version of ``df``,
+        or None
+        """
+        with self._lock:
+            return self._find(name, key, df)
+
+    def discard(self, job):
+        """Forget a job (cancelling it if it is still running)"""
+        if not job.done():
+            job.cancel()
+        with self._lock:
+            for i, known in list(self._jobs.items()):
+                if known is job:
+                    del self._jobs[i]
+
+    def running(self):
+        """Jobs that are pending or running"""
+        return [job for job in list(self._jobs.values()) if not job.done()]
+
+    def cancel_all(self):
+        for job in self.running():
+            job.cancel()
+
+    def jobs(self):
+        """
+        One row per known job: name, status, progress, message, elapsed_s
+        """
+        rows = [
+            {'name': job.name, 'status': job.status, 'progress': job.progress,
+             'message': job.message, 'elapsed_s': round(job.elapsed, 2)}
+            for job in list(self._jobs.values())
+        ]
+        return pd.DataFrame(rows, columns=['name', 'status', 'progress', 'message', 'elapsed_s'])
+
+    def shutdown(self, wait=False):
+        """Cancel what is left and stop the pool"""
+        self.cancel_all()
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+
+
+def run_steps(steps, progress=None):
+    """
+    Run ``steps`` (a list of (label, callable)) one after the other,
+    reporting progress and honouring cancellation between them
+
+    Returns the list of results. Meant as a job function:
+    ``jobs.submit('plots', run_steps, [('age', plot_age), ...], df=df)``
+    """
+    results = []
+    for i, (label, step) in enumerate(steps):
+        if progress is not None:
+            progress(i / len(steps), label)
+        results.append(step())
+    if progress is not None:
+        progress(1.0, 'done')
+    return results
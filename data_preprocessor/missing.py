@@ -1,14 +1,22 @@
 import pandas as pd
 
+STRATEGIES = ('drop', 'mean', 'median', 'mode')
+
 class MissingValuesHandler:
-    def __init__(self, df):
+    def __init__(self, df, profile=None):
         self.df = df
+        # Optional ColumnProfile of df: null counts and fill statistics
+        # are read from it instead of scanning the columns again
+        self.profile = profile
 
     def check_nulls(self):
         """
         Return a table with null counts and null ratios (%)
         """
-        null_count = self.df.isnull().sum()
+        if self.profile is not None:
+            null_count = self.profile.nulls()
+        else:
+            null_count = self.df.isnull().sum()
         null_ratio = (null_count / len(self.df)) * 100
 
         return pd.DataFrame({
@@ -26,23 +34,121 @@ class MissingValuesHandler:
         - 'median'
         - 'mode'
         """
-
         if column not in self.df.columns:
             raise ValueError(f"Column '{column}' not found in dataframe")
 
-        if strategy == 'drop':
-            self.df = self.df.dropna(subset=[column])
+        self.handle_nulls_many({column: strategy})
 
-        elif strategy == 'mean':
-            self.df[column] = self.df[column].fillna(self.df[column].mean())
+    def handle_nulls_many(self, strategies, by=None):
+        """
+        Handle nulls for several columns in one pass
 
-        elif strategy == 'median':
-            self.df[column] = self.df[column].fillna(self.df[column].median())
+        Rows are dropped first (for every 'drop' column at once), then all
+        fill values are computed together: one ``agg`` call per strategy,
+        or one grouped ``transform`` per strategy when ``by`` is given.
 
-        elif strategy == 'mode':
-            self.df[column] = self.df[column].fillna(self.df[column].mode()[0])
+        Parameters
+        ----------
+        strategies : dict
+            {column: strategy}, strategy in 'drop', 'mean', 'median', 'mode'
+        by : str or list of str, optional
+            Group columns for group-wise fills, e.g. the median
+            'member_birth_year' per ['user_type', 'member_gender'].
+            Values whose group has no statistic fall back to the
+            whole-column statistic.
 
-        else:
+        Example
+        -------
+        handler.handle_nulls_many(
+            {'member_birth_year': 'median', 'member_gender': 'mode'},
+            by='user_type',
+        )
+        """
+        missing = [c for c in strategies if c not in self.df.columns]
+        if missing:
+            raise ValueError(f"Column(s) not found in dataframe: {missing}")
+
+        invalid = {c: s for c, s in strategies.items() if s not in STRATEGIES}
+        if invalid:
             raise ValueError(
                 "Invalid strategy. Use 'drop', 'mean', 'median', or 'mode'"
-            )
\ No newline at end of file
+            )
+
+        if isinstance(by, str):
+            by = [by]
+
+        drops = [c for c, s in strategies.items() if s == 'drop']
+        if drops:
+            # In place, so handlers sharing this dataframe see the change
+            self.df.dropna(subset=drops, inplace=True)
+            if self.profile is not None:
+                self.profile.invalidate()
+
+        fills = {c: s for c, s in strategies.items() if s != 'drop'}
+        if not fills:
+            return
+
+        values = self.fill_values(fills)
+        if by is None:
+            filled = self.df[list(fills)].fillna(values)
+        else:
+            group_values = self.group_fill_values(fills, by)
+            filled = self.df[list(fills)].fillna(group_values).fillna(values)
+
+        self.df[list(fills)] = filled
+        if self.profile is not None:
+            self.profile.invalidate(list(fills))
+
+    def fill_values(self, strategies):
+        """
+        Return the whole-column fill value for each {column: strategy}
+        """
+        values = {}
+        numeric = set(self.profile.numeric_columns()) if self.profile is not None else set()
+        for strategy, columns in _by_strategy(strategies).items():
+            if strategy in ('mean', 'median') and numeric.issuperset(columns):
+                statistic = 'mean' if strategy == 'mean' else '50%'
+                values.update(self.profile.statistic(columns, statistic).to_dict())
+            elif strategy == 'mode':
+                values.update(self.df[columns].mode().iloc[0].to_dict())
+            else:
+                values.update(self.df[columns].agg(strategy).to_dict())
+        return values
+
+    def group_fill_values(self, strategies, by):
+        """
+        Return a frame (aligned with ``self.df``) holding each row's group
+        statistic for each {column: strategy}
+        """
+        if isinstance(by, str):
+            by = [by]
+
+        parts = []
+        for strategy, columns in _by_strategy(strategies).items():
+            if strategy == 'mode':
+                parts += [_group_mode(self.df, by, c) for c in columns]
+            else:
+                grouped = self.df.groupby(by, observed=True)[columns]
+                parts.append(grouped.transform(strategy))
+        return pd.concat(parts, axis=1)
+
+
+def _by_strategy(strategies):
+    grouped = {}
+    for column, strategy in strategies.items():
+        grouped.setdefault(strategy, []).append(column)
+    return grouped
+
+
+def _group_mode(df, by, column):
+    """
+    Most frequent value of ``column`` within each ``by`` group, broadcast
+    back to the rows (ties resolve to the smallest value, like ``mode()[0]``)
+    """
+    counts = df.groupby(by + [column], observed=True).size().rename('_count').reset_index()
+    top = counts.sort_values(['_count', column], ascending=[False, True]) \
+        .drop_duplicates(subset=by)
+
+    lookup = pd.Series(top[column].to_numpy(), index=pd.MultiIndex.from_frame(top[by]))
+    keys = pd.MultiIndex.from_frame(df[by])
+    return pd.Series(lookup.reindex(keys).to_numpy(), index=df.index, name=column)
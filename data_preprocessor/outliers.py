@@ -1,30 +1,171 @@
-import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+# Default threshold per method:
+# - iqr: multiple of the IQR beyond Q1 / Q3
+# - zscore: number of standard deviations from the mean
+# - mad: modified z-score (0.6745 * |x - median| / MAD)
+# - percentile: (lower, upper) quantiles kept
+METHODS = {
+    'iqr': 1.5,
+    'zscore': 3.0,
+    'mad': 3.5,
+    'percentile': (0.01, 0.99),
+}
+
+ACTIONS = ('cap', 'flag')
+
+# Scales the MAD to the standard deviation of a normal distribution
+MAD_SCALE = 0.6745
+
 
 class OutlierHandler:
-    def __init__(self, df):
+    def __init__(self, df, profile=None):
         self.df = df
+        # Optional ColumnProfile of df: quartiles, mean and std come from it
+        self.profile = profile
 
     def boxplot(self, column, title=None):
-        plt.figure()
-        self.df.boxplot(column=column)
-        plt.title(title or f'Boxplot of {column}')
-        plt.show()
+        """
+        Return a matplotlib figure with a boxplot of ``column``
+        (display it with ``st.pyplot(fig)`` or ``fig.show()``)
+        """
+        # Imported here so headless use of the package never loads matplotlib
+        import matplotlib.pyplot as plt
 
-    # def boxplot(self, column, title=None):
-    #     fig, ax = plt.subplots()
-    #     self.df.boxplot(column=column, ax=ax)
-    #     ax.set_title(title or f"Boxplot of {column}")
+        fig, ax = plt.subplots()
+        self.df.boxplot(column=column, ax=ax)
+        ax.set_title(title or f"Boxplot of {column}")
 
-    #     return fig
-    
+        return fig
 
-    def cap_iqr(self, column):
-        Q1 = self.df[column].quantile(0.25)
-        Q3 = self.df[column].quantile(0.75)
-        IQR = Q3 - Q1
+    def _numeric_columns(self, columns):
+        if columns is None:
+            if self.profile is not None:
+                return self.profile.numeric_columns()
+            return self.df.select_dtypes(include='number').columns.tolist()
+        if isinstance(columns, str):
+            return [columns]
+        return list(columns)
+
+    def bounds(self, columns=None, method='iqr', threshold=None):
+        """
+        Compute lower/upper outlier bounds for several columns at once
+
+        All columns are handled by one vectorized statistics call
+        (e.g. a single ``quantile([0.25, 0.75])`` for IQR).
+
+        Parameters
+        ----------
+        columns : str or list of str, optional
+            Default: every numeric column
+        method : {'iqr', 'zscore', 'mad', 'percentile'}
+        threshold : float or (float, float), optional
+            Overrides the method default, see ``METHODS``
+
+        Returns
+        -------
+        pandas.DataFrame
+            Indexed by column, with 'lower' and 'upper'
+        """
+        if method not in METHODS:
+            raise ValueError(
+                f"Invalid method. Use one of: {', '.join(METHODS)}"
+            )
+        threshold = METHODS[method] if threshold is None else threshold
+        columns = self._numeric_columns(columns)
+        data = self.df[columns]
+        profile = self.profile
+
+        if method == 'iqr':
+            if profile is not None:
+                quartiles = profile.quartiles(columns).astype(float)
+            else:
+                quartiles = data.quantile([0.25, 0.75])
+            q1, q3 = quartiles.loc[0.25], quartiles.loc[0.75]
+            iqr = q3 - q1
+            lower, upper = q1 - threshold * iqr, q3 + threshold * iqr
+
+        elif method == 'zscore':
+            if profile is not None:
+                mean = profile.statistic(columns, 'mean').astype(float)
+                std = profile.statistic(columns, 'std').astype(float)
+            else:
+                stats = data.agg(['mean', 'std'])
+                mean, std = stats.loc['mean'], stats.loc['std']
+            lower, upper = mean - threshold * std, mean + threshold * std
 
-        lower = Q1 - 1.5 * IQR
-        upper = Q3 + 1.5 * IQR
+        elif method == 'mad':
+            median = data.median()
+            mad = (data - median).abs().median()
+            # A zero MAD (more than half the values equal) gives no bounds
+            spread = (threshold * mad / MAD_SCALE).replace(0, np.inf)
+            lower, upper = median - spread, median + spread
 
-        self.df.loc[self.df[column] < lower, column] = lower
-        self.df.loc[self.df[column] > upper, column] = upper
+        else:
+            low_q, high_q = threshold
+            quantiles = data.quantile([low_q, high_q])
+            lower, upper = quantiles.loc[low_q], quantiles.loc[high_q]
+
+        return pd.DataFrame({'lower': lower, 'upper': upper})
+
+    def outlier_report(self, columns=None, method='iqr', threshold=None, bounds=None):
+        """
+        Return per-column bounds and the number of values below / above them
+        """
+        if bounds is None:
+            bounds = self.bounds(columns, method, threshold)
+        data = self.df[bounds.index]
+
+        below = data.lt(bounds['lower'], axis=1).sum()
+        above = data.gt(bounds['upper'], axis=1).sum()
+        report = bounds.assign(n_below=below, n_above=above)
+        report['n_outliers'] = below + above
+        report['outlier_%'] = (report['n_outliers'] / max(len(data), 1) * 100).round(2)
+        return report
+
+    def handle_outliers(self, columns=None, method='iqr', threshold=None, action='cap'):
+        """
+        Cap or flag outliers in several columns with one vectorized pass
+
+        Parameters
+        ----------
+        columns : str or list of str, optional
+            Default: every numeric column
+        method : {'iqr', 'zscore', 'mad', 'percentile'}
+        threshold : float or (float, float), optional
+            Overrides the method default, see ``METHODS``
+        action : {'cap', 'flag'}
+            'cap' clips values to the bounds; 'flag' leaves them unchanged
+            and adds a boolean ``<column>_outlier`` column
+
+        Returns
+        -------
+        pandas.DataFrame
+            The outlier report (bounds and counts) computed before the action
+        """
+        if action not in ACTIONS:
+            raise ValueError("Invalid action. Use 'cap' or 'flag'")
+
+        report = self.outlier_report(columns, method, threshold)
+        self.apply_bounds(report[['lower', 'upper']], action)
+        return report
+
+    def apply_bounds(self, bounds, action='cap'):
+        """
+        Cap or flag values outside precomputed ``bounds``
+        (a frame indexed by column with 'lower' and 'upper')
+        """
+        columns = bounds.index.tolist()
+        data = self.df[columns]
+
+        if action == 'cap':
+            self.df[columns] = data.clip(lower=bounds['lower'], upper=bounds['upper'], axis=1)
+            if self.profile is not None:
+                self.profile.invalidate(columns)
+        else:
+            flags = data.lt(bounds['lower'], axis=1) | data.gt(bounds['upper'], axis=1)
+            self.df[[f"{c}_outlier" for c in columns]] = flags.to_numpy()
+
+    def cap_iqr(self, column):
+        self.handle_outliers(column, method='iqr')
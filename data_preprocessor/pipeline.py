@@ -2,14 +2,55 @@ from .datatypes import DataTypeHandler
 from .missing import MissingValuesHandler
 from .outliers import OutlierHandler
 from .duplicates import DuplicateHandler
+from .column_profile import ColumnProfile
+from .plan import PreprocessingPlan
 
 class PreprocessingPipeline:
-    def __init__(self, df):
+    def __init__(self, df, profiler=None):
+        self.profiler = profiler
+        # Column statistics shared by the handlers, kept across runs for
+        # the columns a plan did not change
+        self.column_profile = ColumnProfile(df)
+        self._bind(df)
+
+    def _bind(self, df):
         self.df = df
-        self.dtypes = DataTypeHandler(df)
-        self.missing = MissingValuesHandler(df)
-        self.outliers = OutlierHandler(df)
+        profile = self.column_profile.bind(df)
+        self.dtypes = DataTypeHandler(df, profile=profile)
+        self.missing = MissingValuesHandler(df, profile=profile)
+        self.outliers = OutlierHandler(df, profile=profile)
         self.duplicates = DuplicateHandler(df)
+        if self.profiler is not None:
+            for handler in (self.dtypes, self.missing, self.outliers, self.duplicates):
+                self.profiler.wrap(handler)
 
     def get_data(self):
-        return self.df
\ No newline at end of file
+        return self.df
+
+    def profile(self, summary=False):
+        """
+        Timings recorded so far: one row per handler call / plan operation,
+        or totals per operation with ``summary=True``. Needs a ``Profiler``.
+        """
+        if self.profiler is None:
+            raise ValueError("Create the pipeline with a Profiler to record timings")
+        return self.profiler.summary() if summary else self.profiler.to_frame()
+
+    @staticmethod
+    def plan(steps=None):
+        """
+        Start a lazy plan. Calls such as ``plan.missing.handle_nulls(...)``
+        are recorded instead of executed; see ``PreprocessingPlan``.
+        """
+        return PreprocessingPlan(steps)
+
+    def run(self, plan):
+        """
+        Execute a plan (or a path / JSON string of a saved plan) on the
+        pipeline data and rebind every handler to the result
+        """
+        if not isinstance(plan, PreprocessingPlan):
+            plan = PreprocessingPlan.from_json(plan)
+
+        self._bind(plan.execute(self.df, profiler=self.profiler))
+        return self.df
@@ -0,0 +1,399 @@
+import inspect
+import json
+
+from .datatypes import DataTypeHandler, cast_column
+from .missing import MissingValuesHandler, STRATEGIES
+from .outliers import OutlierHandler
+from .duplicates import DuplicateHandler
+
+
+PLAN_VERSION = 1
+
+# (handler attribute, method) pairs that transform the dataframe and can be
+# recorded as plan steps. Read-only helpers (check_nulls, show_duplicates ...)
+# are not part of a plan.
+HANDLERS = {
+    'dtypes': DataTypeHandler,
+    'missing': MissingValuesHandler,
+    'duplicates': DuplicateHandler,
+    'outliers': OutlierHandler,
+}
+
+TRANSFORMS = {
+    ('dtypes', 'convert_dtype'),
+    ('dtypes', 'optimize_memory'),
+    ('missing', 'handle_nulls'),
+    ('missing', 'handle_nulls_many'),
+    ('duplicates', 'remove_duplicates'),
+    ('outliers', 'cap_iqr'),
+    ('outliers', 'handle_outliers'),
+}
+
+# Casts that never merge two distinct values, so they give the same result
+# whether they run before or after duplicate removal. Text casts are not:
+# 1 and '1' both become '1'.
+LOSSLESS_DTYPES = {'category'}
+
+
+class _StepRecorder:
+    """Stand-in for a handler that records calls instead of running them."""
+
+    def __init__(self, plan, handler):
+        self._plan = plan
+        self._handler = handler
+
+    def __getattr__(self, method):
+        if (self._handler, method) not in TRANSFORMS:
+            raise AttributeError(
+                f"'{self._handler}.{method}' is not a recordable step"
+            )
+
+        def record(*args, **kwargs):
+            self._plan.add(self._handler, method, *args, **kwargs)
+
+        return record
+
+
+class PreprocessingPlan:
+    """
+    A recorded, replayable list of preprocessing steps.
+
+    Steps are recorded with the same calls used on the handlers::
+
+        plan = PreprocessingPlan()
+        plan.dtypes.convert_dtype('user_type', 'category')
+        plan.duplicates.remove_duplicates()
+        plan.outliers.cap_iqr('duration_sec')
+
+        cleaned = plan.execute(df)
+        plan.to_json('monthly_plan.json')
+
+    Nothing touches the data until ``execute`` is called. Before running,
+    the plan is optimized: steps that commute with duplicate removal are
+    moved ahead of it and runs of compatible steps (casts, fills, outlier
+    caps on different columns) are fused into a single vectorized operation.
+    """
+
+    def __init__(self, steps=None):
+        self.steps = []
+        for step in steps or []:
+            self.add(step['handler'], step['method'], **step.get('params', {}))
+
+    def __getattr__(self, handler):
+        if handler in HANDLERS:
+            return _StepRecorder(self, handler)
+        raise AttributeError(handler)
+
+    def __len__(self):
+        return len(self.steps)
+
+    def __repr__(self):
+        return f"PreprocessingPlan({len(self.steps)} steps)"
+
+    def add(self, handler, method, /, *args, **kwargs):
+        """
+        Append a step, validating its arguments against the handler method
+
+        Parameters
+        ----------
+        handler : str
+            One of 'dtypes', 'missing', 'duplicates', 'outliers'
+        method : str
+            Name of the handler method, e.g. 'convert_dtype'
+        """
+        if (handler, method) not in TRANSFORMS:
+            raise ValueError(f"Unsupported step: {handler}.{method}")
+
+        func = getattr(HANDLERS[handler], method)
+        bound = _bind_params(func, args, kwargs)
+        self.steps.append({'handler': handler, 'method': method, 'params': bound})
+        return self
+
+    # ---------------------------------------------------------------
+    # Serialization
+    # ---------------------------------------------------------------
+
+    def to_dict(self):
+        return {'version': PLAN_VERSION, 'steps': [dict(s) for s in self.steps]}
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get('version') != PLAN_VERSION:
+            raise ValueError(f"Unsupported plan version: {data.get('version')}")
+        return cls(data['steps'])
+
+    def to_json(self, path=None):
+        """
+        Serialize the plan. Returns the JSON string, and also writes it to
+        ``path`` when one is given.
+        """
+        text = json.dumps(self.to_dict(), indent=2)
+        if path is not None:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+        return text
+
+    @classmethod
+    def from_json(cls, source):
+        """
+        Load a plan from a JSON string, a file path or an open file
+        """
+        if hasattr(source, 'read'):
+            text = source.read()
+        elif isinstance(source, str) and source.lstrip().startswith('{'):
+            text = source
+        else:
+            with open(source, encoding='utf-8') as f:
+                text = f.read()
+
+        if isinstance(text, bytes):
+            text = text.decode('utf-8')
+        return cls.from_dict(json.loads(text))
+
+    # ---------------------------------------------------------------
+    # Optimization
+    # ---------------------------------------------------------------
+
+    def optimize(self):
+        """
+        Return the list of operations that ``execute`` will run
+
+        Each operation is a dict with a 'kind' and the fused parameters.
+        """
+        steps = _hoist_past_dedup([op for s in self.steps for op in _classify(s)])
+        return _fuse(steps)
+
+    def explain(self):
+        """
+        Return a readable description of the optimized plan
+        """
+        lines = []
+        for i, op in enumerate(self.optimize(), 1):
+            detail = ', '.join(f"{k}={v}" for k, v in op.items() if k != 'kind')
+            lines.append(f"{i}. {op['kind']}({detail})")
+        return '\n'.join(lines)
+
+    # ---------------------------------------------------------------
+    # Execution
+    # ---------------------------------------------------------------
+
+    def execute(self, df, profiler=None):
+        """
+        Run the optimized plan on ``df`` and return the resulting dataframe
+
+        The input dataframe is not modified. With a ``Profiler`` each
+        operation is recorded as 'plan.<kind>'.
+        """
+        for op in self.optimize():
+            if profiler is None:
+                df = _EXECUTORS[op['kind']](df, op)
+                continue
+            result = {}
+            with profiler.measure(f"plan.{op['kind']}", df, lambda: result.get('df')):
+                result['df'] = _EXECUTORS[op['kind']](df, op)
+            df = result['df']
+        return df
+
+
+def _bind_params(func, args, kwargs):
+    signature = inspect.signature(func)
+    bound = signature.bind(None, *args, **kwargs)
+    bound.apply_defaults()
+    params = dict(bound.arguments)
+    params.pop('self')
+    # Progress callbacks only matter while a step runs interactively
+    params.pop('progress', None)
+    return params
+
+
+def _classify(step):
+    """
+    Map a recorded step to the operations used by the optimizer
+    """
+    params = step['params']
+    method = step['method']
+
+    if method == 'convert_dtype':
+        op = {'kind': 'cast', 'columns': {params['column']: params['dtype']}}
+        if params.get('format') is not None:
+            op['formats'] = {params['column']: params['format']}
+        return [op]
+
+    if method == 'optimize_memory':
+        return [{'kind': 'optimize_memory', 'params': dict(params)}]
+
+    if method in ('handle_nulls', 'handle_nulls_many'):
+        if method == 'handle_nulls':
+            strategies, by = {params['column']: params['strategy']}, None
+        else:
+            strategies, by = dict(params['strategies']), params['by']
+
+        if any(s not in STRATEGIES for s in strategies.values()):
+            raise ValueError(
+                "Invalid strategy. Use 'drop', 'mean', 'median', or 'mode'"
+            )
+        if isinstance(by, str):
+            by = [by]
+
+        # Same order as MissingValuesHandler.handle_nulls_many: drop, then fill
+        ops = []
+        drops = [c for c, s in strategies.items() if s == 'drop']
+        fills = {c: s for c, s in strategies.items() if s != 'drop'}
+        if drops:
+            ops.append({'kind': 'dropna', 'subset': drops})
+        if fills:
+            ops.append({'kind': 'fillna', 'strategies': fills, 'by': by})
+        return ops
+
+    if method == 'remove_duplicates':
+        subset = params['subset']
+        if isinstance(subset, str):
+            subset = [subset]
+        keep = 'first' if params['keep'] is None else params['keep']
+        return [{'kind': 'dedup', 'subset': subset, 'keep': keep}]
+
+    if method == 'cap_iqr':
+        return [{'kind': 'outliers', 'columns': [params['column']],
+                 'method': 'iqr', 'threshold': None, 'action': 'cap'}]
+
+    if method == 'handle_outliers':
+        columns = params['columns']
+        if isinstance(columns, str):
+            columns = [columns]
+        return [{'kind': 'outliers', 'columns': columns, 'method': params['method'],
+                 'threshold': params['threshold'], 'action': params['action']}]
+
+    raise ValueError(f"Unsupported step: {step['handler']}.{method}")
+
+
+def _commutes_with_dedup(op, dedup):
+    if op['kind'] == 'dropna':
+        # A duplicated row has the same nulls as its original in the key
+        # columns, so dropping on those removes whole groups at once.
+        return dedup['subset'] is None or set(op['subset']) <= set(dedup['subset'])
+    if op['kind'] == 'cast':
+        return all(str(d) in LOSSLESS_DTYPES for d in op['columns'].values())
+    return False
+
+
+def _hoist_past_dedup(ops):
+    """
+    Move lossless casts and null drops in front of any duplicate removal
+    that directly precedes them, so dedup runs on fewer rows with cheaper
+    column types
+    """
+    ops = list(ops)
+    changed = True
+    while changed:
+        changed = False
+        for i in range(1, len(ops)):
+            if ops[i - 1]['kind'] == 'dedup' and _commutes_with_dedup(ops[i], ops[i - 1]):
+                ops[i - 1], ops[i] = ops[i], ops[i - 1]
+                changed = True
+    return ops
+
+
+def _fuse(ops):
+    """
+    Merge adjacent operations of the same kind when they are independent
+    """
+    fused = []
+    for op in ops:
+        prev = fused[-1] if fused else None
+        if prev is None or prev['kind'] != op['kind']:
+            fused.append(_copy_op(op))
+            continue
+
+        kind = op['kind']
+        if kind == 'dedup' and op['subset'] == prev['subset']:
+            # Removing duplicates twice in a row is a no-op the second time
+            continue
+        if kind == 'dropna':
+            # dropna(a) then dropna(b) == dropna(subset=[a, b], how='any')
+            prev['subset'] += [c for c in op['subset'] if c not in prev['subset']]
+            continue
+        if kind == 'cast' and not set(op['columns']) & set(prev['columns']):
+            prev['columns'].update(op['columns'])
+            if 'formats' in op:
+                prev.setdefault('formats', {}).update(op['formats'])
+            continue
+        if (kind == 'fillna' and op['by'] == prev['by']
+                and not set(op['strategies']) & set(prev['strategies'])):
+            prev['strategies'].update(op['strategies'])
+            continue
+        if kind == 'outliers' and _same_outlier_rule(op, prev):
+            prev['columns'] += op['columns']
+            continue
+
+        # Same column touched twice: keep the order, run them separately
+        fused.append(_copy_op(op))
+    return fused
+
+
+def _same_outlier_rule(op, prev):
+    if op['columns'] is None or prev['columns'] is None:
+        return False
+    if set(op['columns']) & set(prev['columns']):
+        return False
+    return all(op[k] == prev[k] for k in ('method', 'threshold', 'action'))
+
+
+def _copy_op(op):
+    copied = dict(op)
+    for key, value in op.items():
+        if isinstance(value, (list, dict)):
+            copied[key] = value.copy()
+    return copied
+
+
+def _run_cast(df, op):
+    # Per column, so Arrow-backed columns keep Arrow types
+    formats = op.get('formats', {})
+    return df.assign(**{
+        c: cast_column(df[c], d, formats.get(c)) for c, d in op['columns'].items()
+    })
+
+
+def _run_optimize_memory(df, op):
+    handler = DataTypeHandler(df.copy(deep=False))
+    handler.optimize_memory(**op['params'])
+    return handler.df
+
+
+def _run_dropna(df, op):
+    return df.dropna(subset=op['subset'])
+
+
+def _run_fillna(df, op):
+    # 'values' is pre-resolved by callers that compute the statistics
+    # elsewhere (e.g. across chunks); otherwise compute them from df
+    if 'values' in op:
+        return df.fillna(op['values'])
+
+    handler = MissingValuesHandler(df.copy(deep=False))
+    handler.handle_nulls_many(op['strategies'], by=op['by'])
+    return handler.df
+
+
+def _run_dedup(df, op):
+    return df.drop_duplicates(subset=op['subset'], keep=op['keep'])
+
+
+def _run_outliers(df, op):
+    # 'bounds' is pre-resolved by callers that compute it elsewhere
+    handler = OutlierHandler(df.copy(deep=False))
+    if 'bounds' in op:
+        handler.apply_bounds(op['bounds'], op['action'])
+    else:
+        handler.handle_outliers(op['columns'], op['method'], op['threshold'], op['action'])
+    return handler.df
+
+
+_EXECUTORS = {
+    'cast': _run_cast,
+    'optimize_memory': _run_optimize_memory,
+    'dropna': _run_dropna,
+    'fillna': _run_fillna,
+    'dedup': _run_dedup,
+    'outliers': _run_outliers,
+}
@@ -0,0 +1,246 @@
+import functools
+import json
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import pandas as pd
+
+COLUMNS = [
+    'name', 'depth', 'wall_s', 'cpu_s', 'peak_mem_mb',
+    'rows_before', 'cols_before', 'rows_after', 'cols_after', 'started_at',
+]
+
+# tracemalloc is process-wide, so every profiler shares this registry of
+# the operations currently traced: starting one folds the peak so far
+# into all the others before resetting it, and the last one to finish
+# stops tracing if a profiler started it
+_TRACE_LOCK = threading.Lock()
+_traced = []
+_started_tracing = False
+
+
+class Profiler:
+    """
+    Records wall time, CPU time, peak memory and frame shape for each
+    measured operation
+
+    Operations are measured with ``measure`` (a context manager) or by
+    wrapping a handler with ``wrap``, after which every public method call
+    is recorded as '<Handler>.<method>'. Calls made inside a measured call
+    (a handler method using another one) are recorded too, with a larger
+    ``depth``. Records are kept in memory (``records``, ``to_frame``,
+    ``summary``) and, with ``log_path``, appended to a JSON-lines log so
+    runs can be compared over time.
+
+    Peak memory is opt-in (``trace_memory=True``) and measured with
+    ``tracemalloc``, which NumPy and pandas report their buffers to. It
+    is the peak of traced allocations above the level at the start of
+    the operation. Tracing is process-wide: it runs only while a traced
+    operation is in progress, slows allocation-heavy code in every
+    thread down a little, and operations running at the same time in
+    other threads add to each other's peaks.
+
+    Parameters
+    ----------
+    log_path : str, optional
+        JSON-lines file each record is appended to
+    trace_memory : bool
+
+    Example
+    -------
+    profiler = Profiler('profile.jsonl', trace_memory=True)
+    handler = profiler.wrap(DuplicateHandler(df))
+    handler.remove_duplicates()
+    with profiler.measure('read_csv'):
+        df = pd.read_csv(path)
+    profiler.summary()
+    """
+
+    def __init__(self, log_path=None, trace_memory=False):
+        self.log_path = log_path
+        self.trace_memory = trace_memory
+        self.records = []
+        # Nesting depth is per thread: concurrent calls are not nested
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def _stack(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def measure(self, name, df=None, after=None):
+        """
+        Measure the enclosed block
+
+        Parameters
+        ----------
+        name : str
+        df : pandas.DataFrame, optional
+            Frame whose shape is recorded before the block
+        after : callable, optional
+            Returns the frame whose shape is recorded after the block
+            (defaults to ``df``)
+        """
+        shape_before = df.shape if df is not None else (None, None)
+        frame = self._enter()
+        depth = len(self._stack) - 1
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            peak = self._exit(frame)
+            result = after() if after is not None else df
+            shape_after = result.shape if result is not None else (None, None)
+            self._add({
+                'name': name,
+                'depth': depth,
+                'wall_s': round(wall, 6),
+                'cpu_s': round(cpu, 6),
+                'peak_mem_mb': None if peak is None else round(peak / 1024**2, 3),
+                'rows_before': shape_before[0],
+                'cols_before': shape_before[1],
+                'rows_after': shape_after[0],
+                'cols_after': shape_after[1],
+                'started_at': frame['started_at'],
+            })
+
+    def wrap(self, handler, prefix=None):
+        """
+        Record every public method call of ``handler`` (an instance with
+        a ``df`` attribute) and return the handler
+        """
+        prefix = prefix or type(handler).__name__
+        for attr in dir(type(handler)):
+            # Properties are skipped without being read: some build state lazily
+            if attr.startswith('_') or isinstance(getattr(type(handler), attr), property):
+                continue
+            method = getattr(handler, attr)
+            if callable(method) and not getattr(method, '_profiled', False):
+                setattr(handler, attr, self._wrap_method(handler, f"{prefix}.{attr}", method))
+        return handler
+
+    def _wrap_method(self, handler, name, method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            with self.measure(name, getattr(handler, 'df', None), lambda: getattr(handler, 'df', None)):
+                return method(*args, **kwargs)
+        wrapper._profiled = True
+        return wrapper
+
+    def _enter(self):
+        frame = {
+            'started_at': datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+            'start': 0,
+            'peak': 0,
+            'traced': self.trace_memory,
+        }
+        if self.trace_memory:
+            _start_trace(frame)
+        self._stack.append(frame)
+        return frame
+
+    def _exit(self, frame):
+        self._stack.remove(frame)
+        if not frame['traced']:
+            return None
+        return _stop_trace(frame)
+
+    def _add(self, record):
+        with self._lock:
+            self.records.append(record)
+            if self.log_path is not None:
+                with open(self.log_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record, default=str) + '\n')
+
+    def to_frame(self):
+        """
+        Every record as a dataframe (one row per measured call)
+        """
+        return pd.DataFrame(self.records, columns=COLUMNS)
+
+    def summary(self, nested=False):
+        """
+        Calls, total / mean wall time, total CPU time and largest peak
+        memory per operation, slowest first
+
+        Only outermost calls are counted unless ``nested`` is True (nested
+        calls are already part of their caller's time).
+        """
+        frame = self.to_frame()
+        if not nested:
+            frame = frame[frame['depth'] == 0]
+        if frame.empty:
+            return pd.DataFrame(columns=['calls', 'wall_s', 'mean_wall_s', 'cpu_s', 'peak_mem_mb'])
+        summary = frame.groupby('name').agg(
+            calls=('wall_s', 'size'),
+            wall_s=('wall_s', 'sum'),
+            mean_wall_s=('wall_s', 'mean'),
+            cpu_s=('cpu_s', 'sum'),
+            peak_mem_mb=('peak_mem_mb', 'max'),
+        )
+        return summary.sort_values('wall_s', ascending=False)
+
+    def to_json(self, path=None):
+        """
+        All records as a JSON array string, also written to ``path`` if given
+        """
+        text = json.dumps(self.records, default=str, indent=2)
+        if path is not None:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+        return text
+
+    @staticmethod
+    def read_log(path):
+        """
+        Load a JSON-lines log written with ``log_path`` as a dataframe
+        """
+        return pd.read_json(path, lines=True)
+
+    def clear(self):
+        with self._lock:
+            self.records.clear()
+
+
+def _start_trace(frame):
+    global _started_tracing
+    with _TRACE_LOCK:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _started_tracing = True
+        current, peak = tracemalloc.get_traced_memory()
+        # Keep the peaks of the operations in progress before resetting it
+        for other in _traced:
+            other['peak'] = max(other['peak'], peak)
+        tracemalloc.reset_peak()
+        frame['start'] = frame['peak'] = current
+        _traced.append(frame)
+
+
+def _stop_trace(frame):
+    """Peak memory of ``frame`` above its start, None if tracing was stopped elsewhere"""
+    global _started_tracing
+    with _TRACE_LOCK:
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            peak = tracemalloc.get_traced_memory()[1]
+            for other in _traced:
+                other['peak'] = max(other['peak'], peak)
+        _traced.remove(frame)
+        if not _traced and _started_tracing:
+            if tracing:
+                tracemalloc.stop()
+            _started_tracing = False
+    if not tracing:
+        return None
+    return max(frame['peak'] - frame['start'], 0)
@@ -0,0 +1,177 @@
+import pandas as pd
+
+from .hashing import _ArrowRoot, _column_root
+
+
+class VersionStore:
+    """
+    History of dataset versions with undo / redo
+
+    Each version is a shallow copy of the frame. With pandas copy-on-write
+    a shallow copy shares every column with the frame it came from until
+    one of them is modified, and then only the modified column is copied.
+    Storing a version therefore costs memory only for the columns the
+    step changed, and undo, redo and jumps just move a position.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        The original dataset (version 0)
+    name : str
+        Name of the first version
+    max_versions : int, optional
+        Oldest versions are dropped beyond this many
+
+    Example
+    -------
+    versions = VersionStore(df)
+    df = versions.checkout()
+    df.drop_duplicates(inplace=True)
+    versions.commit(df, 'Remove duplicates')
+    df = versions.undo()
+    """
+
+    def __init__(self, df, name='original', max_versions=50):
+        self.max_versions = max_versions
+        self._versions = []
+        self._position = -1
+        self.commit(df, name)
+
+    def __len__(self):
+        return len(self._versions)
+
+    @property
+    def position(self):
+        return self._position
+
+    @property
+    def name(self):
+        return self._versions[self._position]['name']
+
+    @property
+    def can_undo(self):
+        return self._position > 0
+
+    @property
+    def can_redo(self):
+        return self._position < len(self._versions) - 1
+
+    def commit(self, df, name, **info):
+        """
+        Store ``df`` as a new version after the current one (discarding
+        any versions that could have been redone) and return its position
+
+        Extra keyword arguments are kept with the version (see ``info``).
+        """
+        previous = self._versions[self._position]['frame'] if self._versions else None
+        del self._versions[self._position + 1:]
+
+        frame = df.copy(deep=False)
+        self._versions.append({
+            'name': name,
+            'frame': frame,
+            'changed': _changed_columns(previous, frame),
+            'info': info,
+        })
+        if self.max_versions is not None and len(self._versions) > self.max_versions:
+            del self._versions[:len(self._versions) - self.max_versions]
+        self._position = len(self._versions) - 1
+        return self._position
+
+    def checkout(self, version=None):
+        """
+        Working copy of the current (or given) version. It can be modified
+        freely, in place too, without affecting any stored version.
+        """
+        position = self._position if version is None else self._find(version)
+        return self._versions[position]['frame'].copy(deep=False)
+
+    def undo(self):
+        if not self.can_undo:
+            raise ValueError("Nothing to undo")
+        self._position -= 1
+        return self.checkout()
+
+    def redo(self):
+        if not self.can_redo:
+            raise ValueError("Nothing to redo")
+        self._position += 1
+        return self.checkout()
+
+    def jump(self, version):
+        """
+        Make ``version`` (a position or a name; the latest version with
+        that name) current and return a working copy of it
+        """
+        self._position = self._find(version)
+        return self.checkout()
+
+    def info(self, version=None):
+        """
+        Extra data stored with the current (or given) version
+        """
+        position = self._position if version is None else self._find(version)
+        return self._versions[position]['info']
+
+    def _find(self, version):
+        if isinstance(version, str):
+            for position in range(len(self._versions) - 1, -1, -1):
+                if self._versions[position]['name'] == version:
+                    return position
+            raise ValueError(f"No version named '{version}'")
+        if not 0 <= version < len(self._versions):
+            raise ValueError(f"Version {version} does not exist")
+        return version
+
+    def history(self):
+        """
+        One row per version: name, shape, columns changed by the step and
+        whether it is the current version
+        """
+        return pd.DataFrame([
+            {
+                'version': position,
+                'name': v['name'],
+                'rows': len(v['frame']),
+                'columns': v['frame'].shape[1],
+                'changed': ', '.join(v['changed']) if v['changed'] is not None else 'all',
+                'current': position == self._position,
+            }
+            for position, v in enumerate(self._versions)
+        ])
+
+    def memory_usage(self):
+        """
+        Bytes held by all versions together, counting shared columns once
+        """
+        seen = {}
+        for v in self._versions:
+            for column in v['frame'].columns:
+                key, nbytes = _column_memory(v['frame'][column])
+                seen[key] = nbytes
+        return sum(seen.values())
+
+
+def _changed_columns(previous, frame):
+    """
+    Columns of ``frame`` that do not share their data with ``previous``
+    (None when the rows changed, i.e. every column is new)
+    """
+    if previous is None or len(previous) != len(frame):
+        return None
+    changed = []
+    for column in frame.columns:
+        if column not in previous.columns:
+            changed.append(column)
+            continue
+        old, new = _column_root(previous[column]), _column_root(frame[column])
+        if not (old is new or (isinstance(old, _ArrowRoot) and old == new)):
+            changed.append(column)
+    return changed
+
+
+def _column_memory(series):
+    root = _column_root(series)
+    if isinstance(root, _ArrowRoot):
+        return ('arrow', root.key), root.chunked.nbytes
+    return id(root), getattr(root, 'nbytes', series.memory_usage(index=False, deep=True))
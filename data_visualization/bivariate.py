@@ -1,121 +1,182 @@
 import streamlit as st
-import matplotlib.pyplot as plt
 import seaborn as sns
 import pandas as pd
 
+from data_preprocessor.features import DerivedFeatures
+from data_preprocessor.jobs import run_steps
+from data_visualization.figure_cache import show_figure, subplots
+from data_visualization.stats_cube import StatsCube
+from data_visualization.summaries import draw_boxes, draw_hist_kde, draw_violins
+
 
 class BivariateHandler:
     """Helper for bivariate visualizations."""
 
-    def __init__(self, df: pd.DataFrame):
+    def __init__(self, df: pd.DataFrame, cache=None, features=None, cube=None, profile=None):
         self.df = df
+        self.cache = cache
+        self.features = features if features is not None else DerivedFeatures(df)
+        self._cube = cube
+        self.profile = profile
+
+    @property
+    def cube(self):
+        """Grouped statistics every table reads from, built on first use"""
+        if self._cube is None:
+            self._cube = StatsCube(self.df, features=self.features, profile=self.profile)
+        return self._cube
+
+    def prepare(self, progress=None):
+        """
+        Build the statistics cube and the derived columns the plots read,
+        without drawing or calling Streamlit, e.g. as a background job;
+        the plots then only draw. Returns the handler.
+        """
+        run_steps([
+            ('derived columns', lambda: self.features.frame(['duration_min', 'member_age'])),
+            ('statistics cube', lambda: self.cube),
+            ('duration p99', lambda: self.cube.quantile((), 'duration_min', 0.99)),
+        ], progress)
+        return self
 
     def avg_duration_by_user_type(self):
-        self.df['duration_min'] = (self.df['duration_sec'] / 60).round(2)
+        data = self.features.frame(['user_type', 'duration_min'])
         st.subheader("⏳ Average Trip Duration by User Type")
-        avg_duration = self.df.groupby('user_type')['duration_min'].mean().reset_index()
+        stats = self.cube.summary('user_type', 'duration_min')
+        avg_duration = stats['mean'].reset_index()
         avg_duration.columns = ['user_type', 'avg_duration_min']
         avg_duration = avg_duration.sort_values('avg_duration_min', ascending=False)
 
-        fig, ax = plt.subplots(figsize=(8, 4))
-        sns.barplot(x='user_type', y='avg_duration_min', data=avg_duration,
-                    palette=['#2aaaa4', '#C5B048'], ax=ax)
-        ax.set_title('Average Trip Duration (min) by User Type', fontweight='black')
-        ax.set_xlabel('User Type')
-        ax.set_ylabel('Avg Duration (min)')
-        for i, row in avg_duration.reset_index(drop=True).iterrows():
-            ax.text(i, row['avg_duration_min'] + 0.3,
-                    f"{row['avg_duration_min']:.2f}", ha='center')
-        st.pyplot(fig)
-        plt.close(fig)
-
-        grouped = self.df.groupby('user_type')['duration_min'].agg(['mean', 'median', 'std']).round(2)
+        def draw():
+            fig, ax = subplots(figsize=(8, 4))
+            sns.barplot(x='user_type', y='avg_duration_min', data=avg_duration,
+                        palette=['#2aaaa4', '#C5B048'], ax=ax)
+            ax.set_title('Average Trip Duration (min) by User Type', fontweight='black')
+            ax.set_xlabel('User Type')
+            ax.set_ylabel('Avg Duration (min)')
+            for i, row in avg_duration.reset_index(drop=True).iterrows():
+                ax.text(i, row['avg_duration_min'] + 0.3,
+                        f"{row['avg_duration_min']:.2f}", ha='center')
+            return fig
+
+        show_figure(self.cache, 'bivariate.avg_duration_by_user_type', data,
+                    ['user_type', 'duration_min'], draw)
+
         st.markdown("**Duration statistics:**")
-        st.dataframe(grouped)
+        st.dataframe(stats.round(2))
 
     def duration_by_gender(self):
+        data = self.features.frame(['member_gender', 'duration_min'])
         st.subheader("🚻 Trip Duration by Gender")
-        p99 = self.df['duration_min'].quantile(0.99)
-        df_capped = self.df[self.df['duration_min'] <= p99].copy()
-
-        fig, axs = plt.subplots(1, 2, figsize=(17, 6))
-        sns.violinplot(x='member_gender', y='duration_min', data=df_capped,
-                       palette=['#2aaaa4', '#C5B048'], inner='quartile', order=['Male','Female'], ax=axs[0])
-        axs[0].set_title('Trip Duration (min) Distribution by Gender')
-        sns.boxplot(x='member_gender', y='duration_min', data=df_capped,
-                    palette=['#2aaaa4', '#C5B048'], order=['Male','Female'], ax=axs[1])
-        axs[1].set_title('Trip Duration (min) Box Plot by Gender')
-        st.pyplot(fig)
-        plt.close(fig)
+
+        p99 = self.cube.quantile((), 'duration_min', 0.99)
+
+        def draw():
+            groups = _capped_groups(data, 'member_gender', 'duration_min', ['Male', 'Female'], p99)
+
+            fig, axs = subplots(1, 2, figsize=(17, 6))
+            draw_violins(axs[0], groups, ['#2aaaa4', '#C5B048'])
+            axs[0].set_title('Trip Duration (min) Distribution by Gender')
+            draw_boxes(axs[1], groups, ['#2aaaa4', '#C5B048'], orientation='vertical')
+            axs[1].set_title('Trip Duration (min) Box Plot by Gender')
+            for ax in axs:
+                ax.set_xlabel('member_gender')
+                ax.set_ylabel('duration_min')
+            return fig
+
+        show_figure(self.cache, 'bivariate.duration_by_gender', data,
+                    ['member_gender', 'duration_min'], draw, params={'quantile': 0.99})
 
         st.markdown("**Summary stats:**")
-        st.write(self.df.groupby('member_gender')['duration_min'].agg(['mean','median','std']).round(2))
+        st.write(self.cube.summary('member_gender', 'duration_min').round(2))
 
     def duration_by_user_type(self):
-        self.df['duration_min'] = (self.df['duration_sec'] / 60).round(2)
+        data = self.features.frame(['user_type', 'duration_min'])
         st.subheader("🚻 Trip Duration by User Type")
-        p99 = self.df['duration_min'].quantile(0.99)
-        df_capped = self.df[self.df['duration_min'] <= p99].copy()
-
-        fig, axs = plt.subplots(1, 2, figsize=(17, 6))
-        sns.violinplot(x='user_type', y='duration_min', data=df_capped,
-                       palette=['#2aaaa4', '#C5B048'], inner='quartile', order=['Subscriber','Customer'], ax=axs[0])
-        axs[0].set_title('Trip Duration (min) Distribution by User Type')
-        sns.boxplot(x='user_type', y='duration_min', data=df_capped,
-                    palette=['#2aaaa4', '#C5B048'], order=['Subscriber','Customer'], ax=axs[1])
-        axs[1].set_title('Trip Duration (min) Box Plot by User Type')
-        st.pyplot(fig)
-        plt.close(fig)
+
+        p99 = self.cube.quantile((), 'duration_min', 0.99)
+
+        def draw():
+            groups = _capped_groups(data, 'user_type', 'duration_min', ['Subscriber', 'Customer'], p99)
+
+            fig, axs = subplots(1, 2, figsize=(17, 6))
+            draw_violins(axs[0], groups, ['#2aaaa4', '#C5B048'])
+            axs[0].set_title('Trip Duration (min) Distribution by User Type')
+            draw_boxes(axs[1], groups, ['#2aaaa4', '#C5B048'], orientation='vertical')
+            axs[1].set_title('Trip Duration (min) Box Plot by User Type')
+            for ax in axs:
+                ax.set_xlabel('user_type')
+                ax.set_ylabel('duration_min')
+            return fig
+
+        show_figure(self.cache, 'bivariate.duration_by_user_type', data,
+                    ['user_type', 'duration_min'], draw, params={'quantile': 0.99})
 
         st.markdown("**Summary stats:**")
-        st.write(self.df.groupby('user_type')['duration_min'].agg(['mean','median','std']).round(2))
+        st.write(self.cube.summary('user_type', 'duration_min').round(2))
 
     def age_by_user_type(self):
-        CURRENT_YEAR = 2019
-        self.df['member_age'] = CURRENT_YEAR - self.df['member_birth_year']
+        data = self.features.frame(['user_type', 'member_age'])
         st.subheader("👥 Age Distribution by User Type")
-        fig, axs = plt.subplots(1, 2, figsize=(17, 6))
-        for utype, color in zip(['Subscriber','Customer'], ['#2aaaa4','#C5B048']):
-            subset = self.df[self.df['user_type']==utype]['member_age'].dropna()
-            sns.histplot(subset, kde=True, color=color, label=utype, alpha=0.6, binwidth=2, ax=axs[0])
-        axs[0].legend()
-        axs[0].set_title('Age Distribution by User Type')
-        axs[0].set_xlabel('Age')
-        axs[0].set_ylabel('Count')
-
-        sns.boxplot(x='user_type', y='member_age', data=self.df,
-                    palette=['#2aaaa4','#C5B048'], order=['Subscriber','Customer'], ax=axs[1])
-        axs[1].set_title('Age Box Plot by User Type')
-        axs[1].set_xlabel('User Type')
-        axs[1].set_ylabel('Age')
-
-        st.pyplot(fig)
-        plt.close(fig)
+
+        def draw():
+            fig, axs = subplots(1, 2, figsize=(17, 6))
+            groups = _capped_groups(data, 'user_type', 'member_age', ['Subscriber', 'Customer'])
+            for (utype, subset), color in zip(groups.items(), ['#2aaaa4','#C5B048']):
+                draw_hist_kde(axs[0], subset, color, binwidth=2, label=utype, alpha=0.6)
+            axs[0].legend()
+            axs[0].set_title('Age Distribution by User Type')
+            axs[0].set_xlabel('Age')
+            axs[0].set_ylabel('Count')
+
+            draw_boxes(axs[1], groups, ['#2aaaa4','#C5B048'], orientation='vertical')
+            axs[1].set_title('Age Box Plot by User Type')
+            axs[1].set_xlabel('User Type')
+            axs[1].set_ylabel('Age')
+            return fig
+
+        show_figure(self.cache, 'bivariate.age_by_user_type', data,
+                    ['user_type', 'member_age'], draw, params={'binwidth': 2})
 
         st.markdown("**Summary stats:**")
-        st.write(self.df.groupby('user_type')['member_age'].agg(['mean','median','std']).round(2))
+        st.write(self.cube.summary('user_type', 'member_age').round(2))
 
     def age_by_gender(self):
-        CURRENT_YEAR = 2019
-        self.df['member_age'] = CURRENT_YEAR - self.df['member_birth_year']
+        data = self.features.frame(['member_gender', 'member_age'])
         st.subheader("👥 Age Distribution by Gender")
-        fig, axs = plt.subplots(1, 2, figsize=(17, 6))
-        for gender, color in zip(['Male','Female'], ['#2aaaa4','#C5B048']):
-            subset = self.df[self.df['member_gender']==gender]['member_age'].dropna()
-            sns.histplot(subset, kde=True, color=color, label=gender, alpha=0.6, binwidth=2, ax=axs[0])
-        axs[0].legend()
-        axs[0].set_title('Age Distribution by Gender')
-        axs[0].set_xlabel('Age')
-        axs[0].set_ylabel('Count')
-
-        sns.boxplot(x='member_gender', y='member_age', data=self.df,
-                    palette=['#2aaaa4','#C5B048'], order=['Male','Female'], ax=axs[1])
-        axs[1].set_title('Age Box Plot by Gender')
-        axs[1].set_xlabel('Gender')
-        axs[1].set_ylabel('Age')
-
-        st.pyplot(fig)
-        plt.close(fig)
+
+        def draw():
+            fig, axs = subplots(1, 2, figsize=(17, 6))
+            groups = _capped_groups(data, 'member_gender', 'member_age', ['Male', 'Female'])
+            for (gender, subset), color in zip(groups.items(), ['#2aaaa4','#C5B048']):
+                draw_hist_kde(axs[0], subset, color, binwidth=2, label=gender, alpha=0.6)
+            axs[0].legend()
+            axs[0].set_title('Age Distribution by Gender')
+            axs[0].set_xlabel('Age')
+            axs[0].set_ylabel('Count')
+
+            draw_boxes(axs[1], groups, ['#2aaaa4','#C5B048'], orientation='vertical')
+            axs[1].set_title('Age Box Plot by Gender')
+            axs[1].set_xlabel('Gender')
+            axs[1].set_ylabel('Age')
+            return fig
+
+        show_figure(self.cache, 'bivariate.age_by_gender', data,
+                    ['member_gender', 'member_age'], draw, params={'binwidth': 2})
 
         st.markdown("**Summary stats:**")
-        st.write(self.df.groupby('member_gender')['member_age'].agg(['mean','median','std']).round(2))
+        st.write(self.cube.summary('member_gender', 'member_age').round(2))
+
+
+def _capped_groups(df, by, column, order, upper=None):
+    """
+    Values of ``column`` for each group in ``order`` (NaNs dropped),
+    optionally keeping only values up to ``upper``
+    """
+    values = df[column]
+    keep = values.notna()
+    if upper is not None:
+        keep &= values <= upper
+
+    keys = df[by]
+    return {group: values[keep & (keys == group)].to_numpy() for group in order}
@@ -0,0 +1,396 @@
+import numpy as np
+import pandas as pd
+
+from data_preprocessor.hashing import FrameToken
+
+
+class CorrelationEngine:
+    """
+    Pearson / Spearman correlations from sufficient statistics
+
+    For every pair of columns (i, j) the engine keeps, over the rows where
+    both are present: the count ``n``, the sum of column i, the sum of
+    squares of column i and the cross-product sum. These are additive, so
+
+    - the full correlation matrix is computed once and any column subset
+      is a slice of it,
+    - appended rows (``update``) and other chunks (``merge``) are added to
+      the statistics without revisiting earlier rows,
+    - a transformed column only needs its own row/column of the
+      statistics recomputed (``refresh``).
+
+    Missing values are handled pairwise, like ``DataFrame.corr``. Values
+    are shifted by a per-column reference (the first batch's mean) to keep
+    the sums well conditioned.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame, optional
+        Initial data; numeric columns are used unless ``columns`` is given
+    columns : list of str, optional
+
+    Example
+    -------
+    engine = CorrelationEngine(df)
+    engine.pearson(['duration_sec', 'member_birth_year'])
+
+    # Out of core
+    engine = CorrelationEngine.from_chunks(ChunkedProcessor('trips.csv').chunks())
+    """
+
+    def __init__(self, df=None, columns=None):
+        self._reset()
+        if df is not None:
+            self._load(df, columns)
+
+    def _reset(self):
+        self.columns = []
+        self.shift = np.empty(0)
+        self.n = self.sums = self.squares = self.cross = np.empty((0, 0))
+        self.df = None
+        self._tokens = {}
+        self._pearson = None
+        self._ranks = None
+
+    def _load(self, df, columns=None):
+        if columns is None:
+            columns = df.select_dtypes(include='number').columns.tolist()
+        self.columns = list(columns)
+        self.update(df[self.columns])
+        self._track(df)
+
+    @classmethod
+    def from_chunks(cls, chunks, columns=None):
+        """
+        Build the statistics chunk by chunk (e.g. ``ChunkedProcessor.chunks()``)
+        """
+        engine = cls()
+        for chunk in chunks:
+            if not engine.columns:
+                engine.columns = list(
+                    chunk.select_dtypes(include='number').columns if columns is None else columns
+                )
+            engine.update(chunk[engine.columns])
+        return engine
+
+    def __len__(self):
+        return len(self.columns)
+
+    # -------------------------------------------------
+    # Updating the statistics
+    # -------------------------------------------------
+
+    def update(self, batch):
+        """
+        Add the rows of ``batch`` (a frame with this engine's columns)
+        """
+        values = _values(batch, self.columns)
+        if len(self.shift) != len(self.columns):
+            self.shift = np.nan_to_num(np.nanmean(values, axis=0)) if len(values) else np.zeros(len(self.columns))
+            size = (len(self.columns),) * 2
+            self.n, self.sums, self.squares, self.cross = (np.zeros(size) for _ in range(4))
+
+        stats = _block(values - self.shift, values - self.shift)
+        self.n += stats[0]
+        self.sums += stats[1]
+        self.squares += stats[2]
+        self.cross += stats[3]
+
+        # Rows were added: cached matrices and ranks no longer describe
+        # the data, and the tracked frame (if any) is out of date
+        self._pearson = None
+        self._ranks = None
+        self.df = None
+        self._tokens = {}
+
+    def merge(self, other):
+        """
+        Add the statistics of another engine over the same columns
+        (e.g. one built on another chunk or in another process)
+        """
+        if list(other.columns) != list(self.columns):
+            raise ValueError("Cannot merge engines over different columns")
+        if not len(other.shift):
+            return self
+        if not len(self.shift):
+            self.shift = other.shift.copy()
+            self.n, self.sums, self.squares, self.cross = (
+                np.zeros_like(other.n) for _ in range(4)
+            )
+
+        # Re-express the other engine's sums relative to our shift
+        d = other.shift - self.shift
+        n, s, q, c = other.n, other.sums, other.squares, other.cross
+        self.n = self.n + n
+        self.sums = self.sums + s + d[:, None] * n
+        self.squares = self.squares + q + 2 * d[:, None] * s + (d ** 2)[:, None] * n
+        self.cross = self.cross + c + d[None, :] * s + d[:, None] * s.T + np.outer(d, d) * n
+
+        self._pearson = None
+        self._ranks = None
+        self.df = None
+        self._tokens = {}
+        return self
+
+    def refresh(self, df):
+        """
+        Bring the statistics in line with ``df``
+
+        Only columns whose data changed (or were added) are recomputed,
+        each in O(rows x columns); removed columns are dropped. A change
+        in the number of rows rebuilds everything.
+        """
+        numeric = df.select_dtypes(include='number').columns.tolist()
+        if self.df is None or len(df) != len(self.df):
+            self._reset()
+            self._load(df, numeric)
+            return self
+
+        for column in [c for c in self.columns if c not in numeric]:
+            self._drop_column(column)
+
+        changed = [
+            c for c in numeric
+            if c not in self._tokens or not self._tokens[c].matches(df)
+        ]
+        self.df = df
+        for column in changed:
+            self._set_column(column)
+        self._track(df, changed)
+        return self
+
+    def _track(self, df, columns=None):
+        self.df = df
+        for column in self.columns if columns is None else columns:
+            self._tokens[column] = FrameToken(df, [column])
+
+    def _set_column(self, column):
+        if column not in self.columns:
+            self.columns.append(column)
+            self.shift = np.append(self.shift, 0.0)
+            self.n, self.sums, self.squares, self.cross = (
+                np.pad(m, ((0, 1), (0, 1))) for m in (self.n, self.sums, self.squares, self.cross)
+            )
+        i = self.columns.index(column)
+
+        x = _values(self.df, [column])
+        self.shift[i] = np.nan_to_num(np.nanmean(x)) if len(x) else 0.0
+        values = _values(self.df, self.columns) - self.shift
+        x = x - self.shift[i]
+
+        n, s_row, q_row, c_row = _block(x, values)
+        _, s_col, q_col, _ = _block(values, x)
+        self.n[i, :], self.n[:, i] = n[0], n[0]
+        self.sums[i, :], self.sums[:, i] = s_row[0], s_col[:, 0]
+        self.squares[i, :], self.squares[:, i] = q_row[0], q_col[:, 0]
+        self.cross[i, :], self.cross[:, i] = c_row[0], c_row[0]
+
+        self._pearson = None
+        if self._ranks is not None:
+            self._ranks.pop(column, None)
+
+    def _drop_column(self, column):
+        i = self.columns.index(column)
+        keep = [k for k in range(len(self.columns)) if k != i]
+        self.columns.pop(i)
+        self.shift = self.shift[keep]
+        self.n, self.sums, self.squares, self.cross = (
+            m[np.ix_(keep, keep)] for m in (self.n, self.sums, self.squares, self.cross)
+        )
+        self._tokens.pop(column, None)
+        self._pearson = None
+        if self._ranks is not None:
+            self._ranks.pop(column, None)
+
+    # -------------------------------------------------
+    # Correlations
+    # -------------------------------------------------
+
+    def pearson(self, columns=None):
+        """
+        Pearson correlation matrix (a slice of the cached full matrix)
+        """
+        if self._pearson is None:
+            self._pearson = _pearson_matrix(self.n, self.sums, self.squares, self.cross)
+        return self._slice(self._pearson, columns)
+
+    def spearman(self, columns=None):
+        """
+        Spearman correlation matrix: Pearson correlation of the column
+        ranks. Ranks are cached per column and recomputed only for columns
+        that change. Each column is ranked over its non-missing values, so
+        with missing data the result can differ slightly from pandas,
+        which re-ranks every pair.
+        """
+        if self.df is None:
+            raise ValueError("Spearman correlation needs the in-memory data (not available after update/merge)")
+
+        if self._ranks is None:
+            self._ranks = {}
+        wanted = self.columns if columns is None else list(columns)
+        for column in wanted:
+            if column not in self._ranks:
+                self._ranks[column] = self.df[column].rank().to_numpy(dtype=float, na_value=np.nan)
+
+        ranks = np.column_stack([self._ranks[c] for c in wanted]) - (len(self.df) + 1) / 2
+        matrix = _pearson_matrix(*_block(ranks, ranks))
+        return pd.DataFrame(matrix, index=wanted, columns=wanted)
+
+    def corr(self, columns=None, method='pearson'):
+        if method == 'pearson':
+            return self.pearson(columns)
+        if method == 'spearman':
+            return self.spearman(columns)
+        raise ValueError("Invalid method. Use 'pearson' or 'spearman'")
+
+    def regression(self, x, y):
+        """
+        Sufficient statistics of the least-squares fit of ``y`` on ``x``,
+        read from the stored sums (rows where both are present)
+
+        Returns
+        -------
+        dict with 'n', 'mean_x', 'mean_y' and the centred sums 'sxx',
+        'syy', 'sxy' (the input of ``summaries.regression_fit``)
+        """
+        missing = [c for c in (x, y) if c not in self.columns]
+        if missing:
+            raise ValueError(f"Column(s) not tracked by the correlation engine: {missing}")
+        i, j = self.columns.index(x), self.columns.index(y)
+
+        n = self.n[i, j]
+        if not n:
+            return {'n': 0, 'mean_x': np.nan, 'mean_y': np.nan, 'sxx': 0.0, 'syy': 0.0, 'sxy': 0.0}
+        sum_x, sum_y = self.sums[i, j], self.sums[j, i]
+        return {
+            'n': int(n),
+            'mean_x': sum_x / n + self.shift[i],
+            'mean_y': sum_y / n + self.shift[j],
+            'sxx': self.squares[i, j] - sum_x ** 2 / n,
+            'syy': self.squares[j, i] - sum_y ** 2 / n,
+            'sxy': self.cross[i, j] - sum_x * sum_y / n,
+        }
+
+    def _slice(self, matrix, columns):
+        frame = pd.DataFrame(matrix, index=self.columns, columns=self.columns)
+        if columns is None:
+            return frame
+        missing = [c for c in columns if c not in self.columns]
+        if missing:
+            raise ValueError(f"Column(s) not tracked by the correlation engine: {missing}")
+        return frame.loc[list(columns), list(columns)]
+
+
+def top_pairs(corr, k=5, absolute=True):
+    """
+    The ``k`` strongest pairs of a correlation matrix, read straight from
+    its upper triangle with a partial sort (no n x n long frame)
+
+    Parameters
+    ----------
+    corr : pandas.DataFrame
+        Square correlation matrix
+    k : int
+    absolute : bool
+        Rank by |r| (default) or by signed r
+
+    Returns
+    -------
+    pandas.DataFrame with 'Variable 1', 'Variable 2', 'Correlation'
+    """
+    columns = list(corr.columns)
+    rows, cols = np.triu_indices(len(columns), k=1)
+    upper = np.asarray(corr, dtype=float)[rows, cols]
+    score = np.abs(upper) if absolute else upper.copy()
+    score[np.isnan(score)] = -np.inf
+
+    k = min(k, len(score))
+    top = np.argpartition(-score, k - 1)[:k] if k else np.empty(0, dtype=int)
+    top = top[np.argsort(-score[top], kind='stable')]
+    top = top[np.isfinite(score[top])]
+
+    return pd.DataFrame({
+        'Variable 1': [columns[i] for i in rows[top]],
+        'Variable 2': [columns[j] for j in cols[top]],
+        'Correlation': upper[top],
+    })
+
+
+def strongest_block(corr, size=30, threshold=None):
+    """
+    Sub-matrix of at most ``size`` columns holding the strongest
+    correlations, for heatmaps of wide frames
+
+    Columns are ranked by their strongest |r| with any other column; the
+    top ``size`` are kept and ordered so that strongly correlated columns
+    sit next to each other. With a ``threshold``, columns without any
+    |r| >= threshold are dropped and weaker cells are blanked (NaN).
+    """
+    strength = np.abs(np.asarray(corr, dtype=float))
+    np.fill_diagonal(strength, 0)
+    strength = np.nan_to_num(strength)
+    best = strength.max(axis=1) if len(strength) else np.empty(0)
+
+    candidates = np.arange(len(best))
+    if threshold is not None:
+        candidates = candidates[best >= threshold]
+    picked = candidates[np.argsort(-best[candidates], kind='stable')[:size]]
+    picked = picked[_chain_order(strength[np.ix_(picked, picked)])]
+
+    block = corr.iloc[picked, picked]
+    if threshold is not None:
+        keep = (block.abs() >= threshold).to_numpy() | np.eye(len(block), dtype=bool)
+        block = block.where(keep)
+    return block
+
+
+def _chain_order(similarity):
+    """
+    Greedy seriation: start from the most connected column and keep
+    appending the unvisited column most similar to the last one
+    """
+    n = len(similarity)
+    if n < 3:
+        return np.arange(n)
+
+    remaining = np.ones(n, dtype=bool)
+    current = int(np.argmax(similarity.sum(axis=1)))
+    order = [current]
+    remaining[current] = False
+    for _ in range(n - 1):
+        current = int(np.argmax(np.where(remaining, similarity[current], -1.0)))
+        order.append(current)
+        remaining[current] = False
+    return np.array(order)
+
+
+def _values(df, columns):
+    """Columns as one float matrix, missing values as NaN"""
+    if not len(columns):
+        return np.empty((len(df), 0))
+    return np.column_stack([
+        df[c].to_numpy(dtype=float, na_value=np.nan) for c in columns
+    ])
+
+
+def _block(a, b):
+    """
+    Pairwise-complete statistics between the columns of ``a`` and ``b``:
+    (count, sum of a, sum of squares of a, cross products), each of shape
+    (a columns, b columns)
+    """
+    present_a, present_b = ~np.isnan(a), ~np.isnan(b)
+    a0, b0 = np.where(present_a, a, 0.0), np.where(present_b, b, 0.0)
+    mask_b = present_b.astype(float)
+    n = present_a.T.astype(float) @ mask_b
+    return n, a0.T @ mask_b, (a0 ** 2).T @ mask_b, a0.T @ b0
+
+
+def _pearson_matrix(n, sums, squares, cross):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        numerator = n * cross - sums * sums.T
+        var_row = n * squares - sums ** 2
+        denominator = np.sqrt(var_row * var_row.T)
+        matrix = numerator / denominator
+    matrix[(n < 2) | ~(denominator > 0)] = np.nan
+    return np.clip(matrix, -1, 1)
@@ -0,0 +1,167 @@
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import streamlit as st
+
+from data_preprocessor.hashing import column_key
+
+# Column fingerprints remembered (per column array), least recently used
+# first out
+MAX_FINGERPRINTS = 512
+
+# Figures are built as standalone ``Figure`` objects (no pyplot state) and
+# drawn one at a time: Streamlit runs every session (and background jobs
+# run) in their own threads, and matplotlib's shared caches are not
+# thread-safe
+DRAW_LOCK = threading.Lock()
+
+
+def subplots(nrows=1, ncols=1, **kwargs):
+    """
+    ``plt.subplots`` without pyplot: a new ``Figure`` and its axes.
+    ``figsize`` / ``dpi`` go to the figure, the rest to ``Figure.subplots``.
+    """
+    # Imported here so creating the cache at app start does not load matplotlib
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=kwargs.pop('figsize', None), dpi=kwargs.pop('dpi', None))
+    return fig, fig.subplots(nrows, ncols, **kwargs)
+
+
+class FigureCache:
+    """
+    Size-bounded cache of rendered figures (PNG or SVG bytes).
+
+    A figure is keyed on the plot name, its parameters and a fingerprint
+    of every column it reads, so unchanged plots are served from the cache
+    and only plots whose input columns changed are drawn again. The least
+    recently used figures are evicted past ``max_bytes``.
+
+    Safe to share between Streamlit sessions (e.g. via
+    ``st.cache_resource``): keys depend on the data, not on the session.
+    """
+
+    def __init__(self, max_bytes=64 * 1024**2, fmt='png', dpi=100):
+        if fmt not in ('png', 'svg'):
+            raise ValueError("fmt must be 'png' or 'svg'")
+        self.max_bytes = max_bytes
+        self.fmt = fmt
+        self.dpi = dpi
+        self.hits = 0
+        self.misses = 0
+        self._figures = OrderedDict()
+        self._size = 0
+        self._fingerprints = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._figures)
+
+    @property
+    def size_bytes(self):
+        return self._size
+
+    def column_fingerprint(self, df, column):
+        """
+        Content hash of one column. Re-hashed only when the column's
+        backing array changes.
+
+        Fingerprints are remembered per backing array and column name, so
+        they are found again from any frame the column is selected into
+        (e.g. each new ``DerivedFeatures.frame``), and sessions sharing the
+        cache with different data under the same column names do not evict
+        each other's. Entries whose array has been freed are dropped;
+        pyarrow-backed arrays cannot be watched that way and leave by age.
+        """
+        series = df[column]
+        array_key, ref = column_key(series)
+        key = (column, array_key)
+        with self._lock:
+            cached = self._fingerprints.get(key)
+            if cached is not None and cached[0]() is not None:
+                self._fingerprints.move_to_end(key)
+                return cached[1]
+
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{column}|{series.dtype}|{len(series)}".encode('utf-8'))
+        digest.update(pd.util.hash_pandas_object(series, index=False).to_numpy().tobytes())
+        fingerprint = digest.hexdigest()
+
+        with self._lock:
+            for stale in [k for k, (r, _) in self._fingerprints.items() if r() is None]:
+                del self._fingerprints[stale]
+            self._fingerprints[key] = (ref, fingerprint)
+            self._fingerprints.move_to_end(key)
+            while len(self._fingerprints) > MAX_FINGERPRINTS:
+                self._fingerprints.popitem(last=False)
+        return fingerprint
+
+    def key(self, name, df, columns, params=None):
+        parts = [name, repr(sorted((params or {}).items()))]
+        parts += [self.column_fingerprint(df, c) for c in columns]
+        return hashlib.blake2b('|'.join(parts).encode('utf-8'), digest_size=16).hexdigest()
+
+    def render(self, name, df, columns, draw, params=None):
+        """
+        Return the rendered bytes of a figure, drawing it only on a miss
+
+        Parameters
+        ----------
+        name : str
+            Unique plot name, e.g. 'univariate.age_distribution'
+        df : pandas.DataFrame
+        columns : list of str
+            Every column ``draw`` reads
+        draw : callable
+            Returns a matplotlib figure (see ``subplots``); called only on
+            a cache miss, under ``DRAW_LOCK``
+        params : dict, optional
+            Anything else that changes the figure (bins, order, ...)
+        """
+        key = self.key(name, df, columns, params)
+        with self._lock:
+            data = self._figures.get(key)
+            if data is not None:
+                self._figures.move_to_end(key)
+                self.hits += 1
+                return data
+
+        buffer = io.BytesIO()
+        with DRAW_LOCK:
+            fig = draw()
+            fig.savefig(buffer, format=self.fmt, dpi=self.dpi, bbox_inches='tight')
+        data = buffer.getvalue()
+
+        with self._lock:
+            self.misses += 1
+            self._figures[key] = data
+            self._size += len(data)
+            while self._size > self.max_bytes and len(self._figures) > 1:
+                _, evicted = self._figures.popitem(last=False)
+                self._size -= len(evicted)
+        return data
+
+    def clear(self):
+        with self._lock:
+            self._figures.clear()
+            self._fingerprints.clear()
+            self._size = 0
+
+
+def show_figure(cache, name, df, columns, draw, params=None):
+    """
+    Display a figure in Streamlit, through ``cache`` when one is given
+    """
+    if cache is None:
+        with DRAW_LOCK:
+            st.pyplot(draw())
+        return
+
+    data = cache.render(name, df, columns, draw, params)
+    if cache.fmt == 'svg':
+        st.image(data.decode('utf-8'))
+    else:
+        st.image(data)
@@ -1,83 +1,142 @@
 import streamlit as st
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
 import seaborn as sns
 
+from data_preprocessor.jobs import run_steps
+from data_visualization.correlation import CorrelationEngine, strongest_block, top_pairs
+from data_visualization.figure_cache import show_figure, subplots
+from data_visualization.summaries import draw_density_scatter, draw_regression
+
+# Above this many columns the full heatmap switches to its wide mode
+WIDE_COLUMNS = 25
+# Cells are annotated with their value only up to this many columns
+ANNOTATE_COLUMNS = 15
+# Above this many rows the regression scatter is drawn as a density
+# image with a closed-form confidence band
+SCATTER_ROWS = 50_000
+
 
 class MultivariateHandler:
     """
     A class to handle multivariate analysis and visualizations.
     """
 
-    def __init__(self, df: pd.DataFrame):
+    def __init__(self, df: pd.DataFrame, cache=None, engine=None, profile=None):
         """
         Initializes the handler with a pandas DataFrame.
 
         Args:
             df (pd.DataFrame): The data to analyze.
+            cache (FigureCache, optional): Cache for rendered figures.
+            engine (CorrelationEngine, optional): Shared correlation
+                statistics; kept in sync with ``df`` before use.
+            profile (ColumnProfile, optional): Shared per-column statistics,
+                used for the list of numeric columns.
         """
         self.df = df
+        self.cache = cache
+        self._engine = engine
+        self.profile = profile
+
+    @property
+    def engine(self):
+        """Correlation statistics for ``df``, updated only where it changed"""
+        if self._engine is None:
+            self._engine = CorrelationEngine(self.df)
+        else:
+            self._engine.refresh(self.df)
+        return self._engine
+
+    def _numeric_columns(self):
+        if self.profile is not None:
+            return self.profile.numeric_columns()
+        return self.df.select_dtypes(include=["number"]).columns.tolist()
+
+    def prepare(self, progress=None):
+        """
+        Bring the correlation statistics up to date (the sums every plot
+        slices) without drawing or calling Streamlit, e.g. as a background
+        job. Returns the handler.
+        """
+        run_steps([('correlation statistics', lambda: self.engine.pearson())], progress)
+        return self
 
     # Question 1: Correlation between ALL variables
-    def plot_correlation_heatmap(self):
+    def plot_correlation_heatmap(self, max_columns=WIDE_COLUMNS):
+        """
+        Heatmap of all numeric columns. Above ``max_columns`` columns it
+        switches to a wide-matrix mode that shows only the most strongly
+        correlated block, so the figure stays readable and cheap to draw.
+        """
         st.subheader("🔢 Correlation Heatmap (All Numerical Variables)")
-        numeric_df = self.df.select_dtypes(include=["number"])
+        numeric_columns = self._numeric_columns()
 
         # If number of columns is less than 2 => Raise a Warning
-        if numeric_df.shape[1] < 2:
+        if len(numeric_columns) < 2:
             st.warning("Not enough numerical columns to compute correlation.")
             return
 
-        corr_matrix = numeric_df.corr()
-
-        fig, ax = plt.subplots(figsize=(12, 10))
-        sns.heatmap(
-            corr_matrix,
-            annot=True,
-            fmt=".2f",
-            cmap="coolwarm",
-            square=True,
-            linewidths=0.5,
-            ax=ax,
-            cbar_kws={"shrink": 0.8},
-        )
-        ax.set_title("Correlation Matrix of All Numeric Features")
-        st.pyplot(fig)
-        plt.close(fig)
+        corr_matrix = self.engine.pearson(numeric_columns)
+
+        # Wide frames (e.g. after one-hot encoding): strongest block only
+        params = {}
+        shown = corr_matrix
+        if corr_matrix.shape[1] > max_columns:
+            size = st.slider("Columns to show", 2, min(corr_matrix.shape[1], 60), max_columns)
+            threshold = st.slider("Hide correlations weaker than |r|", 0.0, 1.0, 0.0, 0.05)
+            shown = strongest_block(corr_matrix, size=size, threshold=threshold or None)
+            params = {"size": size, "threshold": threshold}
+            st.caption(
+                f"Showing the {shown.shape[1]} most strongly correlated of "
+                f"{corr_matrix.shape[1]} numeric columns."
+            )
+
+        def draw():
+            fig, ax = subplots(figsize=(12, 10))
+            sns.heatmap(
+                shown,
+                annot=shown.shape[1] <= ANNOTATE_COLUMNS,
+                fmt=".2f",
+                cmap="coolwarm",
+                square=True,
+                linewidths=0.5 if shown.shape[1] <= ANNOTATE_COLUMNS else 0,
+                ax=ax,
+                cbar_kws={"shrink": 0.8},
+            )
+            ax.set_title("Correlation Matrix of All Numeric Features")
+            return fig
+
+        show_figure(self.cache, "multivariate.correlation_heatmap", self.df,
+                    numeric_columns, draw, params=params)
 
         # Show strongest correlations
         st.markdown("**Top 5 Strongest Correlations:**")
-        # Get upper triangle of correlation matrix (excluding diagonal)
-        upper_tri = corr_matrix.where(
-            np.triu(np.ones(corr_matrix.shape), k=1).astype(bool)
-        )
-        # Stack and sort
-        stacked = upper_tri.stack().reset_index()
-        stacked.columns = ["Variable 1", "Variable 2", "Correlation"]
-        stacked["Abs Correlation"] = stacked["Correlation"].abs()
-        top_corr = stacked.nlargest(5, "Abs Correlation")[
-            ["Variable 1", "Variable 2", "Correlation"]
-        ]
-        st.dataframe(top_corr)
+        st.dataframe(top_pairs(corr_matrix, k=5))
 
     # Question 2: Correlation between SPECIFIC numeric variables
-    def plot_specific_correlation(self):
+    def plot_specific_correlation(self, max_scatter_rows=SCATTER_ROWS):
+        """
+        Heatmap of the selected columns; for two columns also a scatter
+        plot with a regression line. Above ``max_scatter_rows`` rows the
+        scatter becomes a 2D-histogram density image and the line and its
+        95% band are computed from the correlation engine's sums instead
+        of ``sns.regplot``'s bootstrap, so the plot costs the same at any
+        row count.
+        """
         st.subheader("🔢 Correlation Between Selected Variables")
-        numeric_df = self.df.select_dtypes(include=["number"])
+        numeric_columns = self._numeric_columns()
 
         # If number of columns is less than 2 => Raise a Warning
-        if numeric_df.shape[1] < 2:
+        if len(numeric_columns) < 2:
             st.warning("Not enough numerical columns to compute correlation.")
             return
 
         # Select specific variables
         cols_to_analyze = st.multiselect(
             "Select 2 or more variables to analyze:",
-            options=numeric_df.columns.tolist(),
-            default=(
-                numeric_df.columns[:2].tolist() if len(numeric_df.columns) >= 2 else []
-            ),
+            options=numeric_columns,
+            default=numeric_columns[:2],
         )
 
         # If number of columns is less than 2 => Raise a Warning
@@ -86,44 +145,71 @@ class MultivariateHandler:
             return
 
         # Correlation for selected columns
-        selected_df = numeric_df[cols_to_analyze]
-        corr_matrix = selected_df.corr()
+        selected_df = self.df[cols_to_analyze]
+        corr_matrix = self.engine.pearson(cols_to_analyze)
 
         # Display correlation matrix
-        fig, ax = plt.subplots(figsize=(8, 6))
-        sns.heatmap(
-            corr_matrix,
-            annot=True,
-            fmt=".3f",
-            cmap="RdBu_r",
-            square=True,
-            linewidths=0.5,
-            ax=ax,
-            vmin=-1,
-            vmax=1,
-            cbar_kws={"shrink": 0.8, "label": "Correlation Coefficient"},
-        )
-        ax.set_title(
-            f"Correlation Matrix: {', '.join(cols_to_analyze[:3])}"
-            + ("..." if len(cols_to_analyze) > 3 else "")
-        )
-        st.pyplot(fig)
-        plt.close(fig)
+        def draw():
+            fig, ax = subplots(figsize=(8, 6))
+            sns.heatmap(
+                corr_matrix,
+                annot=True,
+                fmt=".3f",
+                cmap="RdBu_r",
+                square=True,
+                linewidths=0.5,
+                ax=ax,
+                vmin=-1,
+                vmax=1,
+                cbar_kws={"shrink": 0.8, "label": "Correlation Coefficient"},
+            )
+            ax.set_title(
+                f"Correlation Matrix: {', '.join(cols_to_analyze[:3])}"
+                + ("..." if len(cols_to_analyze) > 3 else "")
+            )
+            return fig
+
+        show_figure(self.cache, "multivariate.specific_correlation", self.df,
+                    cols_to_analyze, draw, params={"columns": tuple(cols_to_analyze)})
 
         # Show scatter plot for the two main variables
         if len(cols_to_analyze) == 2:
             st.subheader("Scatter Plot with Regression Line")
-            fig2, ax2 = plt.subplots(figsize=(8, 6))
-            sns.regplot(
-                data=selected_df,
-                x=cols_to_analyze[0],
-                y=cols_to_analyze[1],
-                scatter_kws={"alpha": 0.5},
-                line_kws={"color": "red"},
-            )
-            ax2.set_title(f"{cols_to_analyze[0]} vs {cols_to_analyze[1]}")
-            st.pyplot(fig2)
-            plt.close(fig2)
+            x, y = cols_to_analyze
+            dense = len(selected_df) > max_scatter_rows
+
+            def draw_density():
+                fig2, ax2 = subplots(figsize=(8, 6))
+                image = draw_density_scatter(ax2, selected_df[x], selected_df[y])
+                fig2.colorbar(image, ax=ax2, label="Rows")
+                lo, hi = image.get_extent()[:2]
+                draw_regression(ax2, self.engine.regression(x, y), lo, hi)
+                ax2.set_xlabel(x)
+                ax2.set_ylabel(y)
+                ax2.set_title(f"{x} vs {y}")
+                return fig2
+
+            def draw_scatter():
+                fig2, ax2 = subplots(figsize=(8, 6))
+                sns.regplot(
+                    data=selected_df,
+                    x=cols_to_analyze[0],
+                    y=cols_to_analyze[1],
+                    scatter_kws={"alpha": 0.5},
+                    line_kws={"color": "red"},
+                    ax=ax2,
+                )
+                ax2.set_title(f"{cols_to_analyze[0]} vs {cols_to_analyze[1]}")
+                return fig2
+
+            if dense:
+                st.caption(
+                    f"{len(selected_df):,} rows: point density shown on a log scale; "
+                    "regression line and 95% confidence band computed in closed form."
+                )
+            show_figure(self.cache, "multivariate.regplot", self.df, cols_to_analyze,
+                        draw_density if dense else draw_scatter,
+                        params={"columns": tuple(cols_to_analyze), "dense": dense})
 
     # Question 3: Correlation between data_stat variables
     def plot_data_stat_correlation(self):
@@ -131,7 +217,7 @@ class MultivariateHandler:
         Assumes 'data_stat' variables are those with 'stat' in the name or a predefined list
         """
         st.subheader("🔢 Correlation Between Data Statistics Variables")
-        numeric_df = self.df.select_dtypes(include=["number"])
+        numeric_columns = self._numeric_columns()
 
         # Define what "data_stat" variables mean - adjust based on your dataset
         stat_keywords = [
@@ -148,7 +234,7 @@ class MultivariateHandler:
 
         # Find columns that might be statistics-related
         stat_columns = []
-        for col in numeric_df.columns:
+        for col in numeric_columns:
             col_lower = col.lower()
             if any(keyword in col_lower for keyword in stat_keywords):
                 stat_columns.append(col)
@@ -160,7 +246,7 @@ class MultivariateHandler:
             )
             stat_columns = st.multiselect(
                 "Select the statistics-related variables:",
-                options=numeric_df.columns.tolist(),
+                options=numeric_columns,
                 default=[],
             )
 
@@ -170,29 +256,31 @@ class MultivariateHandler:
             return
 
         # Compute correlation for statistics variables
-        stat_df = numeric_df[stat_columns]
-        corr_matrix = stat_df.corr()
-
-        fig, ax = plt.subplots(figsize=(10, 8))
-
-        mask = np.triu(np.ones_like(corr_matrix, dtype=bool))
-
-        sns.heatmap(
-            corr_matrix,
-            mask=mask,
-            annot=True,
-            fmt=".3f",
-            cmap="viridis",
-            square=True,
-            linewidths=0.5,
-            ax=ax,
-            vmin=-1,
-            vmax=1,
-            cbar_kws={"shrink": 0.8, "label": "Correlation Coefficient"},
-        )
-        ax.set_title("Correlation Between Data Statistics Variables")
-        st.pyplot(fig)
-        plt.close(fig)
+        corr_matrix = self.engine.pearson(stat_columns)
+
+        def draw():
+            fig, ax = subplots(figsize=(10, 8))
+
+            mask = np.triu(np.ones_like(corr_matrix, dtype=bool))
+
+            sns.heatmap(
+                corr_matrix,
+                mask=mask,
+                annot=True,
+                fmt=".3f",
+                cmap="viridis",
+                square=True,
+                linewidths=0.5,
+                ax=ax,
+                vmin=-1,
+                vmax=1,
+                cbar_kws={"shrink": 0.8, "label": "Correlation Coefficient"},
+            )
+            ax.set_title("Correlation Between Data Statistics Variables")
+            return fig
+
+        show_figure(self.cache, "multivariate.data_stat_correlation", self.df,
+                    stat_columns, draw, params={"columns": tuple(stat_columns)})
 
         st.markdown("**Summary of Statistics Variable Correlations:**")
         # Get the correlation values (excluding diagonal)
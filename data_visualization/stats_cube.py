@@ -0,0 +1,286 @@
+import numpy as np
+import pandas as pd
+
+from data_preprocessor.features import DerivedFeatures
+from data_preprocessor.hashing import FrameToken
+from data_preprocessor.sketches import QuantileSketch
+
+DIMENSIONS = ('user_type', 'member_gender', 'bike_share_for_all_trip')
+QUANTILES = (0.25, 0.5, 0.75, 0.99)
+MOMENTS = ('count', 'sum', 'sumsq', 'min', 'max')
+# Accuracy of the per-cell quantile sketches: rank error about 0.3% of
+# the rows, about 1,000 values kept per cell and measure
+SKETCH_K = 1000
+# Fixed seed of the sketches' compaction offsets, so the same data always
+# gives the same medians, p99 caps and figures
+SKETCH_SEED = 0
+
+
+class StatsCube:
+    """
+    Grouped statistics of every numeric measure over all combinations of
+    the dimension columns, computed in one grouped pass
+
+    Each cell (one user_type x member_gender x bike_share_for_all_trip
+    combination) stores count, sum, sum of squares, min and max, plus a
+    ``QuantileSketch`` per measure. Both merge, so any coarser grouping
+    (e.g. by user_type only, or the whole dataset) is combined from the
+    cells and new monthly batches are added with ``append`` without
+    revisiting earlier rows; the rows themselves are not kept. Moments
+    are exact; quantiles (medians, the p99 used to cap plots) are within
+    the sketch's rank error (about 0.3% of the rows for the default
+    ``k``, exact for cells of up to ``k`` rows).
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+    dimensions : sequence of str, optional
+        Defaults to ``DIMENSIONS`` (those present in ``df``)
+    measures : sequence of str, optional
+        Numeric columns to summarize; defaults to every numeric column
+        plus the derived features that can be computed
+    quantiles : sequence of float
+    features : DerivedFeatures, optional
+        Source of derived measures such as 'duration_min'
+    k : int
+        Accuracy of the quantile sketches
+    seed : int, optional
+        Seed of the sketches (``SKETCH_SEED`` by default, so rebuilding
+        on the same data gives the same quantiles); None for a random one
+    profile : ColumnProfile, optional
+        Shared per-column statistics; supplies the numeric columns
+        instead of scanning the dtypes again
+    """
+
+    def __init__(self, df, dimensions=None, measures=None, quantiles=QUANTILES, features=None,
+                 k=SKETCH_K, seed=SKETCH_SEED, profile=None):
+        self.features = features if features is not None else DerivedFeatures(df)
+        if dimensions is None:
+            dimensions = [d for d in DIMENSIONS if d in df.columns]
+        self.dimensions = list(dimensions)
+        if not self.dimensions:
+            raise ValueError("None of the dimension columns are in the dataframe")
+
+        if measures is None:
+            if profile is not None:
+                numeric = profile.numeric_columns()
+            else:
+                numeric = df.select_dtypes(include='number').columns
+            measures = [c for c in numeric if c not in self.dimensions]
+            measures += [f for f in self.features.available() if f not in measures]
+        self.measures = list(measures)
+        self.quantiles = tuple(quantiles)
+        self.k = k
+        self.seed = seed
+
+        data = self.features.frame(self.dimensions + self.measures)
+        self.cells = _cell_moments(data, self.dimensions, self.measures)
+        self.sketches = _cell_sketches(data, self.dimensions, self.measures, self.cells.index, k, seed)
+        self._quantiles = {}
+        self._token = FrameToken(df, self._sources(df))
+
+    def _sources(self, df):
+        columns = set(self.dimensions)
+        for measure in self.measures:
+            if measure in df.columns:
+                columns.add(measure)
+            else:
+                columns.update(self.features.features[measure][0])
+        return sorted(columns)
+
+    def is_current(self, df):
+        """
+        True while none of the columns the cube was built from changed
+        """
+        return self._token.matches(df)
+
+    def append(self, batch, df=None):
+        """
+        Merge a new batch of rows into the cube
+
+        The batch's cell moments and sketches are merged into the existing
+        cells in place of a rebuild; cached quantile tables are dropped and
+        read again from the merged sketches on next use.
+
+        Parameters
+        ----------
+        batch : pandas.DataFrame
+            New rows with the same columns as the original data
+        df : pandas.DataFrame, optional
+            The combined dataset, so ``is_current`` keeps tracking it
+        """
+        features = DerivedFeatures(batch, self.features.features)
+        batch = features.frame(self.dimensions + self.measures)
+
+        new = _cell_moments(batch, self.dimensions, self.measures)
+        sketches = _cell_sketches(batch, self.dimensions, self.measures, new.index, self.k, self.seed)
+        self.cells = _merge_moments(pd.concat([self.cells, new]), self.dimensions, self.measures)
+        self.sketches = _merge_sketches(pd.concat([self.sketches, sketches]), self.dimensions, self.seed)
+        self._quantiles.clear()
+
+        if df is not None:
+            self.features.bind(df)
+            self._token = FrameToken(df, self._sources(df))
+
+    def rollup(self, by=()):
+        """
+        Moments per ``by`` group (all cells merged when ``by`` is empty)
+        """
+        by = _as_list(by)
+        self._check_dimensions(by)
+        return _merge_moments(self.cells, by, self.measures)
+
+    def quantile(self, by, measure, q):
+        """
+        Quantile ``q`` of ``measure`` per ``by`` group (a scalar when
+        ``by`` is empty)
+        """
+        table = self._quantile_table(_as_list(by), q)
+        values = table[measure][q]
+        return values.iloc[0] if not _as_list(by) else values
+
+    def _quantile_table(self, by, q=None):
+        self._check_dimensions(by)
+        levels = tuple(self.quantiles)
+        if q is not None and q not in levels:
+            levels += (q,)
+
+        key = tuple(by)
+        table = self._quantiles.get(key)
+        if table is None or not set(levels) <= set(table.columns.get_level_values(1)):
+            sketches = _merge_sketches(self.sketches, by, self.seed)
+            table = pd.DataFrame(
+                {(m, q): [s.quantile(q) for s in sketches[m]] for m in self.measures for q in levels},
+                index=sketches.index,
+            )
+            self._quantiles[key] = table
+        return table
+
+    def summary(self, by, measure, stats=('mean', 'median', 'std')):
+        """
+        Per-group table for one measure, e.g. the mean / median / std of
+        'duration_min' per 'user_type'. Groups with a missing key are left
+        out, like ``groupby``.
+
+        stats options: 'count', 'sum', 'min', 'max', 'mean', 'std', 'var',
+        'median' and quantile levels as floats
+        """
+        by = _as_list(by)
+        if measure not in self.measures:
+            raise ValueError(f"'{measure}' is not a measure of this cube")
+
+        moments = self.rollup(by)[measure]
+        count, total, sumsq = moments['count'], moments['sum'], moments['sumsq']
+        mean = total / count
+        var = (sumsq - total * mean) / (count - 1)
+
+        columns = {}
+        for stat in stats:
+            if stat in ('count', 'sum', 'min', 'max'):
+                columns[stat] = moments[stat]
+            elif stat == 'mean':
+                columns[stat] = mean
+            elif stat == 'var':
+                columns[stat] = var.clip(lower=0)
+            elif stat == 'std':
+                columns[stat] = np.sqrt(var.clip(lower=0))
+            else:
+                q = 0.5 if stat == 'median' else stat
+                columns[stat] = self._quantile_table(by, q)[measure][q].reindex(moments.index)
+        table = pd.DataFrame(columns)
+
+        if by:
+            keys = table.index.to_frame(index=False)
+            table = table[keys.notna().all(axis=1).to_numpy()]
+        return table
+
+    def _check_dimensions(self, by):
+        unknown = [d for d in by if d not in self.dimensions]
+        if unknown:
+            raise ValueError(f"Not a dimension of this cube: {unknown}")
+
+
+def _as_list(by):
+    if by is None:
+        return []
+    if isinstance(by, str):
+        return [by]
+    return list(by)
+
+
+def _cell_moments(data, dimensions, measures):
+    """
+    count / sum / sumsq / min / max of every measure per cell, in one
+    grouped aggregation
+    """
+    values = data[measures].astype(float)
+    squares = (values ** 2).add_suffix('__sq')
+    frame = pd.concat([data[dimensions], values, squares], axis=1)
+
+    grouped = frame.groupby(dimensions, observed=True, dropna=False)
+    spec = {}
+    for m in measures:
+        spec[(m, 'count')] = (m, 'count')
+        spec[(m, 'sum')] = (m, 'sum')
+        spec[(m, 'sumsq')] = (f'{m}__sq', 'sum')
+        spec[(m, 'min')] = (m, 'min')
+        spec[(m, 'max')] = (m, 'max')
+    cells = grouped.agg(**{f'_{i}': v for i, v in enumerate(spec.values())})
+    cells.columns = pd.MultiIndex.from_tuples(list(spec))
+    return cells
+
+
+def _cell_sketches(data, dimensions, measures, index, k, seed):
+    """
+    One ``QuantileSketch`` per cell and measure, in the row order of the
+    cell moments (``index``), which come from the same grouping
+    """
+    grouped = data.groupby(dimensions, observed=True, dropna=False)
+    rows = []
+    for _, group in grouped:
+        rows.append([
+            QuantileSketch(k, seed).update(group[m].to_numpy(dtype=float, na_value=np.nan))
+            for m in measures
+        ])
+    return pd.DataFrame(rows, index=index, columns=measures, dtype=object)
+
+
+def _merge_sketches(sketches, by, seed):
+    """
+    Merge the sketches of the cells that share the same ``by`` keys (all
+    of them when ``by`` is empty), like ``_merge_moments``
+    """
+    if by:
+        keys = [sketches.index.get_level_values(d) for d in by]
+    else:
+        keys = np.zeros(len(sketches), dtype=int)
+    grouped = pd.Series(np.arange(len(sketches))).groupby(keys, observed=True, dropna=False)
+
+    rows = []
+    for _, positions in grouped:
+        row = []
+        for m in sketches.columns:
+            first = sketches[m].iloc[positions.iloc[0]]
+            merged = QuantileSketch(first.k, seed)
+            for position in positions:
+                merged.merge(sketches[m].iloc[position])
+            row.append(merged)
+        rows.append(row)
+    return pd.DataFrame(rows, index=grouped.size().index, columns=sketches.columns, dtype=object)
+
+
+def _merge_moments(cells, by, measures):
+    """
+    Combine the cells that share the same ``by`` keys (all of them when
+    ``by`` is empty)
+    """
+    how = {}
+    for m in measures:
+        for stat in MOMENTS:
+            how[(m, stat)] = stat if stat in ('min', 'max') else 'sum'
+
+    if by:
+        keys = [cells.index.get_level_values(d) for d in by]
+    else:
+        keys = np.zeros(len(cells), dtype=int)
+    return cells.groupby(keys, observed=True, dropna=False).agg(how)
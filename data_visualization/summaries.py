@@ -0,0 +1,443 @@
+"""
+Compact plotting summaries for large columns.
+
+Histograms, kernel density estimates and box/violin statistics are
+computed with vectorized NumPy and drawn straight from these summaries,
+so drawing cost depends on the number of bins / grid points instead of
+the number of rows handed to seaborn.
+"""
+import inspect
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+from matplotlib.axes import Axes
+from matplotlib.colors import LogNorm
+
+# Beyond this many outliers a box plot shows only the distinct values,
+# thinned out evenly
+MAX_FLIERS = 2000
+
+
+# Matplotlib 3.10 replaced the boolean ``vert`` with ``orientation``
+if 'orientation' in inspect.signature(Axes.bxp).parameters:
+    def _orientation(orientation):
+        return {'orientation': orientation}
+else:
+    def _orientation(orientation):
+        return {'vert': orientation == 'vertical'}
+
+
+def _clean(values):
+    """Finite float values of a Series / array, as a NumPy array"""
+    if isinstance(values, pd.Series):
+        values = values.to_numpy(dtype=float, na_value=np.nan)
+    values = np.asarray(values, dtype=float)
+    return values[np.isfinite(values)]
+
+
+def histogram_edges(values, bins='auto', binwidth=None):
+    """
+    Bin edges as seaborn would choose them: ``binwidth`` when given,
+    otherwise NumPy's ``bins`` rule
+    """
+    values = _clean(values)
+    if not len(values):
+        return np.array([0.0, 1.0])
+    if binwidth is not None:
+        start, stop = values.min(), values.max()
+        return np.arange(start, stop + binwidth, binwidth)
+    return np.histogram_bin_edges(values, bins=bins)
+
+
+def histogram(values, bins='auto', binwidth=None, edges=None):
+    """
+    Return (counts, edges) of a fixed-edge histogram
+    """
+    values = _clean(values)
+    if edges is None:
+        edges = histogram_edges(values, bins, binwidth)
+    counts, edges = np.histogram(values, bins=edges)
+    return counts, edges
+
+
+def scott_bandwidth(values):
+    """Scott's rule, the default of scipy's gaussian_kde used by seaborn"""
+    values = _clean(values)
+    n = len(values)
+    if n < 2:
+        return 0.0
+    return values.std(ddof=1) * n ** (-1 / 5)
+
+
+def kde_grid(values, grid_size=512, bw_adjust=1.0, cut=0, bandwidth=None):
+    """
+    Gaussian KDE evaluated on a regular grid with linear binning and an
+    FFT convolution: O(n + grid_size log grid_size) instead of the
+    O(n * grid_size) of evaluating every kernel at every grid point.
+
+    Parameters
+    ----------
+    values : array-like
+    grid_size : int
+        Number of grid points in the returned curve
+    bw_adjust : float
+        Multiplies the Scott bandwidth (same meaning as in seaborn)
+    cut : float
+        Extend the curve this many bandwidths past the data range
+        (seaborn's histplot uses 0)
+    bandwidth : float, optional
+        Explicit kernel standard deviation
+
+    Returns
+    -------
+    (grid, density) : numpy arrays; density integrates to 1. Both are
+    empty when there is no density to estimate (fewer than 2 values, or
+    a constant column, whose bandwidth is zero), like seaborn, which
+    draws no curve then.
+    """
+    values = _clean(values)
+    if len(values) < 2:
+        return np.array([]), np.array([])
+
+    bw = (scott_bandwidth(values) if bandwidth is None else bandwidth) * bw_adjust
+    lo, hi = values.min(), values.max()
+    if not bw > 0 or hi == lo:
+        return np.array([]), np.array([])
+
+    # Bin on a padded grid so the circular convolution does not wrap the
+    # tails around, then crop to [lo - cut*bw, hi + cut*bw]
+    pad = 4 * bw
+    grid_lo, grid_hi = lo - max(pad, cut * bw), hi + max(pad, cut * bw)
+    n_bins = max(grid_size * 4, 1024)
+    step = (grid_hi - grid_lo) / (n_bins - 1)
+
+    # Linear binning: each value splits its weight between its two
+    # neighbouring grid points
+    position = (values - grid_lo) / step
+    left = np.floor(position).astype(np.int64)
+    frac = position - left
+    weights = np.bincount(left, weights=1 - frac, minlength=n_bins)
+    weights += np.bincount(np.minimum(left + 1, n_bins - 1), weights=frac, minlength=n_bins)
+    weights = weights[:n_bins]
+
+    # Gaussian kernel sampled on the same grid, convolved via FFT
+    size = 2 * n_bins
+    offsets = np.fft.fftfreq(size, d=1 / size) * step
+    kernel = np.exp(-0.5 * (offsets / bw) ** 2)
+    kernel /= kernel.sum() * step
+    smoothed = np.fft.irfft(np.fft.rfft(weights, size) * np.fft.rfft(kernel), size)[:n_bins]
+    density = np.clip(smoothed, 0, None) / len(values)
+
+    full_grid = grid_lo + step * np.arange(n_bins)
+    grid = np.linspace(lo - cut * bw, hi + cut * bw, grid_size)
+    return grid, np.interp(grid, full_grid, density)
+
+
+def _pairs(x, y):
+    """Rows of ``x`` and ``y`` where both are finite, as float arrays"""
+    x = x.to_numpy(dtype=float, na_value=np.nan) if isinstance(x, pd.Series) else np.asarray(x, dtype=float)
+    y = y.to_numpy(dtype=float, na_value=np.nan) if isinstance(y, pd.Series) else np.asarray(y, dtype=float)
+    keep = np.isfinite(x) & np.isfinite(y)
+    return x[keep], y[keep]
+
+
+def histogram2d(x, y, bins=200):
+    """
+    Return (counts, x_edges, y_edges) of a regular 2D histogram over the
+    rows where both values are finite; bin indices are computed
+    arithmetically and counted with one ``bincount``, without the binary
+    search of ``np.histogram2d``
+    """
+    x, y = _pairs(x, y)
+    counts = np.zeros((bins, bins))
+    if not len(x):
+        return counts, np.linspace(0, 1, bins + 1), np.linspace(0, 1, bins + 1)
+
+    edges = []
+    index = []
+    for values in (x, y):
+        lo, hi = values.min(), values.max()
+        if hi == lo:
+            lo, hi = lo - 0.5, hi + 0.5
+        edges.append(np.linspace(lo, hi, bins + 1))
+        position = ((values - lo) * (bins / (hi - lo))).astype(np.int64)
+        index.append(np.minimum(position, bins - 1))
+
+    counts = np.bincount(index[0] * bins + index[1], minlength=bins * bins)
+    return counts.reshape(bins, bins), edges[0], edges[1]
+
+
+def regression_stats(x, y):
+    """
+    Sufficient statistics of the least-squares fit of ``y`` on ``x``
+    (rows where both are finite): 'n', 'mean_x', 'mean_y' and the
+    centred sums 'sxx', 'syy', 'sxy'
+    """
+    x, y = _pairs(x, y)
+    n = len(x)
+    if not n:
+        return {'n': 0, 'mean_x': np.nan, 'mean_y': np.nan, 'sxx': 0.0, 'syy': 0.0, 'sxy': 0.0}
+    mean_x, mean_y = x.mean(), y.mean()
+    dx, dy = x - mean_x, y - mean_y
+    return {
+        'n': n, 'mean_x': mean_x, 'mean_y': mean_y,
+        'sxx': dx @ dx, 'syy': dy @ dy, 'sxy': dx @ dy,
+    }
+
+
+# Below this many degrees of freedom t quantiles are found from the exact
+# CDF; above it the Cornish-Fisher expansion is within 1e-6
+EXACT_T_DF = 30
+
+
+def t_quantile(p, df):
+    """
+    Quantile of Student's t distribution
+
+    Below ``EXACT_T_DF`` degrees of freedom (which must then be a whole
+    number) the exact CDF is inverted by bisection; above, a
+    Cornish-Fisher expansion around the normal quantile is used (within
+    1e-6 of the exact value, exact in the limit).
+    """
+    if not 0 < p < 1:
+        raise ValueError("p must be between 0 and 1")
+    if df < EXACT_T_DF:
+        if df < 1 or df != int(df):
+            raise ValueError(f"Below {EXACT_T_DF} degrees of freedom, df must be a whole number >= 1")
+        return _t_quantile_exact(p, int(df))
+
+    z = NormalDist().inv_cdf(p)
+    terms = [
+        (z ** 3 + z) / 4,
+        (5 * z ** 5 + 16 * z ** 3 + 3 * z) / 96,
+        (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / 384,
+        (79 * z ** 9 + 776 * z ** 7 + 1482 * z ** 5 - 1920 * z ** 3 - 945 * z) / 92160,
+    ]
+    return z + sum(term / df ** (k + 1) for k, term in enumerate(terms))
+
+
+def _t_cdf(t, df):
+    """
+    Exact CDF of Student's t for a whole number of degrees of freedom
+    (finite series of Abramowitz & Stegun 26.7.3 / 26.7.4)
+    """
+    theta = np.arctan(abs(t) / np.sqrt(df))
+    cos2 = np.cos(theta) ** 2
+    if df % 2:
+        term, total = 1.0, 1.0 if df > 1 else 0.0
+        for k in range(1, (df - 1) // 2):
+            term *= cos2 * 2 * k / (2 * k + 1)
+            total += term
+        inside = 2 / np.pi * (theta + np.sin(theta) * np.cos(theta) * total)
+    else:
+        term, total = 1.0, 1.0
+        for k in range(1, df // 2):
+            term *= cos2 * (2 * k - 1) / (2 * k)
+            total += term
+        inside = np.sin(theta) * total
+    return 0.5 + np.copysign(inside / 2, t)
+
+
+def _t_quantile_exact(p, df):
+    if p < 0.5:
+        return -_t_quantile_exact(1 - p, df)
+    lo, hi = 0.0, 1.0
+    while _t_cdf(hi, df) < p:
+        lo, hi = hi, hi * 2
+    for _ in range(100):
+        mid = (lo + hi) / 2
+        if _t_cdf(mid, df) < p:
+            lo = mid
+        else:
+            hi = mid
+        if hi - lo <= 1e-12 * hi:
+            break
+    return (lo + hi) / 2
+
+
+def regression_fit(stats, grid, ci=95):
+    """
+    Least-squares line and the confidence band of its mean prediction at
+    ``grid``, in closed form from ``regression_stats`` (or
+    ``CorrelationEngine.regression``):
+
+        se(x) = s * sqrt(1/n + (x - mean_x)**2 / sxx)
+
+    with ``s`` the residual standard deviation and a t quantile with
+    n - 2 degrees of freedom (exact for small n, see ``t_quantile``).
+    This is the band seaborn's ``regplot`` estimates by bootstrap,
+    without refitting.
+
+    Returns
+    -------
+    (fit, lower, upper) : numpy arrays; lower / upper are None without a
+    ``ci`` or with fewer than 3 rows. fit is None when x is constant.
+    """
+    grid = np.asarray(grid, dtype=float)
+    n, sxx = stats['n'], stats['sxx']
+    if n < 2 or not sxx > 0:
+        return None, None, None
+
+    slope = stats['sxy'] / sxx
+    fit = stats['mean_y'] + slope * (grid - stats['mean_x'])
+    if ci is None or n < 3:
+        return fit, None, None
+
+    residual = max(stats['syy'] - slope * stats['sxy'], 0.0) / (n - 2)
+    se = np.sqrt(residual * (1 / n + (grid - stats['mean_x']) ** 2 / sxx))
+    half = t_quantile(0.5 + ci / 200, n - 2) * se
+    return fit, fit - half, fit + half
+
+
+def box_stats(values, whis=1.5, label=None, max_fliers=MAX_FLIERS):
+    """
+    Box plot statistics in the format of ``Axes.bxp``
+    """
+    values = _clean(values)
+    if not len(values):
+        return None
+
+    q1, med, q3 = np.percentile(values, [25, 50, 75])
+    iqr = q3 - q1
+    low, high = q1 - whis * iqr, q3 + whis * iqr
+
+    inside = values[(values >= low) & (values <= high)]
+    fliers = np.unique(values[(values < low) | (values > high)])
+    if len(fliers) > max_fliers:
+        fliers = fliers[np.linspace(0, len(fliers) - 1, max_fliers).astype(int)]
+
+    return {
+        'label': label,
+        'med': med,
+        'q1': q1,
+        'q3': q3,
+        'whislo': inside.min() if len(inside) else q1,
+        'whishi': inside.max() if len(inside) else q3,
+        'fliers': fliers,
+        'mean': values.mean(),
+    }
+
+
+def violin_stats(values, grid_size=256, bw_adjust=1.0, cut=2):
+    """
+    Violin statistics in the format of ``Axes.violin`` (seaborn's violins
+    extend the density ``cut=2`` bandwidths past the data); None when the
+    values have no density (fewer than 2, or all equal)
+    """
+    values = _clean(values)
+    if len(values) < 2:
+        return None
+
+    coords, density = kde_grid(values, grid_size, bw_adjust=bw_adjust, cut=cut)
+    if not len(coords):
+        return None
+    return {
+        'coords': coords,
+        'vals': density,
+        'mean': values.mean(),
+        'median': np.median(values),
+        'min': values.min(),
+        'max': values.max(),
+        'quartiles': np.percentile(values, [25, 50, 75]),
+    }
+
+
+# -------------------------------------------------
+# Drawing from summaries
+# -------------------------------------------------
+
+def draw_hist_kde(ax, values, color, binwidth=None, bins='auto', label=None, alpha=0.75, kde=True):
+    """
+    Histogram (counts) with a KDE line scaled to the same counts, like
+    ``sns.histplot(..., kde=True)``
+    """
+    counts, edges = histogram(values, bins=bins, binwidth=binwidth)
+    widths = np.diff(edges)
+    ax.bar(edges[:-1], counts, width=widths, align='edge', color=color,
+           alpha=alpha, edgecolor='white', linewidth=0.5, label=label)
+
+    if kde:
+        grid, density = kde_grid(values, cut=0)
+        if len(grid) > 1:
+            ax.plot(grid, density * (counts * widths).sum(), color=color, linewidth=1.5)
+    ax.set_ylabel('Count')
+
+
+def draw_boxes(ax, groups, colors, orientation='horizontal'):
+    """
+    Box plots from ``box_stats`` of each group ({label: values})
+    """
+    stats = [box_stats(values, label=label) for label, values in groups.items()]
+    keep = [i for i, s in enumerate(stats) if s is not None]
+    if not keep:
+        return
+
+    artists = ax.bxp(
+        [stats[i] for i in keep],
+        positions=keep,
+        patch_artist=True,
+        medianprops={'color': 'black'},
+        flierprops={'marker': 'd', 'markersize': 3, 'markerfacecolor': 'gray', 'alpha': 0.5},
+        **_orientation(orientation),
+    )
+    for i, patch in zip(keep, artists['boxes']):
+        patch.set_facecolor(colors[i % len(colors)])
+
+
+def draw_violins(ax, groups, colors):
+    """
+    Violins with quartile lines from ``violin_stats`` of each group
+    ({label: values}), like ``sns.violinplot(..., inner='quartile')``
+    """
+    stats = [violin_stats(values) for values in groups.values()]
+    keep = [i for i, s in enumerate(stats) if s is not None]
+    if not keep:
+        return
+
+    parts = ax.violin([stats[i] for i in keep], positions=keep,
+                      showextrema=False, widths=0.8)
+    for i, body in zip(keep, parts['bodies']):
+        body.set_facecolor(colors[i % len(colors)])
+        body.set_edgecolor('black')
+        body.set_alpha(1)
+
+        # Quartile lines, as wide as the violin at that value
+        s = stats[i]
+        half_width = 0.4 / s['vals'].max()
+        for q, style in zip(s['quartiles'], ['--', '-', '--']):
+            width = np.interp(q, s['coords'], s['vals']) * half_width
+            ax.plot([i - width, i + width], [q, q], color='black', linestyle=style, linewidth=1)
+
+    ax.set_xticks(range(len(groups)), list(groups))
+
+
+def draw_density_scatter(ax, x, y, bins=200, cmap='viridis'):
+    """
+    Scatter plot of many rows as a density image: rows are counted on a
+    ``bins`` x ``bins`` grid and the counts drawn on a log colour scale,
+    so the drawing cost does not depend on the number of rows. Returns
+    the image (for a colorbar).
+    """
+    counts, x_edges, y_edges = histogram2d(x, y, bins)
+    shown = np.ma.masked_equal(counts.T, 0)
+    return ax.imshow(
+        shown, origin='lower', aspect='auto', interpolation='nearest', cmap=cmap,
+        extent=(x_edges[0], x_edges[-1], y_edges[0], y_edges[-1]),
+        norm=LogNorm(vmin=1, vmax=max(counts.max(), 1)),
+    )
+
+
+def draw_regression(ax, stats, lo, hi, ci=95, color='red', grid_size=100):
+    """
+    Regression line over [lo, hi] with its confidence band, from
+    sufficient statistics (see ``regression_fit``), like the line of
+    ``sns.regplot``
+    """
+    grid = np.linspace(lo, hi, grid_size)
+    fit, lower, upper = regression_fit(stats, grid, ci)
+    if fit is None:
+        return
+    ax.plot(grid, fit, color=color)
+    if lower is not None:
+        ax.fill_between(grid, lower, upper, color=color, alpha=0.15, linewidth=0)
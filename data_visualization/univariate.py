@@ -1,94 +1,141 @@
+from functools import partial
+
 import streamlit as st
-import matplotlib.pyplot as plt
 import seaborn as sns
+from matplotlib.patches import Circle
 import pandas as pd
 
+from data_preprocessor.features import DerivedFeatures
+from data_preprocessor.jobs import run_steps
+from data_visualization.figure_cache import show_figure, subplots
+from data_visualization.summaries import draw_boxes, draw_hist_kde
+
 
 class UnivariateHandler:
     """Helper for univariate visualizations."""
 
-    def __init__(self, df: pd.DataFrame):
+    def __init__(self, df: pd.DataFrame, cache=None, features=None, profile=None):
         self.df = df
+        self.cache = cache
+        self.features = features if features is not None else DerivedFeatures(df)
+        self.profile = profile
+
+    def _counts(self, column):
+        """Value counts of a column, from the column profile when there is one"""
+        if self.profile is not None:
+            return self.profile.top_values(column)
+        return self.df[column].value_counts()
+
+    def prepare(self, progress=None):
+        """
+        Compute what the plots read (value counts, derived columns)
+        without drawing or calling Streamlit, e.g. as a background job;
+        the plots then only draw. Returns the handler.
+        """
+        steps = [(c, partial(self._counts, c)) for c in ('user_type', 'bike_share_for_all_trip', 'member_gender')]
+        steps += [(c, partial(self.features.frame, [c])) for c in ('member_age', 'duration_min', 'duration_hr')]
+        run_steps(steps, progress)
+        return self
 
     def plot_user_type_distribution(self):
         st.subheader("🧍 User Type Distribution")
-        user_type = self.df['user_type'].value_counts().reindex(["Subscriber", "Customer"])
+        user_type = self._counts('user_type').reindex(["Subscriber", "Customer"])
+
+        def draw():
+            fig, ax = subplots(figsize=(8, 4))
+            sns.barplot(x=user_type.index, y=user_type.values, palette=["#2aaaa4", "#C5B048"], ax=ax)
+            ax.set_title("User Type Counts", fontweight='black')
+            for i, v in enumerate(user_type.values):
+                ax.text(i, v, v, ha='center', va='bottom')
+            return fig
 
-        fig, ax = plt.subplots(figsize=(8, 4))
-        sns.barplot(x=user_type.index, y=user_type.values, palette=["#2aaaa4", "#C5B048"], ax=ax)
-        ax.set_title("User Type Counts", fontweight='black')
-        for i, v in enumerate(user_type.values):
-            ax.text(i, v, v, ha='center', va='bottom')
-        st.pyplot(fig)
-        plt.close(fig)
+        show_figure(self.cache, 'univariate.user_type', self.df, ['user_type'], draw)
 
         st.markdown("**Percentages**")
         st.write((user_type / user_type.sum() * 100).round(2))
 
     def plot_bike_share_distribution(self):
         st.subheader("🚲 Bike Share for All Trip Distribution")
-        bs = self.df['bike_share_for_all_trip'].value_counts()
+        bs = self._counts('bike_share_for_all_trip')
 
-        fig, ax = plt.subplots(figsize=(8, 4))
-        sns.barplot(x=bs.index, y=bs.values, palette=["#2aaaa4", "#C5B048"], ax=ax)
-        ax.set_title("Bike share for all trip Counts", fontweight='black')
-        st.pyplot(fig)
-        plt.close(fig)
+        def draw():
+            fig, ax = subplots(figsize=(8, 4))
+            sns.barplot(x=bs.index, y=bs.values, palette=["#2aaaa4", "#C5B048"], ax=ax)
+            ax.set_title("Bike share for all trip Counts", fontweight='black')
+            return fig
+
+        show_figure(self.cache, 'univariate.bike_share', self.df, ['bike_share_for_all_trip'], draw)
 
         st.markdown("**Percentages**")
         st.write((bs / bs.sum() * 100).round(2))
 
     def plot_age_distribution(self):
-        CURRENT_YEAR = 2019
-        self.df['member_age'] = CURRENT_YEAR - self.df['member_birth_year']
+        data = self.features.frame(['member_age'])
         st.subheader("🎂 User Age Distribution")
-        fig, axs = plt.subplots(1, 2, figsize=(17, 6))
-        sns.histplot(x='member_age', data=self.df, kde=True, ax=axs[0], color="#2aaaa4", binwidth=2)
-        axs[0].set_title("users' distribution by age")
-        sns.boxplot(x='member_age', data=self.df, ax=axs[1], color="#C5B048")
-        axs[1].set_title("Age boxplot")
-        st.pyplot(fig)
-        plt.close(fig)
-
-        outliers = self.df[self.df['member_age'] > 100].shape[0]
+
+        def draw():
+            fig, axs = subplots(1, 2, figsize=(17, 6))
+            draw_hist_kde(axs[0], data['member_age'], "#2aaaa4", binwidth=2)
+            axs[0].set_xlabel('member_age')
+            axs[0].set_title("users' distribution by age")
+            draw_boxes(axs[1], {'': data['member_age']}, ["#C5B048"])
+            axs[1].set_xlabel('member_age')
+            axs[1].set_title("Age boxplot")
+            return fig
+
+        show_figure(self.cache, 'univariate.age', data, ['member_age'], draw,
+                    params={'binwidth': 2})
+
+        outliers = data[data['member_age'] > 100].shape[0]
         st.write(f"Number of age outliers (>100): {outliers}")
 
     def plot_duration_min_distribution(self):
-        self.df['duration_min'] = (self.df['duration_sec'] / 60).round(2)
+        data = self.features.frame(['duration_min'])
         st.subheader("⏱ Trip Duration (minutes) Distribution")
-        fig, axs = plt.subplots(1, 2, figsize=(17, 6))
-        sns.histplot(x='duration_min', data=self.df, kde=True, ax=axs[0], color="#2aaaa4")
-        axs[0].set_title("distribution for the trip duration in minutes")
-        sns.boxplot(x='duration_min', data=self.df, ax=axs[1], color="#C5B048")
-        axs[1].set_title("distribution for the trip duration in minutes")
-        st.pyplot(fig)
-        plt.close(fig)
+
+        def draw():
+            fig, axs = subplots(1, 2, figsize=(17, 6))
+            draw_hist_kde(axs[0], data['duration_min'], "#2aaaa4")
+            axs[0].set_xlabel('duration_min')
+            axs[0].set_title("distribution for the trip duration in minutes")
+            draw_boxes(axs[1], {'': data['duration_min']}, ["#C5B048"])
+            axs[1].set_xlabel('duration_min')
+            axs[1].set_title("distribution for the trip duration in minutes")
+            return fig
+
+        show_figure(self.cache, 'univariate.duration_min', data, ['duration_min'], draw)
 
     def plot_gender_distribution(self):
         st.subheader("👥 Member Gender Distribution")
-        gender = self.df['member_gender'].value_counts().reindex(["Male", "Female"])
+        gender = self._counts('member_gender').reindex(["Male", "Female"])
 
-        fig, axs = plt.subplots(1, 2, figsize=(17, 6))
-        sns.barplot(x=gender.index, y=gender.values, palette=["#2aaaa4", "#C5B048"], ax=axs[0])
-        axs[0].set_title("Member Gender Counts", fontweight='black')
-        for i, v in enumerate(gender.values):
-            axs[0].text(i, v, v, ha='center', va='bottom')
+        def draw():
+            fig, axs = subplots(1, 2, figsize=(17, 6))
+            sns.barplot(x=gender.index, y=gender.values, palette=["#2aaaa4", "#C5B048"], ax=axs[0])
+            axs[0].set_title("Member Gender Counts", fontweight='black')
+            for i, v in enumerate(gender.values):
+                axs[0].text(i, v, v, ha='center', va='bottom')
 
-        axs[1].pie(gender, labels=gender.index, autopct="%.2f%%", colors=["#2aaaa4", "#C5B048"], explode=[0, 0.1], startangle=90)
-        center = plt.Circle((0, 0), 0.3, fc='white')
-        axs[1].add_artist(center)
-        axs[1].set_title("Member Gender Rate", fontweight='black')
+            axs[1].pie(gender, labels=gender.index, autopct="%.2f%%", colors=["#2aaaa4", "#C5B048"], explode=[0, 0.1], startangle=90)
+            center = Circle((0, 0), 0.3, fc='white')
+            axs[1].add_artist(center)
+            axs[1].set_title("Member Gender Rate", fontweight='black')
+            return fig
 
-        st.pyplot(fig)
-        plt.close(fig)
+        show_figure(self.cache, 'univariate.gender', self.df, ['member_gender'], draw)
 
     def plot_duration_hr_distribution(self):
-        self.df['duration_hr'] = (self.df['duration_sec'] / 3600).round(2)
+        data = self.features.frame(['duration_hr'])
         st.subheader("⏱ Trip Duration (hours) Distribution")
-        fig, axs = plt.subplots(1, 2, figsize=(17, 6))
-        sns.histplot(x='duration_hr', data=self.df, kde=True, ax=axs[0], color="#2aaaa4")
-        axs[0].set_title("distribution for the trip duration in hours")
-        sns.boxplot(x='duration_hr', data=self.df, ax=axs[1], color="#C5B048")
-        axs[1].set_title("distribution for the trip duration in hours")
-        st.pyplot(fig)
-        plt.close(fig)
+
+        def draw():
+            fig, axs = subplots(1, 2, figsize=(17, 6))
+            draw_hist_kde(axs[0], data['duration_hr'], "#2aaaa4")
+            axs[0].set_xlabel('duration_hr')
+            axs[0].set_title("distribution for the trip duration in hours")
+            draw_boxes(axs[1], {'': data['duration_hr']}, ["#C5B048"])
+            axs[1].set_xlabel('duration_hr')
+            axs[1].set_title("distribution for the trip duration in hours")
+            return fig
+
+        show_figure(self.cache, 'univariate.duration_hr', data, ['duration_hr'], draw)
@@ -1,13 +1,26 @@
+import copy
+from contextlib import nullcontext
+from functools import partial
+
 import streamlit as st
-import pandas as pd
 
 from data_preprocessor.datatypes import DataTypeHandler
 from data_preprocessor.missing import MissingValuesHandler
 from data_preprocessor.duplicates import DuplicateHandler
 from data_preprocessor.outliers import OutlierHandler
-from data_visualization.multivariate import MultivariateHandler
-from data_visualization.univariate import UnivariateHandler
-from data_visualization.bivariate import BivariateHandler
+from data_preprocessor.plan import PreprocessingPlan
+from data_preprocessor.chunked import ChunkedProcessor
+from data_preprocessor.cache import DatasetCache
+from data_preprocessor.arrow import HAS_PYARROW
+from data_preprocessor.features import DerivedFeatures
+from data_preprocessor.column_profile import ColumnProfile
+from data_preprocessor.versions import VersionStore
+from data_preprocessor.profiling import Profiler
+from data_preprocessor.export import FORMATS, ExportCache, available_formats
+from data_preprocessor.jobs import JobScheduler
+from data_visualization.figure_cache import FigureCache
+from data_visualization.stats_cube import StatsCube
+from data_visualization.correlation import CorrelationEngine
 
 # -------------------------------------------------
 # Streamlit Page Setup
@@ -16,6 +29,183 @@ from data_visualization.bivariate import BivariateHandler
 st.set_page_config(page_title="Data Preprocessing App", layout="wide")
 st.title("🧹 Data Preprocessing Pipeline")
 
+
+@st.cache_resource
+def get_figure_cache():
+    # Shared by all sessions: figures are keyed on column contents
+    return FigureCache(max_bytes=128 * 1024**2)
+
+
+figure_cache = get_figure_cache()
+
+# -------------------------------------------------
+# Step Profiling (Sidebar)
+# -------------------------------------------------
+
+if "profiler" not in st.session_state:
+    st.session_state.profiler = Profiler()
+profiler = st.session_state.profiler
+
+profiling = st.sidebar.checkbox("Profile steps")
+if profiling:
+    profiler.log_path = st.sidebar.text_input("Profile log (JSON lines)", value="profile_log.jsonl") or None
+    profiler.trace_memory = st.sidebar.checkbox(
+        "Trace peak memory",
+        help="Uses tracemalloc while a step runs; slows every session on this server down a little.",
+    )
+
+
+def instrument(handler):
+    """Record the handler's method calls while profiling is on"""
+    return profiler.wrap(handler) if profiling else handler
+
+
+def measure(name, df=None, after=None):
+    return profiler.measure(name, df, after) if profiling else nullcontext()
+
+
+def show_profile():
+    """Sidebar panel with the timings recorded in this session"""
+    if not profiling:
+        return
+    with st.sidebar:
+        st.header("⏱️ Profile")
+        if not len(profiler):
+            st.caption("Run a step to record its timings.")
+            return
+        st.write("Totals per operation:")
+        st.dataframe(profiler.summary().round(4))
+        st.write("Latest calls:")
+        st.dataframe(profiler.to_frame().tail(20).iloc[::-1], hide_index=True)
+        st.download_button(
+            label="Download profile",
+            data=profiler.to_json(),
+            file_name="profile.json",
+            mime="application/json",
+        )
+        if st.button("Clear profile"):
+            profiler.clear()
+            st.rerun()
+
+
+# -------------------------------------------------
+# Background Jobs (Sidebar)
+# -------------------------------------------------
+
+@st.cache_resource
+def get_job_scheduler():
+    # One worker pool for the whole server; jobs are told apart by the
+    # dataset version they were submitted for, so sessions never share one
+    return JobScheduler()
+
+
+jobs = get_job_scheduler()
+
+background = st.sidebar.checkbox(
+    "Run long steps in background",
+    help="Duplicate detection and the statistics behind the analysis plots are computed "
+         "in background jobs with progress and a Cancel button; reruns pick up the job "
+         "already running.",
+)
+
+
+@st.fragment(run_every=0.5)
+def job_progress(job):
+    if job.done():
+        st.rerun()
+    st.progress(job.progress, text=f"{job.name}: {job.message or job.status} ({job.elapsed:.0f} s)")
+    if st.button("Cancel", key=f"cancel_{job.name}"):
+        job.cancel()
+
+
+def job_ready(job):
+    """Show a job's progress until it is done; True once its result is available"""
+    if job.status == "done":
+        return True
+    if job.status == "failed":
+        st.error(f"{job.name} failed: {job.error}")
+    elif job.status == "cancelled":
+        st.warning(f"{job.name} was cancelled.")
+        if st.button("Restart", key=f"restart_{job.name}"):
+            jobs.discard(job)
+            st.rerun()
+    else:
+        job_progress(job)
+    return False
+
+
+def prepared(name, handler, df):
+    """
+    The handler to plot with: in background mode ``handler.prepare`` (the
+    data the plots read, no drawing) runs as a job first and its handler
+    is returned once done (None until then)
+    """
+    if not background:
+        return handler
+    job = jobs.submit(name, handler.prepare, df=df)
+    if not job_ready(job):
+        return None
+    # A shallow copy shares the prepared state; profiling wraps only the copy
+    return copy.copy(job.result())
+
+
+def used_format(report, column):
+    """Datetime format a ``convert_datetimes`` report used for ``column`` (None if inferred per value)"""
+    fmt = report.loc[column, "format"]
+    return fmt if isinstance(fmt, str) else None
+
+
+def find_duplicates(handler, progress=None):
+    """Job: hash the rows once; the returned handler reuses the mask"""
+    handler.duplicated(progress=progress)
+    return handler
+
+
+# -------------------------------------------------
+# Large File Mode (chunked, out-of-core)
+# -------------------------------------------------
+
+if st.sidebar.checkbox("Large file mode (chunked)"):
+    st.subheader("📦 Large File Mode")
+    st.caption(
+        "The file is streamed in row blocks; memory use depends on the chunk "
+        "size, not on the file size."
+    )
+
+    source_path = st.text_input("CSV path on the server")
+    chunksize = st.number_input("Rows per chunk", min_value=1_000, value=100_000, step=10_000)
+
+    if not source_path:
+        st.info("Enter the path of a CSV file to begin.")
+        st.stop()
+
+    processor = instrument(ChunkedProcessor(source_path, chunksize=int(chunksize)))
+
+    if st.button("Inspect file"):
+        st.write("Data types:")
+        st.write(processor.check_dtypes())
+        st.write("Missing values summary:")
+        st.dataframe(processor.check_nulls())
+        st.write(f"Duplicate rows: {processor.check_duplicates()}")
+        st.write("IQR bounds (approximate):")
+        st.dataframe(processor.iqr_bounds())
+        st.write("Correlation matrix (merged across chunks):")
+        with measure("CorrelationEngine.from_chunks"):
+            engine = CorrelationEngine.from_chunks(processor.chunks())
+        st.dataframe(engine.pearson().round(3))
+
+    plan_file = st.file_uploader("Plan to apply", type=["json"])
+    output_path = st.text_input("Output CSV path", value="cleaned_dataset.csv")
+
+    if plan_file is not None and st.button("Process file"):
+        result = processor.process(PreprocessingPlan.from_json(plan_file), output_path)
+        st.success(
+            f"Wrote {result['rows_out']:,} of {result['rows_in']:,} rows to {output_path}"
+        )
+
+    show_profile()
+    st.stop()
+
 # -------------------------------------------------
 # Upload Data
 # -------------------------------------------------
@@ -30,15 +220,131 @@ if uploaded_file is None:
 # Load Data into Session State
 # -------------------------------------------------
 
+dataset_cache = DatasetCache()
+
+arrow_mode = st.sidebar.checkbox(
+    "Arrow-backed dtypes",
+    disabled=not HAS_PYARROW,
+    help="Parse with the pyarrow engine into Arrow string, dictionary and timestamp "
+         "columns (less memory, faster duplicate checks and grouping). "
+         "Applies when a file is loaded.",
+)
+
 if "df" not in st.session_state:
-    st.session_state.df = pd.read_csv(uploaded_file)
+    with measure("load_csv", after=lambda: st.session_state.get("df")):
+        st.session_state.df, from_cache = dataset_cache.load_csv(uploaded_file, arrow=arrow_mode)
+    if from_cache:
+        st.toast("Loaded parsed copy from the dataset cache")
+
+with st.sidebar.expander("🗄️ Dataset Cache"):
+    st.write(f"Size: {dataset_cache.total_bytes() / 1024**2:.1f} MB")
+    st.dataframe(dataset_cache.info())
+    if st.button("Clear cache"):
+        dataset_cache.clear()
+        st.success("Cache cleared")
+
+if "plan" not in st.session_state:
+    st.session_state.plan = PreprocessingPlan()
+
+# Every applied step becomes a version; unchanged columns are shared
+if "versions" not in st.session_state:
+    st.session_state.versions = VersionStore(st.session_state.df, name="Uploaded file")
+
+
+def save_version(name, new_df):
+    """Store the result of a step as a new version, with the plan so far"""
+    versions = st.session_state.versions
+    versions.commit(new_df, name, plan=st.session_state.plan.to_dict())
+    st.session_state.df = versions.checkout()
+
+
+def restore_version(new_df):
+    """Make an older/newer version the working dataset, plan included"""
+    st.session_state.df = new_df
+    plan = st.session_state.versions.info().get("plan")
+    st.session_state.plan = PreprocessingPlan.from_dict(plan) if plan else PreprocessingPlan()
+    st.rerun()
+
+
+# -------------------------------------------------
+# Replayable Plan (Sidebar)
+# -------------------------------------------------
+
+with st.sidebar:
+    st.header("📋 Preprocessing Plan")
+    st.write(f"Recorded steps: {len(st.session_state.plan)}")
+
+    if len(st.session_state.plan):
+        st.code(st.session_state.plan.explain())
+        st.download_button(
+            label="Download plan",
+            data=st.session_state.plan.to_json(),
+            file_name="preprocessing_plan.json",
+            mime="application/json",
+        )
+
+    plan_file = st.file_uploader("Replay a saved plan", type=["json"])
+    if plan_file is not None and st.button("Apply saved plan"):
+        saved_plan = PreprocessingPlan.from_json(plan_file)
+        st.session_state.plan = saved_plan
+        save_version(
+            "Saved plan",
+            saved_plan.execute(st.session_state.df, profiler=profiler if profiling else None),
+        )
+        st.success(f"Applied {len(saved_plan)} steps")
+
+# -------------------------------------------------
+# Version History (Sidebar)
+# -------------------------------------------------
+
+with st.sidebar:
+    st.header("🕘 Versions")
+    versions = st.session_state.versions
+
+    undo_col, redo_col = st.columns(2)
+    if undo_col.button("↩️ Undo", disabled=not versions.can_undo):
+        restore_version(versions.undo())
+    if redo_col.button("↪️ Redo", disabled=not versions.can_redo):
+        restore_version(versions.redo())
+
+    history = versions.history()
+    target = st.selectbox(
+        "Jump to version",
+        history["version"].tolist(),
+        index=versions.position,
+        format_func=lambda v: f"{v}: {history['name'][v]}",
+    )
+    if target != versions.position and st.button("Jump"):
+        restore_version(versions.jump(target))
+
+    st.dataframe(history, hide_index=True)
+    st.caption(f"Memory held by all versions: {versions.memory_usage() / 1024**2:.1f} MB")
 
 df = st.session_state.df
 
+# Derived columns (duration_min, member_age, ...) live here, not in df
+if "features" not in st.session_state:
+    st.session_state.features = DerivedFeatures(df)
+features = st.session_state.features
+features.bind(df)
+
+# Per-column statistics shared by the steps; only changed columns are re-profiled
+if "column_profile" not in st.session_state:
+    st.session_state.column_profile = ColumnProfile(df)
+profile = st.session_state.column_profile
+profile.bind(df)
+
 st.success("Dataset loaded successfully!")
 
 st.subheader("Dataset Preview")
 st.dataframe(df.head())
+
+with st.expander("Column profile"):
+    if st.checkbox("Profile all columns"):
+        with measure("column_profile", df):
+            stats = profile.stats()
+        # Mixed-type statistic columns (min, max, top) are shown as text
+        st.dataframe(stats.astype({c: str for c in ["min", "max", "top"]}))
 st.write("Shape:", df.shape)
 
 # -------------------------------------------------
@@ -52,6 +358,7 @@ step = st.selectbox(
     [
         "Check Data Types",
         "Convert Data Type",
+        "Optimize Memory",
         "Handle Missing Values",
         "Handle Duplicates",
         "Handle Outliers",
@@ -66,23 +373,71 @@ step = st.selectbox(
 # -------------------------------------------------
 
 if step == "Convert Data Type":
-    handler = DataTypeHandler(df)
+    handler = instrument(DataTypeHandler(df, profile=profile))
 
     column = st.selectbox("Select column", df.columns)
     dtype = st.selectbox("Select new dtype", ["int", "float", "category", "datetime"])
 
     if st.button("Convert Data Type"):
-        handler.convert_dtype(column, dtype)
-        st.session_state.df = handler.df
+        if dtype == "datetime":
+            report = handler.convert_datetimes([column])
+        else:
+            handler.convert_dtype(column, dtype)
+        if dtype == "datetime":
+            # The format used, so replaying the plan parses the same way
+            st.session_state.plan.dtypes.convert_dtype(column, dtype, format=used_format(report, column))
+        else:
+            st.session_state.plan.dtypes.convert_dtype(column, dtype)
+        save_version(f"Convert {column} to {dtype}", handler.df)
         st.success("Data type converted successfully!")
+        if dtype == "datetime" and report["coerced_to_NaT"].sum():
+            st.warning(f"{report['coerced_to_NaT'].sum()} value(s) could not be parsed and became NaT")
         st.write(handler.df.dtypes)
 
+    with st.expander("Convert several datetime columns at once"):
+        text_columns = df.select_dtypes(exclude=["number", "datetime"]).columns.tolist()
+        date_columns = st.multiselect(
+            "Columns (e.g. start_time, end_time)",
+            text_columns,
+            default=[c for c in ("start_time", "end_time") if c in text_columns],
+        )
+        date_format = st.text_input("Format (empty = infer from a sample)", value="")
+
+        if date_columns and st.button("Convert to datetime"):
+            report = handler.convert_datetimes(date_columns, format=date_format or None)
+            for col in date_columns:
+                st.session_state.plan.dtypes.convert_dtype(col, "datetime", format=used_format(report, col))
+            save_version(f"Convert {len(date_columns)} columns to datetime", handler.df)
+            st.dataframe(report)
+
+# -------------------------------------------------
+# Optimize Memory
+# -------------------------------------------------
+
+if step == "Optimize Memory":
+    handler = instrument(DataTypeHandler(df, profile=profile))
+
+    st.write(
+        "Downcast numbers, turn low-cardinality text into categories and "
+        "timestamp text into datetimes."
+    )
+
+    if st.button("Optimize Memory"):
+        report = handler.optimize_memory()
+        st.session_state.plan.dtypes.optimize_memory()
+        save_version("Optimize memory", handler.df)
+
+        before = report["memory_before"].sum() / 1024**2
+        after = report["memory_after"].sum() / 1024**2
+        st.success(f"Memory: {before:.1f} MB → {after:.1f} MB")
+        st.dataframe(report)
+
 # -------------------------------------------------
 # 3️⃣ Handle Missing Values
 # -------------------------------------------------
 
 if step == "Handle Missing Values":
-    handler = MissingValuesHandler(df)
+    handler = instrument(MissingValuesHandler(df, profile=profile))
 
     st.write("Missing values summary:")
     st.dataframe(handler.check_nulls())
@@ -92,31 +447,59 @@ if step == "Handle Missing Values":
 
     if st.button("Apply Missing Value Strategy"):
         handler.handle_nulls(column, strategy)
-        st.session_state.df = handler.df
+        st.session_state.plan.missing.handle_nulls(column, strategy)
+        save_version(f"Nulls in {column}: {strategy}", handler.df)
         st.success("Missing values handled successfully!")
         st.dataframe(handler.df.head())
 
+    with st.expander("Batch mode (several columns, optional group-wise fill)"):
+        null_columns = [c for c, n in profile.nulls().items() if n > 0]
+        strategies = {}
+        for col in null_columns:
+            choice = st.selectbox(
+                f"{col}", ["skip", "drop", "mean", "median", "mode"], key=f"batch_{col}"
+            )
+            if choice != "skip":
+                strategies[col] = choice
+
+        group_by = st.multiselect(
+            "Fill within groups of (e.g. user_type, member_gender)",
+            [c for c in df.columns if c not in strategies],
+        )
+
+        if strategies and st.button("Apply to all selected columns"):
+            handler.handle_nulls_many(strategies, by=group_by or None)
+            st.session_state.plan.missing.handle_nulls_many(strategies, by=group_by or None)
+            save_version(f"Nulls in {len(strategies)} columns", handler.df)
+            st.success(f"Missing values handled in {len(strategies)} column(s)")
+            st.dataframe(handler.check_nulls())
+
 # -------------------------------------------------
 # 4️⃣ Handle Duplicates
 # -------------------------------------------------
 
 if step == "Handle Duplicates":
-    handler = DuplicateHandler(df)
-
-    duplicate_count = handler.check_duplicates()
-    st.write(f"Duplicate rows: {duplicate_count}")
-
-    if duplicate_count > 0 and st.button("Remove Duplicates"):
-        handler.remove_duplicates()
-        st.session_state.df = handler.df
-        st.success("Duplicates removed successfully!")
-        st.write("New shape:", handler.df.shape)
-
-if step == "Handle Duplicates":
-    handler = DuplicateHandler(df)
-
-    dup_count = handler.check_duplicates()
-    st.write(f"Duplicate rows: {dup_count}")
+    key_columns = st.multiselect(
+        "Key columns (empty = all columns)", df.columns.tolist(), default=[]
+    )
+    keep = st.selectbox("Keep", ["first", "last", False])
+    # One handler per session: its row hashes and duplicate masks survive
+    # reruns and are recomputed only when the key columns change
+    if "duplicates" not in st.session_state:
+        st.session_state.duplicates = DuplicateHandler(df)
+    handler = st.session_state.duplicates.bind(df, subset=key_columns or None, keep=keep)
+    ready = True
+    if background:
+        job = jobs.submit("Find duplicates", find_duplicates, handler, df=df, key=(tuple(key_columns), keep))
+        ready = job_ready(job)
+        if ready:
+            handler = job.result()
+    # A shallow copy shares the caches; profiling wraps only this rerun's copy
+    handler = instrument(copy.copy(handler))
+
+    dup_count = handler.check_duplicates() if ready else 0
+    if ready:
+        st.write(f"Duplicate rows: {dup_count}")
 
     if dup_count > 0:
         if st.checkbox("Show duplicated rows"):
@@ -130,33 +513,63 @@ if step == "Handle Duplicates":
             if new_val == "":
                 new_val = None
             handler.replace_in_duplicates(column, old_val, new_val)
-            st.session_state.df = handler.df
+            save_version(f"Edit duplicated {column}", handler.df)
             st.success("Duplicated rows updated")
 
         if st.button("Remove duplicated rows"):
             handler.remove_duplicates()
-            st.session_state.df = handler.df
+            st.session_state.plan.duplicates.remove_duplicates(handler.subset, keep)
+            save_version("Remove duplicates", handler.df)
             st.success("Duplicated rows removed")
+            st.write("New shape:", handler.df.shape)
+
+    st.markdown("**Rows already ingested in earlier months**")
+    index_path = st.text_input("Hash index file", value="ingested_rows.npy")
+
+    if st.button("Check against index"):
+        seen = handler.check_against_index(index_path)
+        st.write(f"Rows seen in earlier months: {int(seen.sum())}")
+
+    if st.button("Remove seen rows and update index"):
+        removed = handler.remove_seen(index_path)
+        save_version("Remove rows seen earlier", handler.df)
+        st.success(f"Removed {removed} rows; index saved to {index_path}")
 
 # -------------------------------------------------
 # 5️⃣ Handle Outliers
 # -------------------------------------------------
 
 if step == "Handle Outliers":
-    handler = OutlierHandler(df)
+    handler = instrument(OutlierHandler(df, profile=profile))
 
-    numeric_columns = df.select_dtypes(include="number").columns
+    numeric_columns = profile.numeric_columns()
 
     if len(numeric_columns) == 0:
         st.warning("No numeric columns available.")
     else:
-        column = st.selectbox("Select numeric column", numeric_columns)
-
-        if st.button("Cap Outliers (IQR Method)"):
-            handler.cap_iqr(column)
-            st.session_state.df = handler.df
-            st.success(f"Outliers capped for column '{column}'")
-            st.dataframe(handler.df[[column]].describe())
+        columns = st.multiselect(
+            "Select numeric columns", numeric_columns, default=numeric_columns[:1]
+        )
+        method = st.selectbox("Method", ["iqr", "zscore", "mad", "percentile"])
+        action = st.radio("Action", ["cap", "flag"], horizontal=True)
+
+        if columns:
+            st.write("Outlier report:")
+            st.dataframe(handler.outlier_report(columns, method))
+
+            if st.checkbox("Show boxplot"):
+                import matplotlib.pyplot as plt
+
+                fig = handler.boxplot(columns)
+                st.pyplot(fig)
+                plt.close(fig)
+
+        if columns and st.button("Apply"):
+            handler.handle_outliers(columns, method, action=action)
+            st.session_state.plan.outliers.handle_outliers(columns, method, action=action)
+            save_version(f"Outliers ({method}, {action})", handler.df)
+            st.success(f"Outliers {'capped' if action == 'cap' else 'flagged'} in {len(columns)} column(s)")
+            st.dataframe(handler.df[columns].describe())
 
 # -------------------------------------------------
 # 6️⃣ Replace Values
@@ -174,7 +587,7 @@ if step == "Replace Values":
             new_value = None
 
         df[column] = df[column].replace(old_value, new_value)
-        st.session_state.df = df
+        save_version(f"Replace values in {column}", df)
 
         st.success("Values replaced successfully")
         st.dataframe(df.head())
@@ -184,25 +597,56 @@ if step == "Replace Values":
 # -------------------------------------------------
 if step == "Univariate Analysis":
     st.subheader("📈 Univariate Analysis")
-    handler = UnivariateHandler(df)
-    handler.plot_user_type_distribution()
-    handler.plot_bike_share_distribution()
-    handler.plot_age_distribution()
-    handler.plot_duration_min_distribution()
-    handler.plot_gender_distribution()
-    handler.plot_duration_hr_distribution()
+    # Plot modules (and matplotlib / seaborn with them) load on first use
+    from data_visualization.univariate import UnivariateHandler
+
+    plots = [
+        "plot_user_type_distribution",
+        "plot_bike_share_distribution",
+        "plot_age_distribution",
+        "plot_duration_min_distribution",
+        "plot_gender_distribution",
+        "plot_duration_hr_distribution",
+    ]
+    handler = prepared("Univariate statistics", UnivariateHandler(
+        df, cache=figure_cache, features=features, profile=profile
+    ), df)
+    if handler is not None:
+        handler = instrument(handler)
+        for plot in plots:
+            getattr(handler, plot)()
 
 # -------------------------------------------------
 # 8️⃣ Bivariate Analysis
 # -------------------------------------------------
 if step == "Bivariate Analysis":
     st.subheader("📊 Bivariate Analysis")
-    handler = BivariateHandler(df)
-    handler.avg_duration_by_user_type()
-    handler.duration_by_gender()
-    handler.duration_by_user_type()
-    handler.age_by_user_type()
-    handler.age_by_gender()
+    from data_visualization.bivariate import BivariateHandler
+
+    # One grouped pass shared by every bivariate table, rebuilt only when
+    # the underlying columns change
+    cube = st.session_state.get("stats_cube")
+    if cube is not None and not cube.is_current(df):
+        cube = None
+    if cube is None and not background:
+        with measure("StatsCube", df):
+            cube = st.session_state.stats_cube = StatsCube(df, features=features, profile=profile)
+    plots = [
+        "avg_duration_by_user_type",
+        "duration_by_gender",
+        "duration_by_user_type",
+        "age_by_user_type",
+        "age_by_gender",
+    ]
+    # In background mode a missing cube is built by the job
+    handler = prepared("Bivariate statistics", BivariateHandler(
+        df, cache=figure_cache, features=features, cube=cube, profile=profile
+    ), df)
+    if handler is not None:
+        st.session_state.stats_cube = handler.cube
+        handler = instrument(handler)
+        for plot in plots:
+            getattr(handler, plot)()
 
 # -------------------------------------------------
 # 9️⃣ Multivariate Analysis
@@ -210,8 +654,15 @@ if step == "Bivariate Analysis":
 
 if step == "Multivariate Analysis":
     st.subheader("📊 Multivariate Analysis")
+    from data_visualization.multivariate import MultivariateHandler
 
-    handler = MultivariateHandler(df)
+    # Correlation statistics persist across reruns; the handler refreshes
+    # only the columns that changed since the last run
+    if "correlation_engine" not in st.session_state:
+        st.session_state.correlation_engine = CorrelationEngine()
+    handler = prepared("Correlation statistics", MultivariateHandler(
+        df, cache=figure_cache, engine=st.session_state.correlation_engine, profile=profile
+    ), df)
 
     plot_choice = st.radio(
         "Choose a visualization:",
@@ -222,14 +673,13 @@ if step == "Multivariate Analysis":
         ],
     )
 
-    if plot_choice == "Correlation Heatmap (All Variables)":
-        handler.plot_correlation_heatmap()
-
-    elif plot_choice == "Correlation Between Selected Variables":
-        handler.plot_specific_correlation()
-
-    elif plot_choice == "Correlation Between Statistics Variables":
-        handler.plot_data_stat_correlation()
+    plot = {
+        "Correlation Heatmap (All Variables)": "plot_correlation_heatmap",
+        "Correlation Between Selected Variables": "plot_specific_correlation",
+        "Correlation Between Statistics Variables": "plot_data_stat_correlation",
+    }[plot_choice]
+    if handler is not None:
+        getattr(instrument(handler), plot)()
 
 # -------------------------------------------------
 # Download Cleaned Dataset
@@ -237,8 +687,26 @@ if step == "Multivariate Analysis":
 
 st.subheader("Download Cleaned Dataset")
 
-csv = st.session_state.df.to_csv(index=False).encode("utf-8")
+extra_columns = st.multiselect(
+    "Include derived columns", features.available(), default=[]
+)
+export_format = st.selectbox(
+    "Format",
+    available_formats(),
+    format_func={"csv": "CSV", "csv.gz": "CSV (gzip)", "csv.zst": "CSV (zstd)", "parquet": "Parquet"}.get,
+)
+
+# The file is written only when the button is clicked, in row blocks, and
+# kept per dataset version and format for later downloads
+if "exports" not in st.session_state:
+    st.session_state.exports = ExportCache()
+extension, mime = FORMATS[export_format]
 
 st.download_button(
-    label="Download CSV", data=csv, file_name="cleaned_dataset.csv", mime="text/csv"
+    label="Download",
+    data=partial(st.session_state.exports.read, features.with_features(extra_columns), export_format),
+    file_name=f"cleaned_dataset.{extension}",
+    mime=mime,
 )
+
+show_profile()